@@ -1,28 +1,48 @@
 """ :module PseudomonasDotComScraper: Hosting the PseudomonasDotComScraper, an API for the https://www.pseudomonas.com database web interface. """
 
+from GenDBScraper.Utilities import instrumentation, profiling
 from GenDBScraper.Utilities.json_utilities import JSONEncoder
-from GenDBScraper.Utilities.web_utilities import guarded_get
+from GenDBScraper.Utilities.lazy_import import lazy_import
+from GenDBScraper.Utilities.orthoxml_utilities import read_orthoxml
+from GenDBScraper.Utilities.regex_utilities import PATTERNS, pattern, collapse_whitespace, remove_whitespace, remove_tabs, underscore_whitespace
+from GenDBScraper.Utilities.schema_utilities import normalize_panels
+from GenDBScraper.Utilities.sequence_utilities import clean_sequences, write_fasta, PROTEIN_TAG, SEQUENCE_TAGS
+from GenDBScraper.Utilities.transposon_utilities import InsertionTable, reshape_key_value_table
+from GenDBScraper.Utilities.web_utilities import guarded_get, open_stream, log_progress, probe
 
 # 3rd party imports
-from bs4 import BeautifulSoup
 from collections import OrderedDict
 from collections import namedtuple
-from doi2bib import crossref
-from io import StringIO
-from pubmed_lookup import Publication, PubMedLookup
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import json
 import logging
-import numpy
-import pandas
-import re
+import os
 import tempfile
-import xmltodict
+import threading
+
+# Heavy modules, loaded on first use.
+bs4 = lazy_import('bs4')
+crossref = lazy_import('doi2bib.crossref')
+numpy = lazy_import('numpy')
+pandas = lazy_import('pandas')
+pubmed_lookup = lazy_import('pubmed_lookup')
 
 # Configure logging.
 logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level=logging.INFO)
 
-# Constrain pandas assignments:
-pandas.set_option('mode.chained_assignment', 'raise')
+# Limits for streamed ortholog downloads: maximum size in bytes and number of table rows parsed per chunk.
+ORTHOLOGS_MAX_BYTES = 512 * 1024**2
+ORTHOLOGS_CHUNK_ROWS = 10000
+
+# Exit codes of the command line interface (2 is taken by argparse for usage errors).
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_PARTIAL = 3
+EXIT_CONNECTION = 4
+EXIT_OUTPUT = 5
+
+# Panels of a query result, in scraping order.
+PANELS = ("Overview", "Sequences", "Function/Pathways/GO", "Motifs", "Operons", "Transposon Insertions", "Updates", "Orthologs")
 
 # Define the query datastructure.
 pdc_query = namedtuple('pdc_query',
@@ -47,6 +67,9 @@ class PseudomonasDotComScraper():
 
         """
 
+        # Constrain pandas assignments (set here rather than at import time to keep pandas unloaded until needed).
+        pandas.set_option('mode.chained_assignment', 'raise')
+
         # Initialize all variables.
         self.__query = None
         self.__pdc_url = 'https://www.pseudomonas.com'
@@ -54,6 +77,9 @@ class PseudomonasDotComScraper():
         self.__connected = False
         self.__results = None
 
+        # Feature page URLs by (strain, organism, feature), kept for the lifetime of the scraper.
+        self.__feature_urls = dict()
+
         # Set attributes via setter.
         self.query = query
 
@@ -152,12 +178,12 @@ class PseudomonasDotComScraper():
         return self.__results
 
     def connect(self):
-        """ Connect to the database. """
+        """ Connect to the database. The reachability check is shared by all scrapers in the process (see web_utilities.probe()). """
         try:
-            self.__browser = BeautifulSoup(guarded_get(self.__pdc_url), 'html.parser')
-        except:
+            probe(self.__pdc_url)
+        except ConnectionError:
             self.__connected = False
-            raise ConnectionError("Connecting to {0:s} failed. Make sure the URL is set correctly and is reachable.")
+            raise ConnectionError("Connecting to {0:s} failed. Make sure the URL is set correctly and is reachable.".format(self.__pdc_url))
 
         self.__connected = True
 
@@ -184,7 +210,8 @@ class PseudomonasDotComScraper():
 
         for query in self.query:
             key = "{0:s}__{1:s}".format(query.strain, query.feature)
-            results[key] = self._run_one_query(query)
+            with instrumentation.feature(key):
+                results[key] = self._run_one_query(query)
 
         self.__results = results
 
@@ -195,6 +222,11 @@ class PseudomonasDotComScraper():
         :type  query: pdc_query
         """
 
+        # Reuse the URL if the feature was looked up before.
+        cache_key = (query.strain, query.organism, query.feature)
+        if cache_key in self.__feature_urls:
+            return self.__feature_urls[cache_key]
+
         # Form http self.query string.
         _feature = query.feature
         if _feature is None:
@@ -210,35 +242,78 @@ class PseudomonasDotComScraper():
         logging.debug("Will now open {0:s} .".format(_url))
 
         # Get the soup for the assembled url.
-        browser = BeautifulSoup(guarded_get(_url), 'html.parser')
+        browser = bs4.BeautifulSoup(guarded_get(_url), 'html.parser')
 
         # If we're looking for a unique feature.
         if _feature is not '':
-            feature_link = browser.find_all('a', string=re.compile(_feature.upper()))[0].get('href')
+            feature_link = browser.find_all('a', string=pattern(_feature.upper()))[0].get('href')
+
+        self.__feature_urls[cache_key] = self.__pdc_url + feature_link
+
+        return self.__feature_urls[cache_key]
 
-        return self.__pdc_url + feature_link
+    def run_panels(self, query, titles):
+        """ Run one query for some panels only, e.g. to fill the gaps of bulk imported results (see bulk_import.fill_gaps()).
 
-    def _run_one_query(self, query):
+        :param query: The query object to run.
+        :type  query: (pdc_query | dict)
+
+        :param titles: The panel titles to scrape, see PANELS.
+        :type  titles: iterable
+
+        :return: The scraped panels by title.
+        :rtype: dict
+
+        """
+
+        if not self.__connected:
+            raise RuntimeError("Not connected. Call .connect() before submitting the query.")
+
+        titles = set(titles)
+        unknown = titles.difference(PANELS)
+        if unknown:
+            raise ValueError("Unknown panels {0:s}, expected any of {1:s}.".format(", ".join(sorted(unknown)), ", ".join(PANELS)))
+
+        if isinstance(query, dict):
+            query = pdc_query(**query)
+
+        with instrumentation.feature("{0:s}__{1:s}".format(query.strain, query.feature)):
+            return self._run_one_query(query, titles)
+
+    def _run_one_query(self, query, titles=None):
         """ """
         """ Workhorse function to run a query.
 
         :param query: Query object to submit.
         :type  query: pdc_query
+
+        :param titles: Only scrape these panels. Default: All panels.
+        :type  titles: set
         """
 
         # Setup dict to store self.query results.
         panels = dict()
-        feature_url = self._get_feature_url(query)
+        with instrumentation.panel("Feature URL"):
+            feature_url = self._get_feature_url(query)
 
         # Go through all panels and pull data.
-        panels["Overview"] = self._get_overview(feature_url)
-        panels["Sequences"] = self._get_sequences(feature_url)
-        panels["Function/Pathways/GO"] = self._get_functions_pathways_go(feature_url)
-        panels["Motifs"] = self._get_motifs(feature_url)
-        panels["Operons"] = self._get_operons(feature_url)
-        panels["Transposon Insertions"] = self._get_transposon_insertions(feature_url)
-        panels["Updates"] = self._get_updates(feature_url)
-        panels["Orthologs"] = self._get_orthologs(feature_url)
+        for title, extractor in (("Overview", self._get_overview),
+                                 ("Sequences", self._get_sequences),
+                                 ("Function/Pathways/GO", self._get_functions_pathways_go),
+                                 ("Motifs", self._get_motifs),
+                                 ("Operons", self._get_operons),
+                                 ("Transposon Insertions", self._get_transposon_insertions),
+                                 ("Updates", self._get_updates),
+                                 ("Orthologs", self._get_orthologs),
+                                 ):
+            if titles is not None and title not in titles:
+                continue
+            with instrumentation.panel(title):
+                panels[title] = extractor(feature_url)
+
+        # Convert table columns to compact dtypes.
+        with instrumentation.panel("Normalization"), instrumentation.dataframe():
+            normalize_panels(panels)
 
         # All done, return.
         return panels
@@ -257,7 +332,7 @@ class PseudomonasDotComScraper():
         overview_url = url + "&view=overview"
 
         # Get the soup.
-        browser = BeautifulSoup(guarded_get(overview_url), 'lxml')
+        browser = bs4.BeautifulSoup(guarded_get(overview_url), 'lxml')
 
         # Empty return dict.
         overview_panel = dict()
@@ -283,11 +358,11 @@ class PseudomonasDotComScraper():
         """ Extract the cross-references table with hyperlinks from the feature overview tab. """
         # Get ovierview tab.
         cross_references_url = url + "&view=overview"
-        soup = BeautifulSoup(guarded_get(cross_references_url), 'lxml')
+        soup = bs4.BeautifulSoup(guarded_get(cross_references_url), 'lxml')
 
         # Navigate to heading.
         table_heading = "Cross-References"
-        heading = soup.find('h3', string=re.compile(table_heading))
+        heading = soup.find('h3', string=pattern(table_heading))
 
         # Get content.
         cross_refs = heading.find_next_sibling('table')
@@ -297,9 +372,6 @@ class PseudomonasDotComScraper():
         ref_ids = []
         ref_urls = []
 
-        # Need to substitute \t\s sequences.
-        pattern = re.compile('[\t\s]')
-
         # Loop over rows in the table.
         rows = cross_refs.find_all('tr')
         for i, row in enumerate(rows):
@@ -307,15 +379,15 @@ class PseudomonasDotComScraper():
 
             # Parse the data. First column is the reference type, second is the id, sometimes it's a hyperlink.
             ref_type = cols[0].text
-            ref_type = pattern.sub('', ref_type)
+            ref_type = remove_whitespace(ref_type)
 
             # Get 2nd column.
             hyperlink = cols[1].find('a')
             if hyperlink is not None:
-                ref_id_text = pattern.sub('', hyperlink.text)
+                ref_id_text = remove_whitespace(hyperlink.text)
                 ref_id_url = hyperlink.get('href')
             else:
-                ref_id_text = pattern.sub('', cols[1].text)
+                ref_id_text = remove_whitespace(cols[1].text)
                 ref_id_url = None
 
             # Append to lists.
@@ -346,52 +418,12 @@ class PseudomonasDotComScraper():
         """
 
         sequence_url = url + "&view=sequence"
-        browser = BeautifulSoup(guarded_get(sequence_url), 'lxml')
+        browser = bs4.BeautifulSoup(guarded_get(sequence_url), 'lxml')
 
         df = _pandasDF_from_heading(browser, "Sequence Data", None).drop(index=0).drop(columns=2)
 
-        # Strip non-sequence information from tables.
-        # Replace whitespace by '_' in row title column.
-
-        # Genes
-        dna_pattern = re.compile(r"^DNA.+$")
-        dna_tags = [idx for idx in df[0] if dna_pattern.match(idx)]
-
-        # Setup empty dataframe to store cleaned up sequences.
-        blast_pattern = re.compile(r"BLAST.+$")
-        space_pattern = re.compile(r"[A-Z]\s[A-Z]")
-        separator_pattern = re.compile(r"([a-z,1-9])\s([A-Z]+)\s*$")
-
-        # Go though nucleotide sequences.
-        for tag in dna_tags:
-
-            # Get raw sequence.
-            seq = df.loc[df[0]==tag, 1].values[0]
-
-            # Remove blast links
-            seq = blast_pattern.sub("",seq)
-
-            # Remove spaces
-            seq = space_pattern.sub("", seq)
-
-            # Separate header and sequence.
-            seq = separator_pattern.sub(r'\1\n\2', seq)
-
-            # Store in dataframe
-            df.loc[df[0]==tag, 1] = seq
-
-        # amino acid tag
-        aaseq = df.loc[df[0]=="Amino Acid Sequence", 1].values[0]
-
-        # Strip blast porn
-        aaseq = blast_pattern.sub("", aaseq)
-        aaseq = space_pattern.sub("", aaseq)
-        aaseq = separator_pattern.sub(r'\1\n\2', aaseq)
-
-
-        df.loc[df[0]=="Amino Acid Sequence", 1] = aaseq
-
-        return df
+        # Strip non-sequence information from all nucleotide and amino acid sequences at once.
+        return clean_sequences(df)
 
     def _get_functions_pathways_go(self, url):
         """
@@ -410,14 +442,14 @@ class PseudomonasDotComScraper():
         # Get functions, pathways, GO
         function_url = url + "&view=functions"
 
-        browser = BeautifulSoup(guarded_get(function_url), 'lxml')
+        browser = bs4.BeautifulSoup(guarded_get(function_url), 'lxml')
 
         panels["Gene Ontology"] = _pandasDF_from_heading(browser, "Gene Ontology", None)
         panels["Functional Classifications Manually Assigned by PseudoCAP"] = _pandasDF_from_heading(browser, "Functional Classifications Manually Assigned by PseudoCAP", None)
         panels["Functional Predictions from Interpro"] = _pandasDF_from_heading(browser, "Functional Predictions from Interpro", None)
 
         # Convert E-values to floats.
-        panels["Functional Predictions from Interpro"]["E-value"] = pandas.to_numeric(panels["Functional Predictions from Interpro"]["E-value"], errors='coerce', downcast='float')
+        panels["Functional Predictions from Interpro"]["E-value"] = pandas.to_numeric(panels["Functional Predictions from Interpro"]["E-value"], errors='coerce')
 
         return panels
 
@@ -435,7 +467,7 @@ class PseudomonasDotComScraper():
         logging.info("Querying Motifs is not implemented yet.")
         # Get motifs tab.
         # motifs_url = url + "&view=motifs"
-        # BeautifulSoup(guarded_get(motifs_url), 'lxml')
+        # bs4.BeautifulSoup(guarded_get(motifs_url), 'lxml')
 
         return pandas.DataFrame()
 
@@ -452,11 +484,11 @@ class PseudomonasDotComScraper():
 
         # Get operons tab.
         operons_url = url + "&view=operons"
-        soup = BeautifulSoup(guarded_get(operons_url), 'lxml')
+        soup = bs4.BeautifulSoup(guarded_get(operons_url), 'lxml')
         table_heading = "Operons"
 
         # Navigate to heading.
-        heading = soup.find('h3', string=re.compile(table_heading))
+        heading = soup.find('h3', string=pattern(table_heading))
 
         # Get content.
         operons = heading.find_next_siblings('table')
@@ -470,39 +502,38 @@ class PseudomonasDotComScraper():
             operon_dict = dict()
 
             try:
-                tmp = pandas.read_html(str(operon))
+                with instrumentation.dataframe():
+                    tmp = pandas.read_html(str(operon))
             except:
                 logging.warning("No operon data found.")
                 break
 
-            name = operon.findChild(string=re.compile("Operon name"))
-            tabs = re.compile("\t*")
-            name = tabs.sub("", name)
+            name = operon.findChild(string=PATTERNS['operon_name'])
+            name = remove_tabs(name)
             name = name.split("\n")[2]
 
             operon_dict['Genes'] = tmp[1]
 
             # Collect metadata (evidence and cross-references)
             meta = {}
-            evidence = str(operon.find(string=re.compile('Evidence')).find_next('div').text)
-            evidence = re.compile("[\t\n\s\.]").sub("", evidence)
-            evidence = re.sub("\.", "", evidence)
+            evidence = str(operon.find(string=PATTERNS['evidence']).find_next('div').text)
+            evidence = remove_whitespace(evidence).replace(".", "")
             meta["Evidence"] = evidence
 
-            cross_references = str(operon.find(string=re.compile("Cross-References")).find_next('div').find_next('div').text)
-            cross_references = re.compile("[\t\n\s]").sub("", cross_references)
+            cross_references = str(operon.find(string=PATTERNS['cross_references']).find_next('div').find_next('div').text)
+            cross_references = remove_whitespace(cross_references)
             meta["Cross-References"] =  cross_references
 
             operon_dict["Meta"] = pandas.DataFrame([meta])
 
-            references = operon.find_all(string=re.compile('PubMed ID'))
+            references = operon.find_all(string=PATTERNS['pubmed_id'])
             refs = []
 
             for ref in references:
                 pubmed = ref.find_next_sibling('a')
                 pubmed_url = pubmed.get('href')
                 pubmed_id = str(pubmed.text)
-                pubmed_id = re.compile('[\t\n\s]').sub('', pubmed_id)
+                pubmed_id = remove_whitespace(pubmed_id)
 
                 refs.append(dict(pubmed_id=pubmed_id))
             operon_dict['References'] = pandas.DataFrame(refs)
@@ -527,12 +558,12 @@ class PseudomonasDotComScraper():
 
         # Get transposons tab.
         transposons_url = url + "&view=transposons"
-        browser = BeautifulSoup(guarded_get(transposons_url), 'html.parser')
+        browser = bs4.BeautifulSoup(guarded_get(transposons_url), 'html.parser')
 
         table_heading = "Transposon Insertions"
 
         # Get all headings with "Transposons" in them.
-        headings = browser.find_all('h3', string=re.compile(table_heading))
+        headings = browser.find_all('h3', string=pattern(table_heading))
 
         # Setup return dict.
         transposon_dict = dict()
@@ -541,12 +572,7 @@ class PseudomonasDotComScraper():
         for h in headings:
 
             # Have to reformat the key (get rid of \t\n sequences and whitespaces at beginning and end of lines.
-            key = h.get_text()
-            key = re.compile(r'\n+').sub(" ", key)
-            key = re.compile(r'\t+').sub(" ", key)
-            key = re.compile(r'\s+').sub(" ", key)
-            key = re.compile(r'^\s').sub("", key)
-            key = re.compile(r'\s$').sub("", key)
+            key = collapse_whitespace(h.get_text())
 
             # Every table goes in a dict by itself.
             transposon_dict[key] = None
@@ -554,7 +580,8 @@ class PseudomonasDotComScraper():
             # Get table from the parent if exists. If not, setup empty frame.
             parent = h.parent
             try:
-                table = pandas.read_html(str(parent))[0]
+                with instrumentation.dataframe():
+                    table = pandas.read_html(str(parent))[0]
             except ValueError:
                 table = pandas.DataFrame()
                 logging.warning("No transposon table found, will return empty DataFrame.")
@@ -569,23 +596,8 @@ class PseudomonasDotComScraper():
             # Drop rows with NaNs.
             table.dropna(inplace=True)
 
-            # Re-index
-            number_of_indices = len(table.index)
-            table.index = range(number_of_indices)
-
-            number_of_unique_indices = len(set(table.loc[:,0]))
-            # Pandas indexing is inclusive upper bound.
-            tables = [table.iloc[i*number_of_unique_indices:(i+1)*number_of_unique_indices] for i in range(number_of_indices//number_of_unique_indices)]
-            # Now insert each table into the return dictionary.
-            list_of_dicts = []
-            for i,table in enumerate(tables):
-                # Extract data to re-insert into dictionary from which to create the final frame.
-                keys = table.loc[:,0]
-                values = table.loc[:,1]
-                table_dict = OrderedDict(zip(keys, values))
-                list_of_dicts.append(table_dict)
-
-            transposon_dict[key] = pandas.DataFrame(list_of_dicts)
+            # One row per insertion.
+            transposon_dict[key] = reshape_key_value_table(table)
 
         # Return
         return transposon_dict
@@ -603,10 +615,11 @@ class PseudomonasDotComScraper():
 
         # Get updates tab.
         updates_url = url + "&view=updates"
-        browser = BeautifulSoup(guarded_get(updates_url), 'lxml')
+        browser = bs4.BeautifulSoup(guarded_get(updates_url), 'lxml')
 
-        heading = browser.find('h3', string=re.compile('Annotation Updates'))
-        updates = {"Annotation Updates" : pandas.read_html(str(heading.parent))[0]}
+        heading = browser.find('h3', string=PATTERNS['annotation_updates'])
+        with instrumentation.dataframe():
+            updates = {"Annotation Updates" : pandas.read_html(str(heading.parent))[0]}
 
         return updates
 
@@ -625,10 +638,11 @@ class PseudomonasDotComScraper():
         subcellular_localizations = dict()
         keys = ["Individual Mappings", "Additional evidence"]
         for key in keys:
-            table_ht = str(soup.find('td', string=re.compile(key + ".*$")).find_next('table'))
+            table_ht = str(soup.find('td', string=pattern(key + ".*$")).find_next('table'))
 
             try:
-                df = pandas.read_html(table_ht, index_col=None)[0]
+                with instrumentation.dataframe():
+                    df = pandas.read_html(table_ht, index_col=None)[0]
 
             except:
                 raise
@@ -662,14 +676,10 @@ class PseudomonasDotComScraper():
         # Construct the URL for the orthologs DB.
         orthologs_url = '/'.join([self.__pdc_url, 'orthologs', 'list?format=tab&extension=tab&id={}'.format(pdc_id)])
 
-        # GET html. Bail out if none.
+        # GET tab file in chunks. Bail out if none.
         try:
-            request = guarded_get(orthologs_url).decode('utf-8')
-
-            # Buffer the data.
-            with StringIO(request) as stream:
-                og = pandas.read_csv(stream, sep='\t')
-                stream.close()
+            with open_stream(orthologs_url, encoding='utf-8', max_bytes=ORTHOLOGS_MAX_BYTES, progress=log_progress) as stream:
+                og = pandas.concat(pandas.read_csv(stream, sep='\t', chunksize=ORTHOLOGS_CHUNK_ROWS), ignore_index=True)
 
         except:
             logging.warning("No orthologs found. Will return empty DataFrame.")
@@ -682,24 +692,24 @@ class PseudomonasDotComScraper():
         # XML
         ortholog_cluster_url = 'http://pseudoluge.pseudomonas.com/named/download/xml?gene_id={}'.format(pdc_id)
 
-        # GET html. Bail out if none.
+        # GET xml and parse it into species, genes, and groups tables while streaming. Bail out if none.
         try:
-            request = guarded_get(ortholog_cluster_url).decode('utf-8')
-            with StringIO(request) as stream:
-                xml_dict = xmltodict.parse(stream.read())
+            with open_stream(ortholog_cluster_url, max_bytes=ORTHOLOGS_MAX_BYTES, progress=log_progress) as stream:
+                orthoxml_tables = read_orthoxml(stream)
         except:
-            logging.warning("No ortholog species found. Will return empty DataFrame.")
-            xml_dict = OrderedDict()
+            logging.warning("No ortholog species found. Will return empty DataFrames.")
+            orthoxml_tables = {key: pandas.DataFrame() for key in ('Species', 'Genes', 'Groups')}
 
-        panel["Ortholog xml"] = xml_dict
+        panel["Ortholog xml"] = orthoxml_tables
 
         # CSV
         ortholog_cluster_csv = 'http://pseudoluge.pseudomonas.com/named/download/csv?gene_id={}'.format(pdc_id)
 
         try:
-            df = pandas.read_csv(ortholog_cluster_csv)
-            # Remove html links (redundant because GI is present).
-            df = df.drop(columns="NCBI GI link (Strain 1)").drop(columns="NCBI GI link (Strain 2)")
+            with open_stream(ortholog_cluster_csv, encoding='utf-8', max_bytes=ORTHOLOGS_MAX_BYTES, progress=log_progress) as stream:
+                # Remove html links (redundant because GI is present).
+                chunks = (chunk.drop(columns=["NCBI GI link (Strain 1)", "NCBI GI link (Strain 2)"]) for chunk in pandas.read_csv(stream, chunksize=ORTHOLOGS_CHUNK_ROWS))
+                df = pandas.concat(chunks, ignore_index=True)
             panel["Ortholog cluster"] = df
 
         except:
@@ -801,19 +811,17 @@ def _pandasDF_from_heading(soup, table_heading, index_column=0):
     """
 
     # Get table html string.
-    table_ht = str(soup.find('h3', string=re.compile(table_heading)).find_next())
-    pattern = re.compile('[\t]')
-    table_ht = pattern.sub("", table_ht)
+    table_ht = remove_tabs(str(soup.find('h3', string=pattern(table_heading)).find_next()))
 
     try:
-        df = pandas.read_html(table_ht, index_col=None)[0]
+        with instrumentation.dataframe():
+            df = pandas.read_html(table_ht, index_col=None)[0]
 
         if index_column is not None:
 
             index = df[index_column]
-            pattern = re.compile('[\t\s]')
 
-            df.index = [pattern.sub("_", idx) for idx in index]
+            df.index = [underscore_whitespace(idx) for idx in index]
             del df[index_column]
 
     except:
@@ -830,7 +838,7 @@ def _pandas_references(soup):
     raw = []
 
     # Get the References "table".
-    ref_soup = soup.find("h3", string=re.compile('^References'))
+    ref_soup = soup.find("h3", string=PATTERNS['references'])
 
     # Get all <a> tags.
     a_tags = ref_soup.find_next().find_all('a')
@@ -840,7 +848,7 @@ def _pandas_references(soup):
         # Get the link text.
         pubmed_link = a.get('href')
 
-        citation = Publication(PubMedLookup(pubmed_link, '')).cite()
+        citation = pubmed_lookup.Publication(pubmed_lookup.PubMedLookup(pubmed_link, '')).cite()
         raw.append(dict(pubmed_url=pubmed_link, citation=citation))
 
     # Return as pandas.DataFrame.
@@ -851,11 +859,11 @@ def _get_doi_from_ncbi(pubmed_link):
         """ Extract the DOI from a pubmed link. """
 
         if (pubmed_link != ''):
-            doi_soup = BeautifulSoup(guarded_get(pubmed_link), 'lxml')
-        line = doi_soup.find(string=re.compile("DOI")).find_parent().find_parent()
-        a = line.find('a', string=re.compile('10\.[0-9]*\/'))
+            doi_soup = bs4.BeautifulSoup(guarded_get(pubmed_link), 'lxml')
+        line = doi_soup.find(string=PATTERNS['doi_label']).find_parent().find_parent()
+        a = line.find('a', string=PATTERNS['doi'])
         doi_string = a.text
-        doi = re.sub("[\t,\n,\s]", "", doi_string)
+        doi = remove_whitespace(doi_string).replace(",", "")
 
         return doi
 
@@ -881,86 +889,367 @@ def _get_bib_from_doi(doi):
     return entry
 
 
-def _run_from_cli(args):
+def _run_from_cli(args, profile_dir=None):
     """ Called if run via command line interface.
 
     :param args: Command line arguments.
     :type  args: argparse.ArgumentsObject
 
+    :param profile_dir: Run each query under cProfile in its worker and dump the profiles into this directory (see profiling.ProfiledTask). Default: No profiling.
+    :type  profile_dir: str
+
+    :return: Exit code, EXIT_OK if all queries succeeded, EXIT_PARTIAL if some failed, EXIT_FAILED if all failed, EXIT_CONNECTION if pseudomonas.com is not reachable, EXIT_OUTPUT if results could not be written.
+    :rtype: int
+
     """
 
-    # Construct the query.
-    query = pdc_query(args.strain, args.feature, args.organism)
+    # Construct the queries.
+    try:
+        queries = _cli_queries(args)
+    except (IOError, ValueError) as e:
+        logging.error("Invalid features: %s", e)
+        return EXIT_FAILED
+
+    if args.outdir is not None:
+        os.makedirs(args.outdir, exist_ok=True)
+        if args.skip_existing:
+            queries = [q for q in queries if not os.path.isfile(_cli_outfile(args.outdir, q))]
 
-    # Construct the Scraper.
-    scraper = PseudomonasDotComScraper(query)
+    if not queries:
+        logging.info("Nothing to do.")
+        return EXIT_OK
 
+    # Check connection once before dispatching work.
     try:
-        scraper.connect()
-    except:
+        _cli_scraper()
+    except ConnectionError:
         logging.error("Could not connect to pseudomonas.com .")
-        return 0
+        return EXIT_CONNECTION
+
+    executor_class = ProcessPoolExecutor if args.executor == 'process' else ThreadPoolExecutor
+    task = _cli_run_one if profile_dir is None else profiling.ProfiledTask(_cli_run_one, profile_dir)
 
-    # Run the query and serialize.
+    # Sequences are appended to the FASTA file as queries complete.
     try:
-        results = scraper.run_query()
-    except:
-        logging.error("Query failed.")
-        return 0
+        fasta = open(args.fasta, 'w') if getattr(args, 'fasta', None) is not None else None
+    except IOError as e:
+        logging.error("Could not open %s: %s", args.fasta, e)
+        return EXIT_OUTPUT
 
+    # Transposon insertions are appended to the csv file as queries complete.
     try:
-        path = scraper.to_json(results, args.outfile)
-    except:
-        logging.error("Could not write results to disk.")
-        raise
-        return 0
+        insertions = InsertionTable(args.insertions) if getattr(args, 'insertions', None) is not None else None
+    except IOError as e:
+        logging.error("Could not open %s: %s", args.insertions, e)
+        if fasta is not None:
+            fasta.close()
+        return EXIT_OUTPUT
+
+    store = {}
+    failed = []
+    status = None
+    executor = executor_class(max_workers=args.jobs, initializer=_cli_init_worker)
+    try:
+        futures = {executor.submit(task, query): query for query in queries}
+        for future in as_completed(futures):
+            query = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                logging.error("Query %s failed: %s", _cli_key(query), e)
+                failed.append(query)
+                continue
+
+            try:
+                if fasta is not None:
+                    write_fasta(results, fasta, args.fasta_tag)
+                    fasta.flush()
+
+                if insertions is not None:
+                    insertions.add_results(results)
+
+                if args.outdir is not None:
+                    _serialize(_cli_outfile(args.outdir, query), results)
+            except IOError as e:
+                logging.error("Could not write results of %s to disk: %s", _cli_key(query), e)
+                status = EXIT_OUTPUT
+                break
+
+            if args.outdir is None:
+                store.update(results)
+    finally:
+        # Queued queries are not started once writing failed, running ones are waited for.
+        executor.shutdown(cancel_futures=True)
+
+        if fasta is not None:
+            fasta.close()
+
+        if insertions is not None:
+            try:
+                insertions.close()
+            except IOError as e:
+                logging.error("Could not write transposon insertions to disk: %s", e)
+                status = EXIT_OUTPUT
+
+    if status is not None:
+        return status
+
+    if args.outdir is None and store:
+        try:
+            path = PseudomonasDotComScraper().to_json(store, args.outfile)
+        except IOError as e:
+            logging.error("Could not write results to disk: %s", e)
+            return EXIT_OUTPUT
+        logging.info("Results stored in %s.", path)
 
     # Message.
-    logging.info("Query was successfull. Results stored in %s.", path)
+    logging.info("%d of %d queries were successfull.", len(queries) - len(failed), len(queries))
 
-    del scraper
+    if not failed:
+        return EXIT_OK
+    if len(failed) == len(queries):
+        return EXIT_FAILED
 
-    return 1
+    return EXIT_PARTIAL
+
+
+def _profile_cli(args):
+    """ Run the command line interface with every query profiled in its worker, merge the profiles of this run and write the report to args.profile.
+
+    cProfile only sees the thread it runs in, and profilers of concurrent threads in one process interfere (python >= 3.12 allows only one), so thread pools run with one worker. Process pools keep their size.
+
+    :return: The exit code of _run_from_cli().
+    :rtype: int
+
+    """
+
+    if args.executor == 'thread' and args.jobs > 1:
+        logging.warning("Profiling with one worker thread instead of %d, use '--executor process' to profile in parallel.", args.jobs)
+        args.jobs = 1
+
+    with profiling.dump_directory(args.profile) as dumps:
+        status = _run_from_cli(args, profile_dir=dumps)
+
+        try:
+            stats = profiling.merge_profiles(dumps)
+        except ValueError:
+            logging.warning("No queries were run, no profile written.")
+            return status
+
+        profiling.write_report(stats, args.profile, args.profile_top)
+
+    return status
+
+
+def _cli_features(specs, files=()):
+    """ Expand feature arguments: single features, ranges (PFLU0001-PFLU0100) and files with one feature per line ('#' starts a comment).
+
+    :raises ValueError: Malformed range.
+
+    """
+
+    features = []
+    for path in files:
+        with open(path) as fp:
+            specs = list(specs) + [line.split('#')[0].strip() for line in fp]
+
+    for spec in specs:
+        if not spec:
+            continue
+
+        if '-' not in spec:
+            features.append(spec)
+            continue
+
+        first, last = spec.split('-', 1)
+        first_match = PATTERNS['numbered'].match(first)
+        last_match = PATTERNS['numbered'].match(last)
+        if first_match is None or last_match is None or first_match.group(1).lower() != last_match.group(1).lower():
+            raise ValueError("Expected a range like PFLU0001-PFLU0100, got {0:s}.".format(spec))
+
+        prefix, start = first_match.groups()
+        width = len(start)
+        features.extend("{0:s}{1:0{2:d}d}".format(prefix, i, width) for i in range(int(start), int(last_match.group(2)) + 1))
+
+    # Drop duplicates, keep order.
+    return list(OrderedDict.fromkeys(features))
+
+
+def _cli_queries(args):
+    """ Construct one query per strain (or organism) and feature. """
+
+    features = _cli_features(args.feature or [], args.feature_file or [])
+    if not features:
+        raise ValueError("No features given.")
+
+    if args.organism:
+        return [pdc_query(organism=organism, feature=feature) for organism in args.organism for feature in features]
+
+    return [pdc_query(strain=strain, feature=feature) for strain in args.strain for feature in features]
+
+
+# Scrapers are reused across the queries run by a worker thread (or process).
+_cli_local = threading.local()
+
+def _cli_scraper():
+    """ Return the connected scraper of the calling worker, connect on first use. """
+
+    scraper = getattr(_cli_local, 'scraper', None)
+    if scraper is None:
+        scraper = PseudomonasDotComScraper()
+        scraper.connect()
+        _cli_local.scraper = scraper
+
+    return scraper
+
+
+def _cli_init_worker():
+    """ Start each pool worker without a scraper. Forked processes would otherwise reuse the one connected in the parent (web_utilities drops the inherited session). """
+
+    _cli_local.scraper = None
+
+
+def _cli_run_one(query):
+    """ Run one query on the worker's scraper and return the results. """
+
+    scraper = _cli_scraper()
+    scraper.run_query(query)
+
+    return scraper.results
+
+
+def _cli_key(query):
+    """ The strain (or organism) and feature of a query as 'strain__feature'. """
+
+    return "{0:s}__{1:s}".format(query.strain or query.organism, query.feature)
+
+
+def _cli_outfile(outdir, query):
+    """ Path of the result file of a query in outdir. """
+
+    return os.path.join(outdir, _cli_key(query) + ".json")
 
 
 if __name__ == "__main__":
 
     from argparse import ArgumentParser
+    import sys
 
     # Setup argument parser.
-    parser = ArgumentParser()
-
-    parser.add_argument("-o",
-                        "--outfile",
-                        dest="outfile",
-                        default=None,
-                        required=False,
-                        help="Where to write the query results.",
+    parser = ArgumentParser(epilog="Exit codes: 0 success, 1 all queries failed, 2 usage error, 3 some queries failed, 4 pseudomonas.com not reachable, 5 results not writable.")
+
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument("-o",
+                              "--outfile",
+                              dest="outfile",
+                              default=None,
+                              required=False,
+                              help="Where to write the query results (one json file for all queries). Default: A temporary file.",
+                              )
+
+    output_group.add_argument("-d",
+                              "--outdir",
+                              dest="outdir",
+                              default=None,
+                              required=False,
+                              help="Write one json file per query (<strain>__<feature>.json) to this directory.",
+                              )
+
+    parser.add_argument("--skip-existing",
+                        dest="skip_existing",
+                        action="store_true",
+                        help="With -d/--outdir: Skip queries whose result file exists (resume an interrupted run).",
                         )
 
     parser.add_argument("-f",
                         "--feature",
                         dest="feature",
+                        nargs="+",
+                        default=None,
+                        help="The genes/features to query from pseudomonas.com. Ranges like PFLU0001-PFLU0100 are expanded.")
+
+    parser.add_argument("-F",
+                        "--feature-file",
+                        dest="feature_file",
+                        action="append",
                         default=None,
-                        required=True,
-                        help="The gene/feature to query from pseudomonas.com.")
+                        help="File with one feature (or range) per line. Can be given multiple times.")
 
     org_group = parser.add_mutually_exclusive_group(required=True)
     org_group.add_argument("-s",
                            "--strain",
                            dest="strain",
+                           nargs="+",
                            default=None,
-                           help="The strain to query from pseudomonas.com. Mutually exclusive with parameter -o/--organism option.",
+                           help="The strains to query from pseudomonas.com. Mutually exclusive with parameter -O/--organism option.",
                            )
 
     org_group.add_argument("-O",
                            "--organism",
                            dest="organism",
+                           nargs="+",
                            default=None,
-                           help="The organism to query from pseudomonas.com. Mutually exclusive with parameter 'strain'.",
+                           help="The organisms to query from pseudomonas.com. Mutually exclusive with parameter 'strain'.",
                            )
 
+    parser.add_argument("--fasta",
+                        dest="fasta",
+                        default=None,
+                        help="Also write the sequences of all queries to this FASTA file.",
+                        )
+
+    parser.add_argument("--fasta-tag",
+                        dest="fasta_tag",
+                        default=PROTEIN_TAG,
+                        choices=SEQUENCE_TAGS,
+                        help="Which sequence to write to the FASTA file.",
+                        )
+
+    parser.add_argument("--insertions",
+                        dest="insertions",
+                        default=None,
+                        help="Also write the transposon insertions of all queries to this csv file, one row per insertion.",
+                        )
+
+    parser.add_argument("-j",
+                        "--jobs",
+                        dest="jobs",
+                        type=int,
+                        default=4,
+                        help="Number of queries to run concurrently.",
+                        )
+
+    parser.add_argument("-e",
+                        "--executor",
+                        dest="executor",
+                        default="thread",
+                        choices=["thread", "process"],
+                        help="Run queries in worker threads (default, the work is mostly network bound) or worker processes.",
+                        )
+
+    parser.add_argument("--profile",
+                        dest="profile",
+                        default=None,
+                        required=False,
+                        help="Profile each query in its worker (thread pools run one worker), merge the profiles and write the profile, flamegraph input (folded stacks) and a hot function summary to this directory.",
+                        )
+
+    parser.add_argument("--profile-top",
+                        dest="profile_top",
+                        type=int,
+                        default=profiling.DEFAULT_TOP,
+                        help="Number of functions in the profile summary.",
+                        )
+
     # Parse arguments.
     args = parser.parse_args()
 
-    _run_from_cli(args)
+    if args.feature is None and args.feature_file is None:
+        parser.error("At least one of -f/--feature or -F/--feature-file is required.")
+
+    if args.profile is not None:
+        status = _profile_cli(args)
+    else:
+        status = _run_from_cli(args)
+
+    sys.exit(status)
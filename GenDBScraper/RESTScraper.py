@@ -1,6 +1,6 @@
 """ :module RESTScraper: Hosting the the abstract base class (abc) for all database "scrapers" using REST-ful APIs."""
 
-from GenDBScraper.Utilities.web_utilities import guarded_get
+from GenDBScraper.Utilities.web_utilities import probe
 
 from abc import ABC, abstractmethod
 import logging
@@ -55,7 +55,11 @@ class RESTScraper(ABC):
         self.__query = value
 
     def connect(self):
-        """ Connect to the database. """
+        """ Connect to the database. The reachability check is shared by all scrapers in the process (see web_utilities.probe()).
 
-        response = guarded_get(self.base_url)
+        :raises ConnectionError: The database is not reachable.
+
+        """
+
+        probe(self.base_url)
         self.__connected = True
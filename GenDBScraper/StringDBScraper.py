@@ -1,19 +1,18 @@
 """ :module StringDBScraper: Hosting the StringDBScraper, an API for the https://string-db.org database web interface. """
 
 from GenDBScraper.RESTScraper import RESTScraper
-from GenDBScraper.Utilities import web_utilities
+from GenDBScraper.Utilities import network_renderer, web_utilities
+from GenDBScraper.Utilities.lazy_import import lazy_import
+from GenDBScraper.Utilities.schema_utilities import normalize_panel
 
 # 3rd party imports
 from collections import namedtuple
-from doi2bib import crossref
 from io import StringIO
-from pubmed_lookup import Publication, PubMedLookup
 import json
 import logging
-import os
-import pandas
 import re
-import tempfile
+
+pandas = lazy_import('pandas')
 
 # Configure logging.
 logging.basicConfig(format='%(asctime)s %(levelname)s: %(message)s', level=logging.DEBUG)
@@ -135,7 +134,7 @@ class StringDBScraper(RESTScraper):
         # Re-index.
         return ret.reindex(columns=['queryIndex', 'preferredName', 'stringId', 'ncbiTaxonId', 'taxonName', 'annotation'])
 
-    def network_image(self, query=None, image_format='png', flavor=None, white_nodes=None, color_nodes=None, show_image=False):
+    def network_image(self, query=None, image_format='png', flavor=None, white_nodes=None, color_nodes=None, show_image=False, renderer='remote', cache_dir=None):
         """ Grab the protein network image for given proteins (genes).
 
         :param query:  The (updated) query to submit.
@@ -156,6 +155,12 @@ class StringDBScraper(RESTScraper):
         :param show_image: Whether to render the image (default False). WARNING: untested feature.
         :type  show_image: bool
 
+        :param renderer: 'remote' (default) downloads the image from string-db.org, 'local' draws it as SVG from the network interactions (image_format and flavor are ignored).
+        :type  renderer: str
+
+        :param cache_dir: Directory to store images in, named by content hash so that identical networks share one file. Default: network_renderer.DEFAULT_CACHE_DIR.
+        :type  cache_dir: str
+
         """
         """ Inspired by  http://string-db.org/cgi/help.pl#Getting-STRING-network-image """
 
@@ -165,6 +170,12 @@ class StringDBScraper(RESTScraper):
         if not self.connected:
             raise IOError("Not connected to string-db.org.")
 
+        if renderer not in ('remote', 'local'):
+            raise ValueError("renderer must be 'remote' or 'local', {} was supplied.".format(renderer))
+
+        if renderer == 'local':
+            return network_renderer.cached_network_image(self.network_interactions(nodes=white_nodes), cache_dir=cache_dir)
+
 
         format_map = {
                 'png' : 'image',
@@ -192,13 +203,10 @@ class StringDBScraper(RESTScraper):
 
 
         # Determine file extension.
-        suffix = ".png" if image_format.find("png") else ".svg"
-
-        # Setup image file.
-        _, image_file = tempfile.mkstemp(prefix='string-db_network_', suffix=suffix)
+        suffix = ".svg" if image_format == 'svg' else ".png"
 
-        with open(image_file, 'wb') as image_fp:
-            image_fp.write(response.content)
+        # Store the image by content hash, repeated downloads of the same network share one file.
+        image_file = network_renderer.store_image(response.content, suffix, cache_dir=cache_dir)
 
         if show_image:
             from PIL import Image
@@ -230,7 +238,7 @@ class StringDBScraper(RESTScraper):
 
         ret = pandas.DataFrame(response.json())
 
-        return ret.reindex(columns = [
+        return normalize_panel('Network Interactions', ret.reindex(columns = [
                 'stringId_A',
                 'stringId_B',
                 'ncbiTaxonId',
@@ -243,7 +251,7 @@ class StringDBScraper(RESTScraper):
                 'dscore',
                 'tscore',
                 ]
-                )
+                ))
 
     def interaction_partners(self, required_score=None, limit=None):
         """ Get the interaction partners.
@@ -277,7 +285,7 @@ class StringDBScraper(RESTScraper):
 
         ret = pandas.DataFrame(response.json())
 
-        return ret.reindex(
+        return normalize_panel('Interaction Partners', ret.reindex(
                 columns = [
                     'stringId_A',
                     'stringId_B',
@@ -291,7 +299,7 @@ class StringDBScraper(RESTScraper):
                     'dscore',
                     'tscore',
                     ]
-                )
+                ))
 
     def similarity_scores(self):
         """ Get the interaction partners.
@@ -352,7 +360,7 @@ class StringDBScraper(RESTScraper):
         # Setup and return dataframe.
         ret = pandas.DataFrame(response.json())
 
-        return ret.reindex(
+        return normalize_panel('Functional Enrichments', ret.reindex(
                 columns = [
                 'category',
                 'term',
@@ -364,7 +372,7 @@ class StringDBScraper(RESTScraper):
                 'fdr',
                 'description',
                 ]
-                )
+                ))
 
     def interaction_enrichments(self, required_score=None):
         """ Get the interaction enrichments.
@@ -393,7 +401,7 @@ class StringDBScraper(RESTScraper):
         # Setup and return dataframe.
         ret = pandas.DataFrame(response.json())
 
-        return ret.reindex(
+        return normalize_panel('Interaction Enrichments', ret.reindex(
                 columns = [
                     'number_of_nodes',
                     'number_of_edges',
@@ -402,7 +410,7 @@ class StringDBScraper(RESTScraper):
                     'expected_number_of_edges',
                     'p_value',
                     ]
-                )
+                ))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,260 @@
+""" :module annotation_index: Genome wide reverse index from GO terms, Interpro entries and cross-reference ids to the features annotated with them, stored in sqlite.
+
+:example: with AnnotationIndex('sbw25.sqlite') as index: index.add_results(scraper.results); index.loci('GO:0006810')
+
+"""
+
+from GenDBScraper.Utilities.lazy_import import lazy_import
+from GenDBScraper.Utilities.regex_utilities import underscore_whitespace
+from GenDBScraper.Utilities.search_index import cross_references, load_results, panel_table
+
+import logging
+import sqlite3
+
+pandas = lazy_import('pandas')
+
+# Annotation kinds from the function tab, cross-references are indexed by their lower cased type (e.g. 'refseq', 'uniprotkb_accession').
+GO = 'go'
+INTERPRO = 'interpro'
+
+# Exported columns.
+COLUMNS = ('accession', 'kind', 'strain', 'locus_tag', 'label')
+
+# The primary key leads with the accession, lookups by accession (and kind) are index seeks.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS annotations (
+    accession TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    strain TEXT NOT NULL,
+    locus_tag TEXT NOT NULL,
+    label TEXT,
+    PRIMARY KEY (accession, kind, strain, locus_tag)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS annotations_feature ON annotations (strain, locus_tag);
+"""
+
+
+def xref_kind(ref_type):
+    """ Return the annotation kind of a cross-reference type, e.g. 'UniProtKB Accession' -> 'uniprotkb_accession'. """
+
+    return underscore_whitespace(ref_type.strip().lower())
+
+
+def feature_annotations(panels):
+    """ Return the (kind, accession, label) triples of one feature.
+
+    :param panels: The pseudomonas.com results of the feature. Tables may be json strings as in result files.
+    :type  panels: dict
+
+    """
+
+    annotations = []
+
+    go = panel_table(panels, "Function/Pathways/GO", "Gene Ontology")
+    if go is not None and 'Accession' in go.columns:
+        labels = _labels(go, ('GO Term', 'Term'))
+        annotations += [(GO, str(accession).strip().upper(), label) for accession, label in zip(go['Accession'], labels)]
+
+    interpro = panel_table(panels, "Function/Pathways/GO", "Functional Predictions from Interpro")
+    if interpro is not None and 'Interpro Accession' in interpro.columns:
+        labels = _labels(interpro, ('Interpro Short Name', 'Interpro Description'))
+        annotations += [(INTERPRO, str(accession).strip().upper(), label) for accession, label in zip(interpro['Interpro Accession'], labels)]
+
+    xrefs = panel_table(panels, "Overview", "Cross-References")
+    if xrefs is not None:
+        annotations += [(xref_kind(str(ref_type)), str(ref_id).strip(), None) for ref_type, ref_id in cross_references(xrefs)]
+
+    # Drop missing accessions ('nan', 'None', '') and duplicates, keep the first label.
+    unique = {}
+    for kind, accession, label in annotations:
+        if accession.lower() in ('', 'nan', 'none'):
+            continue
+        unique.setdefault((kind, accession), None if label is None or label != label else str(label))
+
+    return [(kind, accession, label) for (kind, accession), label in unique.items()]
+
+
+class AnnotationIndex():
+    """ Reverse annotation index in a sqlite database. Adding a feature replaces its previous annotations, the index is built incrementally. """
+
+    def __init__(self, path=':memory:'):
+        """
+        AnnotationIndex constructor.
+
+        :param path: The database file, created if missing. Default: In memory.
+        :type  path: str
+
+        """
+
+        self.__path = path
+        self.__connection = sqlite3.connect(path)
+        self.__connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        """ Number of indexed features. """
+
+        return self.__connection.execute("SELECT COUNT(*) FROM (SELECT DISTINCT strain, locus_tag FROM annotations)").fetchone()[0]
+
+    @property
+    def path(self):
+        """ The database file. """
+        return self.__path
+
+    def add(self, strain, locus_tag, annotations):
+        """ Index the annotations of a feature, replacing its previous ones.
+
+        :param annotations: (kind, accession, label) triples as returned by feature_annotations().
+        :type  annotations: list
+
+        """
+
+        with self.__connection:
+            self.__replace(strain, locus_tag, annotations)
+
+    def add_results(self, results):
+        """ Index all features of pseudomonas.com results ({'strain__feature': panels}, or (key, panels) pairs as yielded by search_index.load_results()) in one transaction.
+
+        :return: The number of indexed features.
+        :rtype: int
+
+        """
+
+        if isinstance(results, dict):
+            results = results.items()
+
+        count = 0
+        with self.__connection:
+            for key, panels in results:
+                strain, _, locus_tag = key.partition("__")
+                self.__replace(strain, locus_tag, feature_annotations(panels))
+                count += 1
+
+        logging.info("Indexed annotations of %d features.", count)
+
+        return count
+
+    def loci(self, accession, kind=None, strain=None):
+        """ Return the features annotated with accession.
+
+        :param kind: Only match annotations of this kind (e.g. 'go', 'interpro', 'refseq').
+        :type  kind: str
+
+        :param strain: Only return features of this strain.
+        :type  strain: str
+
+        :return: (strain, locus_tag) pairs, sorted.
+        :rtype: list
+
+        """
+
+        query = "SELECT DISTINCT strain, locus_tag FROM annotations WHERE accession = ?"
+        parameters = [_normalize(accession, kind)]
+        if kind is not None:
+            query += " AND kind = ?"
+            parameters.append(kind)
+        if strain is not None:
+            query += " AND strain = ?"
+            parameters.append(strain)
+
+        return self.__connection.execute(query + " ORDER BY strain, locus_tag", parameters).fetchall()
+
+    def annotations(self, strain, locus_tag):
+        """ Return the indexed annotations of a feature as (kind, accession, label) triples. """
+
+        return self.__connection.execute("SELECT kind, accession, label FROM annotations WHERE strain = ? AND locus_tag = ? ORDER BY kind, accession",
+                                         (strain, locus_tag)).fetchall()
+
+    def counts(self, kind):
+        """ Return the number of features per accession of kind, most frequent first.
+
+        :rtype: pandas.DataFrame
+
+        """
+
+        rows = self.__connection.execute("SELECT accession, COUNT(*) AS loci FROM annotations WHERE kind = ? GROUP BY accession ORDER BY loci DESC, accession",
+                                         (kind,)).fetchall()
+
+        return pandas.DataFrame(rows, columns=['accession', 'loci'])
+
+    def export(self, kind=None, path=None):
+        """ Export the index (or the annotations of one kind) as table with COLUMNS.
+
+        :param path: Also write the table as csv to this file.
+        :type  path: str
+
+        :rtype: pandas.DataFrame
+
+        """
+
+        query = "SELECT {0:s} FROM annotations".format(", ".join(COLUMNS))
+        parameters = []
+        if kind is not None:
+            query += " WHERE kind = ?"
+            parameters.append(kind)
+
+        table = pandas.read_sql_query(query + " ORDER BY kind, accession, strain, locus_tag", self.__connection, params=parameters)
+
+        if path is not None:
+            table.to_csv(path, index=False)
+
+        return table
+
+    def close(self):
+        """ Close the database. """
+
+        self.__connection.close()
+
+    def __replace(self, strain, locus_tag, annotations):
+        self.__connection.execute("DELETE FROM annotations WHERE strain = ? AND locus_tag = ?", (strain, locus_tag))
+        self.__connection.executemany("INSERT OR REPLACE INTO annotations VALUES (?, ?, ?, ?, ?)",
+                                      [(accession, kind, strain, locus_tag, label) for kind, accession, label in annotations])
+
+
+def _labels(table, columns):
+    """ Return the first present label column (names differ in older result files), Nones if none is. """
+
+    for column in columns:
+        if column in table.columns:
+            return table[column]
+
+    return [None] * len(table)
+
+
+def _normalize(accession, kind):
+    """ GO and Interpro accessions are stored upper case. """
+
+    accession = accession.strip()
+
+    return accession.upper() if kind in (None, GO, INTERPRO) and accession.upper().startswith(('GO:', 'IPR')) else accession
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Build or query the reverse annotation index.")
+
+    parser.add_argument("database", help="The sqlite database.")
+    parser.add_argument("results", nargs="*", help="Result json files to add to the index.")
+    parser.add_argument("-l", "--lookup", dest="lookup", default=None, help="Print the features annotated with this accession.")
+    parser.add_argument("-k", "--kind", dest="kind", default=None, help="Restrict lookup and export to annotations of this kind (go, interpro, refseq, ...).")
+    parser.add_argument("-e", "--export", dest="export", default=None, help="Export the index to this csv file.")
+
+    args = parser.parse_args()
+
+    with AnnotationIndex(args.database) as index:
+        if args.results:
+            index.add_results(load_results(args.results))
+
+        if args.lookup is not None:
+            for strain, locus_tag in index.loci(args.lookup, kind=args.kind):
+                print("{0:s}\t{1:s}".format(strain, locus_tag))
+
+        if args.export is not None:
+            index.export(kind=args.kind, path=args.export)
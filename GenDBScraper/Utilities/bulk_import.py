@@ -0,0 +1,502 @@
+""" :module bulk_import: Import whole strains from the pseudomonas.com download files (GFF or feature tables, GO annotations, FASTA sequences or the genome) into the panel layout of PseudomonasDotComScraper.run_query(), and scrape only the panels the files do not provide.
+
+:example: importer = BulkImporter('sbw25', organism='Pseudomonas fluorescens SBW25')
+:example: importer.read_features('Pseudomonas_fluorescens_SBW25_110.gff'); importer.read_go('Pseudomonas_fluorescens_SBW25_110_GO.tsv')
+:example: results = importer.results(); fill_gaps(results, scraper, ['Operons'], features=['pflu0916'])
+
+"""
+
+from GenDBScraper.Utilities.genome_fasta import DEFAULT_FLANK, GenomeFasta, SequenceService
+from GenDBScraper.Utilities.lazy_import import lazy_import
+from GenDBScraper.Utilities.schema_utilities import normalize_panels
+from GenDBScraper.Utilities.sequence_utilities import GENE_TAG, PROTEIN_TAG
+
+from urllib.parse import unquote
+import gzip
+import logging
+import os
+import re
+
+pandas = lazy_import('pandas')
+
+# Columns of the imported feature table.
+FEATURE_COLUMNS = ('locus_tag', 'type', 'replicon', 'start', 'end', 'strand', 'name', 'product', 'xrefs')
+
+# Header aliases in pseudomonas.com feature tables (compared lower case).
+FEATURE_TABLE_ALIASES = {'locus_tag': ('locus tag', 'locus_tag', 'locus'),
+                         'type': ('feature type', 'type'),
+                         'replicon': ('sequence', 'replicon', 'contig', 'seqid'),
+                         'start': ('start',),
+                         'end': ('end', 'stop'),
+                         'strand': ('strand',),
+                         'name': ('gene name', 'name'),
+                         'product': ('product name', 'product', 'product description'),
+                         }
+
+# GO annotation columns in the order of the scraped 'Gene Ontology' panel, with header aliases (compared lower case).
+GO_ALIASES = {'Ontology': ('ontology', 'namespace', 'go namespace'),
+              'Accession': ('accession', 'go accession', 'go id', 'go term id'),
+              'Term': ('term', 'go term', 'go name'),
+              'GO Evidence': ('go evidence', 'go evidence code', 'evidence code'),
+              'Evidence Ontology (ECO) Code': ('evidence ontology (eco) code', 'eco code'),
+              'Reference': ('reference', 'pmid', 'pubmed'),
+              }
+
+# ECO term columns of GO files, appended to the ECO code as in the scraped panel (compared lower case).
+ECO_TERM_ALIASES = ('evidence ontology (eco) term', 'eco term')
+
+# GFF attributes, the first present key wins (compared lower case).
+GFF_ATTRIBUTES = {'locus_tag': ('locus_tag', 'locus'),
+                  'name': ('gene', 'name'),
+                  'product': ('product',),
+                  'xrefs': ('dbxref',),
+                  'protein_id': ('protein_id',),
+                  }
+
+# Cross-reference types of GFF Dbxref databases (as in the scraped 'Cross-References' table), others keep the database name.
+XREF_TYPES = {'GeneID': 'Entrez',
+              'GI': 'GI',
+              'UniProtKB/Swiss-Prot': 'UniProtKB Acc',
+              'UniProtKB/TrEMBL': 'UniProtKB Acc',
+              'RefSeq': 'RefSeq',
+              }
+
+# Sequence tags of FASTA files by suffix.
+SEQUENCE_SUFFIXES = {'.faa': PROTEIN_TAG, '.ffn': GENE_TAG}
+
+_GFF_COLUMNS = ('replicon', 'source', 'type', 'start', 'end', 'score', 'strand', 'phase', 'attributes')
+_HEADER_SPLIT = re.compile(r'[|\s]+')
+
+
+def read_gff(path):
+    """ Read the features of a GFF3 file (optionally gzip compressed), one row per locus tag. Gene and CDS (tRNA, rRNA) rows of a locus are merged.
+
+    :return: Table with FEATURE_COLUMNS, xrefs as [(type, id), ...].
+    :rtype: pandas.DataFrame
+
+    """
+
+    table = pandas.read_csv(path, sep='\t', comment='#', header=None, names=_GFF_COLUMNS, dtype=str, quoting=3)
+
+    # Sequences after a ##FASTA directive have no columns.
+    table = table[table['attributes'].notna()]
+
+    for column, keys in GFF_ATTRIBUTES.items():
+        values = None
+        for key in keys:
+            found = table['attributes'].str.extract(r'(?i)(?:^|;)\s*{0:s}=([^;]*)'.format(re.escape(key)), expand=False)
+            values = found if values is None else values.fillna(found)
+        table[column] = values.map(unquote, na_action='ignore')
+
+    table = table[table['locus_tag'].notna()].copy()
+
+    # Gene rows last, so 'first' takes the type and product from the CDS but fills in the gene name.
+    table['is_gene'] = table['type'] == 'gene'
+    table['order'] = pandas.factorize(table['locus_tag'])[0]
+    table = table.sort_values(['order', 'is_gene'], kind='stable')
+
+    groups = table.groupby('order', sort=True)
+    features = groups[['locus_tag', 'type', 'replicon', 'start', 'end', 'strand', 'name', 'product']].first()
+    features['xrefs'] = [_gff_xrefs(rows['xrefs'], rows['protein_id']) for order, rows in groups]
+
+    return _clean_features(features.reset_index(drop=True))
+
+
+def read_feature_table(path):
+    """ Read a pseudomonas.com feature table (tab separated, comma separated if path ends with .csv), one row per locus tag.
+
+    :return: Table with FEATURE_COLUMNS, xrefs empty.
+    :rtype: pandas.DataFrame
+
+    """
+
+    separator = ',' if path.endswith(('.csv', '.csv.gz')) else '\t'
+    table = pandas.read_csv(path, sep=separator, dtype=str, comment=None)
+    table = _rename(table, FEATURE_TABLE_ALIASES)
+
+    if 'locus_tag' not in table.columns:
+        raise ValueError("No locus tag column in {0:s}.".format(path))
+
+    table = table.drop_duplicates('locus_tag')
+    table['xrefs'] = [[] for i in range(len(table))]
+
+    return _clean_features(table)
+
+
+def read_go(path):
+    """ Read a GO annotation file (tab separated with header, comma separated if path ends with .csv).
+
+    :return: 'Gene Ontology' tables by upper case locus tag.
+    :rtype: dict
+
+    """
+
+    separator = ',' if path.endswith(('.csv', '.csv.gz')) else '\t'
+    table = pandas.read_csv(path, sep=separator, dtype=str)
+    table = _rename(table, dict(GO_ALIASES, locus_tag=FEATURE_TABLE_ALIASES['locus_tag'], eco_term=ECO_TERM_ALIASES))
+
+    if 'locus_tag' not in table.columns or 'Accession' not in table.columns:
+        raise ValueError("No locus tag or GO accession column in {0:s}.".format(path))
+
+    # Scraped panels name the ontology 'Biological Process', download files 'biological_process'.
+    if 'Ontology' in table.columns:
+        table['Ontology'] = table['Ontology'].str.replace('_', ' ').str.title()
+
+    if 'eco_term' in table.columns and 'Evidence Ontology (ECO) Code' in table.columns:
+        table['Evidence Ontology (ECO) Code'] = table['Evidence Ontology (ECO) Code'].str.cat(table['eco_term'], sep=' ', na_rep='').str.strip()
+
+    columns = [column for column in GO_ALIASES if column in table.columns]
+    table['locus_tag'] = table['locus_tag'].str.strip().str.upper()
+
+    return {locus_tag: rows[columns].drop_duplicates().reset_index(drop=True) for locus_tag, rows in table.groupby('locus_tag', sort=False)}
+
+
+def read_fasta(path):
+    """ Yield (header, sequence) pairs of a (optionally gzip compressed) FASTA file. """
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as fp:
+        header, chunks = None, []
+        for line in fp:
+            line = line.strip()
+            if line.startswith('>'):
+                if header is not None:
+                    yield header, ''.join(chunks)
+                header, chunks = line[1:], []
+            elif line:
+                chunks.append(line)
+
+        if header is not None:
+            yield header, ''.join(chunks)
+
+
+class BulkImporter():
+    """ Collects the download files of one strain and builds query results for all its features. Panels without a source file are left out, see fill_gaps(). """
+
+    def __init__(self, strain, organism=None, normalize=False):
+        """
+        BulkImporter constructor.
+
+        :param strain: The strain as queried from pseudomonas.com (e.g. 'sbw25'), results are keyed '<strain>__<locus tag, lower case>'.
+        :type  strain: str
+
+        :param organism: The strain row of the 'Gene Feature Overview'. Default: strain.
+        :type  organism: str
+
+        :param normalize: Convert the panels to compact dtypes like scraped results (see schema_utilities.normalize_panels()). Off by default, it takes most of the import time and saves little on tables of a few rows.
+        :type  normalize: bool
+
+        """
+
+        self.__strain = strain
+        self.__organism = organism or strain
+        self.__normalize = normalize
+        self.__features = None
+        self.__go = None
+        self.__sequences = None
+        self.__genome = None
+
+    @property
+    def features(self):
+        """ The imported features (FEATURE_COLUMNS), None if none were read. """
+        return self.__features
+
+    @property
+    def panels(self):
+        """ The titles of the panels provided by the read files. """
+
+        titles = []
+        if self.__features is not None:
+            titles.append("Overview")
+        if self.__sequences is not None or self.__genome is not None:
+            titles.append("Sequences")
+        if self.__go is not None:
+            titles.append("Function/Pathways/GO")
+
+        return titles
+
+    def read_features(self, path):
+        """ Read the features from a GFF3 file (.gff, .gff3) or a feature table (others). Features read before are replaced.
+
+        :return: The number of features.
+        :rtype: int
+
+        """
+
+        stem = path[:-3] if path.endswith('.gz') else path
+        if stem.endswith(('.gff', '.gff3')):
+            features = read_gff(path)
+        else:
+            features = read_feature_table(path)
+
+        self.__features = features.set_index(features['locus_tag'].str.upper(), drop=False)
+        logging.info("Read %d features from %s .", len(features), path)
+
+        return len(features)
+
+    def read_go(self, path):
+        """ Read GO annotations, see read_go().
+
+        :return: The number of annotated features.
+        :rtype: int
+
+        """
+
+        go = read_go(path)
+        if self.__go is None:
+            self.__go = {}
+        self.__go.update(go)
+        logging.info("Read GO annotations of %d features from %s .", len(go), path)
+
+        return len(go)
+
+    def read_sequences(self, path, tag=None):
+        """ Read sequences from a FASTA file. Features must be read first, records are matched by any header word equal to a locus tag.
+
+        :param tag: The sequence tag (see sequence_utilities.SEQUENCE_TAGS). Default: By suffix, see SEQUENCE_SUFFIXES.
+        :type  tag: str
+
+        :return: The number of matched records.
+        :rtype: int
+
+        """
+
+        if self.__features is None:
+            raise RuntimeError("Read the features before the sequences.")
+
+        if tag is None:
+            stem = path[:-3] if path.endswith('.gz') else path
+            tag = SEQUENCE_SUFFIXES.get(os.path.splitext(stem)[1])
+            if tag is None:
+                raise ValueError("Cannot tell the sequence type of {0:s}, pass the tag.".format(path))
+
+        if self.__sequences is None:
+            self.__sequences = {}
+
+        locus_tags = set(self.__features.index)
+        matched = unmatched = 0
+        for header, sequence in read_fasta(path):
+            locus_tag = next((word.upper() for word in _HEADER_SPLIT.split(header) if word.upper() in locus_tags), None)
+            if locus_tag is None:
+                unmatched += 1
+                continue
+            self.__sequences.setdefault(locus_tag, {})[tag] = ">{0:s}\n{1:s}".format(header, sequence)
+            matched += 1
+
+        if unmatched:
+            logging.warning("%d records in %s match no locus tag.", unmatched, path)
+
+        return matched
+
+    def read_genome(self, path, flank=DEFAULT_FLANK, replicons=None):
+        """ Cut the sequences of all features from the genome FASTA file (see genome_fasta.SequenceService). Features must be read first, sequences read with read_sequences() take precedence.
+
+        :return: The number of genome records.
+        :rtype: int
+
+        """
+
+        if self.__features is None:
+            raise RuntimeError("Read the features before the genome.")
+
+        genome = GenomeFasta(path)
+        self.__genome = SequenceService(genome, self.__features, flank=flank, replicons=replicons)
+        logging.info("Mapped %d genome records from %s .", len(genome.names), path)
+
+        return len(genome.names)
+
+    def feature_panels(self, locus_tag):
+        """ Return the panels of one feature. Raises KeyError for unknown locus tags. """
+
+        feature = self.__features.loc[locus_tag.upper()]
+
+        panels = {}
+        panels["Overview"] = {"Gene Feature Overview": pandas.DataFrame([["Strain", self.__organism],
+                                                                         ["Locus Tag", feature['locus_tag']],
+                                                                         ["Name", feature['name']],
+                                                                         ["Replicon", feature['replicon']],
+                                                                         ["Genomic location", _location(feature)],
+                                                                         ]),
+                              "Product": pandas.DataFrame([["Feature Type", feature['type']],
+                                                           ["Product Name", feature['product']],
+                                                           ]),
+                              "Cross-References": pandas.DataFrame({'type': [t for t, i in feature['xrefs']],
+                                                                    'id': [i for t, i in feature['xrefs']],
+                                                                    'url': [None] * len(feature['xrefs']),
+                                                                    }),
+                              }
+
+        if self.__sequences is not None or self.__genome is not None:
+            sequences = {}
+            if self.__genome is not None:
+                genome_panel = self.__genome.panel(locus_tag)
+                sequences.update(zip(genome_panel[0], genome_panel[1]))
+            if self.__sequences is not None:
+                sequences.update(self.__sequences.get(locus_tag.upper(), {}))
+            panels["Sequences"] = pandas.DataFrame([[tag, sequence] for tag, sequence in sequences.items()], columns=[0, 1])
+
+        if self.__go is not None:
+            go = self.__go.get(locus_tag.upper())
+            panels["Function/Pathways/GO"] = {"Gene Ontology": pandas.DataFrame(columns=list(GO_ALIASES)) if go is None else go.copy()}
+
+        return normalize_panels(panels) if self.__normalize else panels
+
+    def iter_results(self):
+        """ Yield ('<strain>__<locus tag>', panels) for all features. """
+
+        if self.__features is None:
+            raise RuntimeError("No features read.")
+
+        for locus_tag in self.__features['locus_tag']:
+            yield "{0:s}__{1:s}".format(self.__strain, locus_tag.lower()), self.feature_panels(locus_tag)
+
+    def results(self):
+        """ Return the results of all features as from PseudomonasDotComScraper.run_query(). """
+
+        return dict(self.iter_results())
+
+
+def fill_gaps(results, scraper, titles, features=None):
+    """ Scrape the panels in titles for features whose results lack them. Features missing from results are scraped completely.
+
+    :param results: Query results ({'strain__feature': panels}), updated in place.
+    :type  results: dict
+
+    :param scraper: A connected scraper.
+    :type  scraper: PseudomonasDotComScraper
+
+    :param titles: The panels to complete, see PseudomonasDotComScraper.PANELS.
+    :type  titles: iterable
+
+    :param features: Only complete these keys ('strain__feature'). Default: All keys in results.
+    :type  features: iterable
+
+    :return: The number of scraped features.
+    :rtype: int
+
+    """
+
+    # Local import to avoid circular dependency.
+    from GenDBScraper.PseudomonasDotComScraper import PANELS, pdc_query
+
+    titles = list(titles)
+    keys = list(results) if features is None else list(features)
+
+    scraped = 0
+    for key in keys:
+        panels = results.get(key)
+        missing = list(PANELS) if panels is None else [title for title in titles if title not in panels]
+        if not missing:
+            continue
+
+        strain, _, feature = key.partition("__")
+        scraped_panels = scraper.run_panels(pdc_query(strain=strain, feature=feature), missing)
+        results.setdefault(key, {}).update(scraped_panels)
+        scraped += 1
+
+    logging.info("Scraped missing panels of %d of %d features.", scraped, len(keys))
+
+    return scraped
+
+
+def _gff_xrefs(dbxrefs, protein_ids):
+    """ Return the (type, id) cross-references from the Dbxref and protein_id attributes of the rows of one locus. """
+
+    xrefs = []
+    for protein_id in protein_ids.dropna().unique():
+        xrefs.append(('RefSeq', protein_id))
+
+    for value in dbxrefs.dropna():
+        for item in value.split(','):
+            database, _, identifier = item.strip().partition(':')
+            if identifier:
+                xrefs.append((XREF_TYPES.get(database, database), identifier))
+
+    # Drop duplicates, keep order.
+    return list(dict.fromkeys(xrefs))
+
+
+def _rename(table, aliases):
+    """ Rename the first column matching an alias (lower case, stripped) to its canonical name. """
+
+    headers = {str(column).strip().lower(): column for column in table.columns}
+
+    renamed = {}
+    for name, names in aliases.items():
+        column = next((headers[a] for a in names if a in headers), None)
+        if column is not None and column not in renamed:
+            renamed[column] = name
+
+    return table.rename(columns=renamed)
+
+
+def _clean_features(table):
+    """ Return table with FEATURE_COLUMNS, stripped locus tags, integer positions and without names repeating the locus tag. """
+
+    for column in FEATURE_COLUMNS:
+        if column not in table.columns:
+            table[column] = None
+
+    table = table[list(FEATURE_COLUMNS)].copy()
+    table['locus_tag'] = table['locus_tag'].str.strip()
+    for column in ('start', 'end'):
+        table[column] = pandas.to_numeric(table[column], errors='coerce').astype('Int64')
+    table.loc[table['name'].str.upper() == table['locus_tag'].str.upper(), 'name'] = None
+
+    return table.reset_index(drop=True)
+
+
+def _location(feature):
+    """ The 'Genomic location' of the overview, e.g. '1015719  - 1017857 (- strand)'. """
+
+    if pandas.isna(feature['start']) or pandas.isna(feature['end']):
+        return None
+
+    return "{0:d}  - {1:d} ({2:s} strand)".format(int(feature['start']), int(feature['end']), feature['strand'] or '?')
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Import a strain from pseudomonas.com download files, optionally scrape panels the files do not provide.")
+
+    parser.add_argument("-s", "--strain", dest="strain", required=True, help="The strain, results are keyed '<strain>__<locus tag>'.")
+    parser.add_argument("-O", "--organism", dest="organism", default=None, help="The strain name in the overview. Default: The strain.")
+    parser.add_argument("--features", dest="features", required=True, help="GFF3 file or feature table.")
+    parser.add_argument("--go", dest="go", action="append", default=[], help="GO annotation file. Can be given multiple times.")
+    parser.add_argument("--sequences", dest="sequences", nargs="+", default=[], help="FASTA files (.faa amino acid, .ffn gene sequences).")
+    parser.add_argument("--genome", dest="genome", default=None, help="Genome FASTA file to cut all sequences from, see genome_fasta.")
+    parser.add_argument("--flank", dest="flank", type=int, default=DEFAULT_FLANK, help="With --genome: Length of the upstream and downstream sequences.")
+    parser.add_argument("-o", "--outfile", dest="outfile", default=None, help="Write all results to this json file.")
+    parser.add_argument("-d", "--outdir", dest="outdir", default=None, help="Write one json file per feature (<strain>__<feature>.json) to this directory.")
+    parser.add_argument("--fill", dest="fill", nargs="+", default=[], help="Panels to scrape from pseudomonas.com for features lacking them (e.g. Operons Orthologs).")
+    parser.add_argument("--fill-features", dest="fill_features", nargs="+", default=None, help="Only scrape missing panels of these locus tags. Default: All features.")
+
+    args = parser.parse_args()
+
+    from GenDBScraper.PseudomonasDotComScraper import PseudomonasDotComScraper
+
+    importer = BulkImporter(args.strain, args.organism)
+    importer.read_features(args.features)
+    for path in args.go:
+        importer.read_go(path)
+    if args.genome is not None:
+        importer.read_genome(args.genome, flank=args.flank)
+    for path in args.sequences:
+        importer.read_sequences(path)
+
+    results = importer.results()
+
+    scraper = PseudomonasDotComScraper()
+    if args.fill:
+        scraper.connect()
+        features = None if args.fill_features is None else ["{0:s}__{1:s}".format(args.strain, f.lower()) for f in args.fill_features]
+        fill_gaps(results, scraper, args.fill, features)
+
+    if args.outdir is not None:
+        os.makedirs(args.outdir, exist_ok=True)
+        for key, panels in results.items():
+            scraper.to_json({key: panels}, os.path.join(args.outdir, key + ".json"))
+    else:
+        logging.info("Results stored in %s.", scraper.to_json(results, args.outfile))
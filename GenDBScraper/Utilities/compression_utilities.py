@@ -0,0 +1,128 @@
+""" :module compression_utilities: Write precompressed .gz and .br siblings of generated static files for web servers serving them by Accept-Encoding.
+
+Brotli requires the optional 'brotli' package, without it only .gz siblings are written.
+
+"""
+
+import gzip
+import logging
+import os
+
+# Encodings by file suffix.
+ENCODINGS = {'.gz': 'gzip', '.br': 'br'}
+
+# Files to precompress by default.
+DEFAULT_SUFFIXES = ('.html', '.js', '.json', '.css', '.svg')
+
+
+def brotli_available():
+    """ Return True if the brotli package is installed. """
+
+    try:
+        import brotli
+    except ImportError:
+        return False
+
+    return True
+
+
+def compress(data, encoding, level=None):
+    """ Compress bytes with encoding ('gzip' or 'br'). Gzip output has a fixed mtime, equal input gives equal output. """
+
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9 if level is None else level, mtime=0)
+
+    if encoding == 'br':
+        import brotli
+        return brotli.compress(data, quality=11 if level is None else level)
+
+    raise ValueError("Unknown encoding '{0:s}'.".format(str(encoding)))
+
+
+def precompress(path, suffixes=('.gz', '.br'), min_size=256):
+    """ Write compressed siblings (path.gz, path.br) of a file. Siblings are only written if smaller than the file and rewritten only if older than the file, stale siblings are removed.
+
+    :param path: The file to compress.
+    :type  path: str
+
+    :param suffixes: The sibling suffixes to write, see ENCODINGS. '.br' is skipped if brotli is not installed.
+    :type  suffixes: iterable
+
+    :param min_size: Files smaller than this (bytes) are not compressed.
+    :type  min_size: int
+
+    :return: The paths of the siblings.
+    :rtype: list
+
+    """
+
+    if '.br' in suffixes and not brotli_available():
+        logging.debug("brotli not installed, skipping .br for %s.", path)
+        suffixes = [s for s in suffixes if s != '.br']
+
+    stat = os.stat(path)
+    data = None
+
+    siblings = []
+    for suffix in suffixes:
+        sibling = path + suffix
+
+        if os.path.isfile(sibling) and os.stat(sibling).st_mtime >= stat.st_mtime:
+            siblings.append(sibling)
+            continue
+
+        if stat.st_size < min_size:
+            _remove(sibling)
+            continue
+
+        if data is None:
+            with open(path, 'rb') as fp:
+                data = fp.read()
+
+        compressed = compress(data, ENCODINGS[suffix])
+        if len(compressed) >= len(data):
+            _remove(sibling)
+            continue
+
+        with open(sibling, 'wb') as fp:
+            fp.write(compressed)
+        siblings.append(sibling)
+
+    return siblings
+
+
+def precompress_tree(directory, suffixes=('.gz', '.br'), extensions=DEFAULT_SUFFIXES, min_size=256):
+    """ Precompress all files with the given extensions below directory.
+
+    :return: The number of files with siblings.
+    :rtype: int
+
+    """
+
+    count = 0
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if os.path.splitext(name)[1] in extensions:
+                count += bool(precompress(os.path.join(root, name), suffixes, min_size))
+
+    return count
+
+
+def _remove(path):
+    if os.path.isfile(path):
+        os.remove(path)
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Write .gz and .br siblings of the static files in a directory.")
+
+    parser.add_argument("directory", help="The directory to precompress.")
+    parser.add_argument("--no-brotli", dest="brotli", action="store_false", help="Only write .gz siblings.")
+
+    args = parser.parse_args()
+
+    count = precompress_tree(args.directory, suffixes=('.gz', '.br') if args.brotli else ('.gz',))
+    logging.info("Precompressed %d files in %s .", count, args.directory)
@@ -0,0 +1,276 @@
+""" :module genome_fasta: Memory-mapped access to a strain's genome FASTA through a faidx (samtools .fai) index, and 'Sequences' panels cut from it by feature coordinates instead of scraped.
+
+:example: with GenomeFasta('Pseudomonas_fluorescens_SBW25_110.fna') as genome: service = SequenceService(genome, read_gff('Pseudomonas_fluorescens_SBW25_110.gff'))
+:example: service.panel('PFLU0916')
+
+"""
+
+from GenDBScraper.Utilities.lazy_import import lazy_import
+from GenDBScraper.Utilities.sequence_utilities import DOWNSTREAM_TAG, GENE_TAG, PROTEIN_TAG, UPSTREAM_TAG
+
+from collections import namedtuple
+import logging
+import mmap
+import os
+
+pandas = lazy_import('pandas')
+Seq = lazy_import('Bio.Seq')
+Data = lazy_import('Bio.Data.CodonTable')
+
+# Length of the upstream and downstream sequences.
+DEFAULT_FLANK = 500
+
+# NCBI translation table of bacteria.
+TRANSLATION_TABLE = 11
+
+# One record of a .fai index: name, sequence length, byte offset of the first base, bases per line, bytes per line.
+FaiEntry = namedtuple('FaiEntry', ('name', 'length', 'offset', 'linebases', 'linewidth'))
+
+_COMPLEMENT = str.maketrans("ACGTUMRWSYKVHDBNacgtumrwsykvhdbn", "TGCAAKYWSRMBDHVNtgcaakywsrmbdhvn")
+
+
+def build_index(path):
+    """ Index a FASTA file like 'samtools faidx' and write the index to path.fai .
+
+    :raises ValueError: Lines of a record (but the last) differ in length.
+
+    :return: The index entries in file order.
+    :rtype: list
+
+    """
+
+    entries = []
+    with open(path, 'rb') as fp:
+        name = None
+        offset = 0
+        for line in iter(fp.readline, b''):
+            if line.startswith(b'>'):
+                if name is not None:
+                    entries.append(_entry(name, length, first, linebases, linewidth, path))
+                name = line[1:].split(None, 1)[0].decode('ascii') if line[1:].strip() else ''
+                length, first, linebases, linewidth, short = 0, offset + len(line), None, None, False
+            elif name is not None and line.strip():
+                bases = len(line.rstrip(b'\r\n'))
+                if linebases is None:
+                    linebases, linewidth = bases, len(line)
+                elif short or bases > linebases:
+                    raise ValueError("Record {0:s} in {1:s} has lines of different length.".format(name, path))
+                short = bases < linebases
+                length += bases
+            offset += len(line)
+
+        if name is not None:
+            entries.append(_entry(name, length, first, linebases, linewidth, path))
+
+    with open(path + '.fai', 'w') as fp:
+        for entry in entries:
+            fp.write("\t".join(str(value) for value in entry) + "\n")
+
+    return entries
+
+
+def read_index(path):
+    """ Read a .fai index. """
+
+    with open(path) as fp:
+        return [FaiEntry(parts[0], *[int(p) for p in parts[1:5]]) for parts in (line.rstrip('\n').split('\t') for line in fp if line.strip())]
+
+
+def reverse_complement(sequence):
+    """ Return the reverse complement of a DNA sequence. """
+
+    return sequence.translate(_COMPLEMENT)[::-1]
+
+
+def translate(sequence, table=TRANSLATION_TABLE):
+    """ Translate a coding sequence: alternative start codons as M, without the stop codon. Incomplete CDSs are translated up to the first stop. """
+
+    try:
+        return str(Seq.Seq(sequence).translate(table=table, cds=True))
+    except Data.TranslationError:
+        return str(Seq.Seq(sequence[:len(sequence) - len(sequence) % 3]).translate(table=table, to_stop=True))
+
+
+class GenomeFasta():
+    """ Random access to the records of an uncompressed FASTA file through a memory map. The .fai index is read if up to date, built otherwise. """
+
+    def __init__(self, path):
+        """
+        GenomeFasta constructor.
+
+        :param path: The FASTA file.
+        :type  path: str
+
+        """
+
+        if path.endswith('.gz'):
+            raise ValueError("{0:s} is compressed, memory mapping needs an uncompressed FASTA file.".format(path))
+
+        index = path + '.fai'
+        if os.path.isfile(index) and os.stat(index).st_mtime >= os.stat(path).st_mtime:
+            entries = read_index(index)
+        else:
+            entries = build_index(path)
+
+        self.__path = path
+        self.__index = {entry.name: entry for entry in entries}
+        with open(path, 'rb') as fp:
+            self.__mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __contains__(self, name):
+        return name in self.__index
+
+    @property
+    def path(self):
+        """ The FASTA file. """
+        return self.__path
+
+    @property
+    def names(self):
+        """ The record names in file order. """
+        return list(self.__index)
+
+    def length(self, name):
+        """ Return the length of a record. """
+
+        return self.__index[name].length
+
+    def fetch(self, name, start, end, strand='+'):
+        """ Return the bases start to end (1-based, inclusive, clipped to the record) of a record, reverse complemented for strand '-'. """
+
+        entry = self.__index[name]
+        start, end = max(start, 1), min(end, entry.length)
+        if end < start:
+            return ''
+
+        sequence = self.__mmap[self.__position(entry, start - 1):self.__position(entry, end - 1) + 1]
+        sequence = sequence.translate(None, b'\r\n').decode('ascii').upper()
+
+        return reverse_complement(sequence) if strand == '-' else sequence
+
+    def close(self):
+        """ Release the memory map. """
+
+        self.__mmap.close()
+
+    def __position(self, entry, base):
+        """ Byte offset of a 0-based base of a record. """
+
+        return entry.offset + (base // entry.linebases) * entry.linewidth + base % entry.linebases
+
+
+class SequenceService():
+    """ Cuts the 'Sequences' panel of features (gene, upstream and downstream flanks, translation of CDSs) from a genome. """
+
+    def __init__(self, genome, features, flank=DEFAULT_FLANK, replicons=None):
+        """
+        SequenceService constructor.
+
+        :param genome: The genome.
+        :type  genome: GenomeFasta
+
+        :param features: The feature coordinates, with columns 'locus_tag', 'replicon', 'start', 'end', 'strand' and 'type' as from bulk_import.read_gff().
+        :type  features: pandas.DataFrame
+
+        :param flank: Length of the upstream and downstream sequences.
+        :type  flank: int
+
+        :param replicons: Genome record names by feature replicon, for replicons named differently (e.g. {'chromosome': 'NC_012660.1'}). Features of unknown replicons map to the only record of single record genomes.
+        :type  replicons: dict
+
+        """
+
+        self.__genome = genome
+        self.__flank = flank
+        self.__replicons = replicons or {}
+
+        columns = ['replicon', 'start', 'end', 'strand', 'type']
+        table = features.set_index(features['locus_tag'].str.upper())[columns]
+        self.__features = {locus_tag: tuple(row) for locus_tag, row in zip(table.index, table.itertuples(index=False))}
+
+    def __contains__(self, locus_tag):
+        return locus_tag.upper() in self.__features
+
+    def sequences(self, locus_tag):
+        """ Return the sequences of a feature by tag (see sequence_utilities.SEQUENCE_TAGS), without protein for non coding features. Raises KeyError for unknown features. """
+
+        replicon, start, end, strand, kind = self.__features[locus_tag.upper()]
+        name = self.__record(replicon)
+        start, end = int(start), int(end)
+
+        if strand == '-':
+            upstream = self.__genome.fetch(name, end + 1, end + self.__flank, '-')
+            downstream = self.__genome.fetch(name, start - self.__flank, start - 1, '-')
+        else:
+            upstream = self.__genome.fetch(name, start - self.__flank, start - 1)
+            downstream = self.__genome.fetch(name, end + 1, end + self.__flank)
+
+        sequences = {UPSTREAM_TAG: upstream,
+                     GENE_TAG: self.__genome.fetch(name, start, end, strand),
+                     DOWNSTREAM_TAG: downstream,
+                     }
+
+        if not isinstance(kind, str) or kind == 'CDS':
+            sequences[PROTEIN_TAG] = translate(sequences[GENE_TAG])
+
+        return sequences
+
+    def panel(self, locus_tag):
+        """ Return the 'Sequences' panel of a feature, laid out like the cleaned scraped panel (tag in column 0, '>header\\nSEQUENCE' in column 1). """
+
+        labels = {UPSTREAM_TAG: 'upstream', GENE_TAG: 'gene', DOWNSTREAM_TAG: 'downstream', PROTEIN_TAG: 'protein'}
+
+        rows = [[tag, ">{0:s} {1:s} sequence length {2:d}\n{3:s}".format(locus_tag.upper(), labels[tag], len(sequence), sequence)]
+                for tag, sequence in self.sequences(locus_tag).items()]
+
+        return pandas.DataFrame(rows, columns=[0, 1])
+
+    def __record(self, replicon):
+        name = self.__replicons.get(replicon, replicon)
+        if name in self.__genome:
+            return name
+
+        names = self.__genome.names
+        if len(names) == 1:
+            return names[0]
+
+        raise KeyError("No genome record for replicon {0:s}, pass replicons.".format(str(replicon)))
+
+
+def _entry(name, length, offset, linebases, linewidth, path):
+    if linebases is None:
+        logging.warning("Record %s in %s is empty.", name, path)
+        linebases, linewidth = 1, 1
+
+    return FaiEntry(name, length, offset, linebases, linewidth)
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+    from GenDBScraper.Utilities.bulk_import import read_feature_table, read_gff
+    from GenDBScraper.Utilities.sequence_utilities import SEQUENCE_TAGS, write_fasta
+
+    parser = ArgumentParser(description="Index a genome FASTA file and cut feature sequences from it.")
+
+    parser.add_argument("genome", help="The genome FASTA file, the index is written next to it.")
+    parser.add_argument("--features", dest="features", default=None, help="GFF3 file or feature table with the feature coordinates.")
+    parser.add_argument("-o", "--outfile", dest="outfile", default=None, help="Write the sequences of all features to this FASTA file.")
+    parser.add_argument("-t", "--tag", dest="tag", default=PROTEIN_TAG, choices=SEQUENCE_TAGS, help="Which sequence to write.")
+    parser.add_argument("--flank", dest="flank", type=int, default=DEFAULT_FLANK, help="Length of the upstream and downstream sequences.")
+
+    args = parser.parse_args()
+
+    with GenomeFasta(args.genome) as genome:
+        if args.features is not None and args.outfile is not None:
+            stem = args.features[:-3] if args.features.endswith('.gz') else args.features
+            features = read_gff(args.features) if stem.endswith(('.gff', '.gff3')) else read_feature_table(args.features)
+            service = SequenceService(genome, features, flank=args.flank)
+            count = write_fasta(((locus_tag, service.panel(locus_tag)) for locus_tag in features['locus_tag']), args.outfile, args.tag)
+            logging.info("Wrote %d records to %s .", count, args.outfile)
@@ -0,0 +1,211 @@
+""" :module instrumentation: Per request and per panel timing events and pluggable sinks (json lines, prometheus). """
+
+from contextlib import contextmanager
+import json
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Registered sinks, callables receiving one event dict each.
+_sinks = []
+
+# Per thread state: current feature and the panel record being accumulated.
+_state = threading.local()
+
+
+def add_sink(sink):
+    """ Register a sink. Sinks are called with every event (dict) emitted while registered.
+
+    Request events ('type': 'request') carry 'method', 'url', 'host', 'status', 'ttfb' (seconds until response headers, including name resolution and connect), 'download' (seconds), 'bytes', 'feature' and 'panel'.
+    Panel events ('type': 'panel') carry 'feature', 'panel', 'total', 'network', 'parse' (total - network), 'dataframe' (seconds spent constructing pandas.DataFrames), 'bytes' and 'requests'.
+
+    :param sink: The sink to add.
+    :type  sink: callable
+
+    :example: add_sink(JSONLinesSink('timings.jsonl'))
+
+    """
+
+    if not callable(sink):
+        raise TypeError("sink must be callable.")
+
+    _sinks.append(sink)
+
+    return sink
+
+
+def remove_sink(sink):
+    """ Unregister a sink. """
+
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def enabled():
+    """ Return True if any sink is registered. """
+
+    return bool(_sinks)
+
+
+def emit(event):
+    """ Pass the event to all sinks. Failing sinks are logged and skipped. """
+
+    for sink in list(_sinks):
+        try:
+            sink(event)
+        except Exception:
+            logging.exception("Instrumentation sink %r failed.", sink)
+
+
+@contextmanager
+def feature(name):
+    """ Tag all events emitted in the context (in this thread) with the feature name. """
+
+    previous = getattr(_state, 'feature', None)
+    _state.feature = name
+    try:
+        yield
+    finally:
+        _state.feature = previous
+
+
+@contextmanager
+def panel(name):
+    """ Time a panel extraction. Requests and dataframe construction inside the context are accounted to the panel. """
+
+    if not _sinks:
+        yield
+        return
+
+    previous = getattr(_state, 'panel', None)
+    record = dict(type='panel', feature=getattr(_state, 'feature', None), panel=name, network=0.0, dataframe=0.0, bytes=0, requests=0)
+    _state.panel = record
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['total'] = time.perf_counter() - start
+        record['parse'] = max(record['total'] - record['network'], 0.0)
+        _state.panel = previous
+        emit(record)
+
+
+@contextmanager
+def dataframe():
+    """ Account the time spent in the context to dataframe construction of the current panel. """
+
+    record = getattr(_state, 'panel', None)
+    if record is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['dataframe'] += time.perf_counter() - start
+
+
+def request(method, url, status, ttfb, download, size):
+    """ Emit a request event and account it to the current panel. """
+
+    record = getattr(_state, 'panel', None)
+    if record is not None:
+        record['network'] += ttfb + download
+        record['bytes'] += size
+        record['requests'] += 1
+
+    emit(dict(type='request',
+              feature=getattr(_state, 'feature', None),
+              panel=None if record is None else record['panel'],
+              method=method,
+              url=url,
+              host=urlsplit(url).hostname,
+              status=status,
+              ttfb=ttfb,
+              download=download,
+              bytes=size,
+              timestamp=time.time(),
+              ))
+
+
+class JSONLinesSink():
+    """ Sink writing one json document per event to a file. """
+
+    def __init__(self, path):
+        """
+        JSONLinesSink constructor.
+
+        :param path: The file to append events to.
+        :type  path: str
+
+        """
+
+        self.__fp = open(path, 'a')
+        self.__lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event)
+        with self.__lock:
+            self.__fp.write(line + "\n")
+            self.__fp.flush()
+
+    def close(self):
+        self.__fp.close()
+
+
+class PrometheusSink():
+    """ Sink aggregating events into prometheus_client histograms and counters. """
+
+    def __init__(self, registry=None):
+        """
+        PrometheusSink constructor.
+
+        :param registry: The registry to register the metrics with. Default: a new prometheus_client.CollectorRegistry.
+        :type  registry: prometheus_client.CollectorRegistry
+
+        """
+
+        try:
+            import prometheus_client
+        except ImportError:
+            raise ImportError("PrometheusSink requires the prometheus_client package (pip install prometheus_client).")
+
+        if registry is None:
+            registry = prometheus_client.CollectorRegistry()
+
+        self.__registry = registry
+        self.__request_seconds = prometheus_client.Histogram('gendbscraper_request_seconds', 'Time spent in http requests.', ['host', 'phase'], registry=registry)
+        self.__request_bytes = prometheus_client.Counter('gendbscraper_request_bytes', 'Bytes downloaded.', ['host'], registry=registry)
+        self.__panel_seconds = prometheus_client.Histogram('gendbscraper_panel_seconds', 'Time spent extracting panels.', ['panel', 'phase'], registry=registry)
+
+    @property
+    def registry(self):
+        return self.__registry
+
+    def __call__(self, event):
+        if event['type'] == 'request':
+            for phase in ('ttfb', 'download'):
+                if event[phase] is not None:
+                    self.__request_seconds.labels(host=event['host'], phase=phase).observe(event[phase])
+            self.__request_bytes.labels(host=event['host']).inc(event['bytes'])
+
+        elif event['type'] == 'panel':
+            for phase in ('total', 'network', 'parse', 'dataframe'):
+                self.__panel_seconds.labels(panel=event['panel'], phase=phase).observe(event[phase])
+
+    def text(self):
+        """ Return the metrics in the prometheus text exposition format. """
+
+        import prometheus_client
+
+        return prometheus_client.generate_latest(self.__registry).decode('utf-8')
+
+    def write(self, path):
+        """ Write the metrics to a file in the prometheus text format (e.g. for the node exporter textfile collector). """
+
+        import prometheus_client
+
+        prometheus_client.write_to_textfile(path, self.__registry)
@@ -0,0 +1,117 @@
+""" :module lazy_import: Defer loading of heavy 3rd party modules until their first use. """
+
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+# Serializes the creation of lazy modules.
+_lock = threading.Lock()
+
+# Loaders and locks of lazy modules not yet executed, keyed by module name.
+_pending = {}
+
+
+class _PendingLoad(object):
+    """ :class _PendingLoad: Loader and per module lock of a lazy module. """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.lock = threading.RLock()
+        self.loading = False
+
+
+class _LazyModule(types.ModuleType):
+    """ :class _LazyModule: Module that executes itself on first attribute access.
+
+    Unlike importlib.util.LazyLoader (before python 3.12), the module keeps this class until it is fully executed
+    and other threads wait on a per module lock meanwhile, so they never see a half initialized module.
+
+    """
+
+    def __getattribute__(self, attr):
+        _load(self)
+        return object.__getattribute__(self, attr)
+
+    def __setattr__(self, attr, value):
+        _load(self)
+        object.__setattr__(self, attr, value)
+
+    def __delattr__(self, attr):
+        _load(self)
+        object.__delattr__(self, attr)
+
+
+def _load(module):
+    """ Execute the lazy 'module' once, blocking other threads until done. """
+
+    name = object.__getattribute__(module, '__dict__')['__name__']
+    pending = _pending.get(name)
+    if pending is None:
+        return
+
+    with pending.lock:
+        # Already executed by another thread, or re-entered by this thread while executing.
+        if pending.loading or type(module) is not _LazyModule:
+            return
+
+        pending.loading = True
+        try:
+            pending.loader.exec_module(module)
+        finally:
+            pending.loading = False
+
+        object.__setattr__(module, '__class__', types.ModuleType)
+        _pending.pop(name, None)
+
+
+def lazy_import(name):
+    """ Return the module 'name', to be loaded on first attribute access.
+
+    Missing modules are reported at call time (ImportError), errors raised while executing the module on first use.
+    The first use is thread safe.
+
+    :param name: The fully qualified module name.
+    :type  name: str
+
+    :raises ImportError: Module not found.
+
+    :example: pandas = lazy_import('pandas')
+    :example: crossref = lazy_import('doi2bib.crossref')
+
+    """
+
+    with _lock:
+        if name in sys.modules:
+            return sys.modules[name]
+
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ImportError("No module named '{0:s}'".format(name), name=name)
+
+        if not hasattr(spec.loader, 'exec_module'):
+            raise ImportError("Module '{0:s}' cannot be loaded lazily.".format(name), name=name)
+
+        module = importlib.util.module_from_spec(spec)
+        _pending[name] = _PendingLoad(spec.loader)
+        module.__class__ = _LazyModule
+        sys.modules[name] = module
+
+        # Bind the submodule to its parent as a regular import would.
+        parent, _, child = name.rpartition('.')
+        if parent:
+            setattr(sys.modules[parent], child, module)
+
+    return module
+
+
+def is_loaded(name):
+    """ Return True if the module 'name' was imported and, if lazy, already executed. """
+
+    module = sys.modules.get(name)
+    if module is None:
+        return False
+
+    # Lazy modules are instances of _LazyModule until executed.
+    return type(module) is not _LazyModule
@@ -1,22 +1,25 @@
-import ipywidgets as widgets
-import pandas
-import logging
-import ipyaggrid
-from Bio import SeqIO
 from io import StringIO
+import logging
 
-import re
 import json
 
-from IPython.display import IFrame, clear_output, Image
 from GenDBScraper.PseudomonasDotComScraper import PseudomonasDotComScraper, pdc_query
-
 from GenDBScraper.StringDBScraper import StringDBScraper, stringdb_query
-
+from GenDBScraper.Utilities.lazy_import import lazy_import
+from GenDBScraper.Utilities.regex_utilities import PATTERNS
+from GenDBScraper.Utilities.static_renderer import cell_link, link_renderer
+from GenDBScraper.Utilities.worker import ScraperWorker
+
+# Notebook and plotting modules, loaded on first use.
+widgets = lazy_import('ipywidgets')
+ipyaggrid = lazy_import('ipyaggrid')
+pandas = lazy_import('pandas')
+SeqIO = lazy_import('Bio.SeqIO')
+display = lazy_import('IPython.display')
 
 def sbw25_okm():
-    clear_output()
-    frame = IFrame("https://openknowledgemaps.org/map/4aafb7d70516de0f56190d374bf398c8&embed=true", width=1000, height=1000)
+    display.clear_output()
+    frame = display.IFrame("https://openknowledgemaps.org/map/4aafb7d70516de0f56190d374bf398c8&embed=true", width=1000, height=1000)
     return frame
     #display(frame)
     
@@ -35,28 +38,35 @@ def feature_okm(locus_tag):
     okms = pandas.read_json("pflu_okm_urls_20190424.json", typ='series', orient='records')
 
     if locus_tag.upper() in okms.keys():
-        frame = IFrame(okms[locus_tag.upper()]+"&embed=true", width=900, height=800)
+        frame = display.IFrame(okms[locus_tag.upper()]+"&embed=true", width=900, height=800)
 
     else:
         frame = widgets.Label("No maps found for {}".format(locus_tag))
 
-    clear_output(wait=True)    
+    display.clear_output(wait=True)    
     #display(frame)
     return frame
 
+# Process wide worker, keeps the scrapers connected and the identifier caches warm across calls.
+_worker = None
+
+def get_worker():
+    """ Return the process wide ScraperWorker, create it on first use. Pass as Pool initializer to connect up front. """
+
+    global _worker
+
+    if _worker is None:
+        _worker = ScraperWorker()
+        _worker.pdc
+        _worker.stdb
+
+    return _worker
+
 def run_pdc(strain=None, locus_tag=None):
     
-    clear_output(wait=True)
-    
-    pdc = PseudomonasDotComScraper(query=pdc_query(strain=strain, feature=locus_tag))
-    query_string = "__".join([pdc.query[0].strain, pdc.query[0].feature])
-    pdc.connect()
-    pdc.run_query()
-    
-    
-    results = pdc.results[query_string]
-    
-    return results
+    display.clear_output(wait=True)
+
+    return get_worker().run_pdc(strain, locus_tag)
     
 
 # Need to treat each tab and subtabs individually
@@ -97,58 +107,15 @@ def get_grids(data_tables):
                           'enableRangeSelection': True,
                           }
           
-            if title.lower() == "ortholog group":                           
-                for column_def in grid_options['columnDefs']:
-                    pattern = re.compile(r"^GI$")            
-                    if pattern.match(column_def['field']):
-                        column_def['cellRenderer'] = """function(params) { return '<a href=http://www.ncbi.nlm.nih.gov/protein/'+params.value+' target=_blank>'+params.value+'</a>'; }"""
-          
-            if title.lower() == "ortholog cluster":                           
-                for column_def in grid_options['columnDefs']:
-                    pattern = re.compile(r"^GI \(Strain [1,2]\)$")            
-                    if pattern.match(column_def['field']):
-                        column_def['cellRenderer'] = """function(params) { return '<a href=http://www.ncbi.nlm.nih.gov/protein/'+params.value+' target=_blank>'+params.value+'</a>'; }"""
-          
-            if title.lower() == "cross-references":
-                for column_def in grid_options['columnDefs']:
-                    pattern = re.compile(r"^[U,u]rl$")
-                    if pattern.match(column_def['field']):
-                        column_def['cellRenderer'] = """function(params) { return '<a href='+params.value+' target=_blank>'+params.value+'</a>'; }"""
-            
-            if title.lower() == "individual mappings":
-                for column_def in grid_options['columnDefs']:
-                    pattern = re.compile(r"^PMID$")
-                    if pattern.match(column_def['field']):
-                        column_def['cellRenderer'] = """function(params) { return '<a href=http://ncbi.nlm.nih.gov/pubmed/'+params.value+' target=_blank>'+params.value+'</a>'; }"""
-            
-            if title.lower() == "gene ontology":
-                for column_def in grid_options['columnDefs']:
-                    # GO Accession
-                    pattern = re.compile(r"^Accession$")
-                    if pattern.match(column_def['field']):
-                        column_def['cellRenderer'] = """function(params) { return '<a href=http://www.ebi.ac.uk/QuickGO/GTerm?id='+params.value+' target=_blank>'+params.value+'</a>'; }"""
-                    
-                    # ECO accession
-                    pattern = re.compile(r"^Evidence Ontology \(ECO\) Code$")
-                    if pattern.match(column_def['field']):
-                        column_def['cellRenderer'] = """function(params) { return '<a href=http://www.ebi.ac.uk/ontology-lookup/?termId='+params.value+' target=_blank>'+params.value+'</a>'; }"""
-    
-            if title.lower() == "functional predictions from interpro":
-                for column_def in grid_options['columnDefs']:
-                   
-                    pattern = re.compile(r"^Interpro Accession$")
-                    if pattern.match(column_def['field']):
-                        column_def['cellRenderer'] = """function(params) { return '<a href=http://www.ebi.ac.uk/interpro/entry/'+params.value+' target=_blank>'+params.value+'</a>'; }"""
-           
-            if re.match(r'^transposon.*$', title.lower() ):
-                for column_def in grid_options['columnDefs']:
-                    pattern = re.compile(r"^Reference$")
-                    if pattern.match(column_def['field']):
-                        column_def['cellRenderer'] = """function(params) { return '<a href=http://ncbi.nlm.nih.gov/pubmed/'+params.value+' target=_blank>'+params.value+'</a>'; }"""
+            # Links shared with the static renderer.
+            for column_def in grid_options['columnDefs']:
+                prefix = cell_link(title, column_def['field'])
+                if prefix is not None:
+                    column_def['cellRenderer'] = link_renderer(prefix)
 
             if title.lower() == 'genes':
                 for column_def in grid_options['columnDefs']:
-                    pattern = re.compile(r"^Unnamed: 7$",flags=re.IGNORECASE)
+                    pattern = PATTERNS['column_unnamed_7']
                     if pattern.match(column_def['field']):
                         column_def['cellRenderer'] = """function(params) { 
     let v = params.value;
@@ -166,13 +133,6 @@ def get_grids(data_tables):
     return b;
 } """
             
-            if title.lower() == 'references':
-                for column_def in grid_options['columnDefs']:
-                    pattern = re.compile(r"^Pubmed_id$",flags=re.IGNORECASE)
-                    if pattern.match(column_def['field']):
-                        column_def['cellRenderer'] = """function(params) { return '<a href=http://ncbi.nlm.nih.gov/pubmed/'+params.value+' target=_blank>'+params.value+'</a>'; }"""
-            
-            
             g = ipyaggrid.Grid(grid_data = df,
                                grid_options=grid_options,
                                center=False,
@@ -219,27 +179,10 @@ def get_grids(data_tables):
 
     return tabs
 
-def run_stdb(locus_tag):
-    clear_output(wait=True)
-
-    gene_sub_pattern = re.compile(r'([a-z](?=[0-9]))')
-    gene=gene_sub_pattern.sub(r'\1_', locus_tag)
-
-    stdb = StringDBScraper(query=stringdb_query(taxonId=216595, features=[gene]))
-
-    stdb.connect()
-
-    stdb.update_features()
-
-    stdb_results = dict()
-
-    stdb_results['Network Image'] = stdb.network_image()
-    stdb_results['Network Interactions'] = stdb.network_interactions()
-    stdb_results['Interaction Partners'] = stdb.interaction_partners(required_score=300)
-    stdb_results['Functional Enrichments'] = stdb.functional_enrichments()
-    stdb_results['Interaction Enrichments'] = stdb.interaction_enrichments()
+def run_stdb(locus_tag, renderer='remote', cache_dir=None):
+    display.clear_output(wait=True)
 
-    return stdb_results
+    return get_worker().run_stdb(locus_tag, taxonId=216595, renderer=renderer, cache_dir=cache_dir)
 
 def get_stdb_grids(stdb_results):
     
@@ -0,0 +1,203 @@
+""" :module network_renderer: Render string-db.org interaction networks as SVG images locally. """
+
+from xml.sax.saxutils import escape
+import hashlib
+import math
+import os
+import tempfile
+
+# Default directory for cached network images.
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'string-db_network_images')
+
+# Edge colours for the evidence channels, same palette as string-db.org.
+CHANNEL_COLOURS = {
+        'nscore': '#1f9e22',  # neighborhood
+        'fscore': '#e2001a',  # gene fusion
+        'pscore': '#2e3192',  # phylogenetic co-occurrence
+        'ascore': '#222222',  # co-expression
+        'escore': '#d72dd7',  # experiments
+        'dscore': '#23b5e6',  # databases
+        'tscore': '#b6d728',  # textmining
+        }
+
+
+def render_network_svg(interactions, width=600, height=600, min_score=None):
+    """ Draw the interaction network as SVG.
+
+    Nodes are placed on a circle in alphabetical order, edges are drawn with width and opacity scaled by the combined score and coloured by the strongest evidence channel. The output only depends on the set of interactions, not on their order.
+
+    :param interactions: Interactions table as returned from StringDBScraper.network_interactions().
+    :type  interactions: pandas.DataFrame
+
+    :param width: Image width in pixels.
+    :type  width: int
+
+    :param height: Image height in pixels.
+    :type  height: int
+
+    :param min_score: Only draw edges with combined score >= min_score.
+    :type  min_score: float
+
+    :return: The SVG document.
+    :rtype: str
+
+    """
+
+    edges = _canonical_edges(interactions, min_score)
+    nodes = sorted({node for edge in edges for node in edge[:2]})
+
+    # Circular layout.
+    radius = 0.5 * min(width, height) - 60
+    cx, cy = 0.5 * width, 0.5 * height
+    positions = {}
+    for i, node in enumerate(nodes):
+        angle = 2.0 * math.pi * i / max(len(nodes), 1) - 0.5 * math.pi
+        positions[node] = (cx + radius * math.cos(angle), cy + radius * math.sin(angle))
+
+    lines = ['<svg xmlns="http://www.w3.org/2000/svg" width="{0:d}" height="{1:d}" viewBox="0 0 {0:d} {1:d}">'.format(width, height),
+             '<rect width="100%" height="100%" fill="white"/>',
+             '<g stroke-linecap="round">',
+             ]
+
+    for a, b, score, channel in edges:
+        (x1, y1), (x2, y2) = positions[a], positions[b]
+        lines.append('<line x1="{0:.1f}" y1="{1:.1f}" x2="{2:.1f}" y2="{3:.1f}" stroke="{4:s}" stroke-width="{5:.2f}" stroke-opacity="{6:.2f}"><title>{7:s}</title></line>'.format(
+            x1, y1, x2, y2,
+            CHANNEL_COLOURS.get(channel, '#999999'),
+            0.5 + 3.5 * score,
+            0.3 + 0.7 * score,
+            escape("{0:s} - {1:s}: {2:.3f}".format(_label(a), _label(b), score)),
+            ))
+
+    lines.append('</g>')
+    lines.append('<g font-family="sans-serif" font-size="11" text-anchor="middle">')
+
+    for node in nodes:
+        x, y = positions[node]
+        lines.append('<circle cx="{0:.1f}" cy="{1:.1f}" r="12" fill="#c5d9f1" stroke="#4f81bd" stroke-width="1.5"><title>{2:s}</title></circle>'.format(x, y, escape(node)))
+        lines.append('<text x="{0:.1f}" y="{1:.1f}">{2:s}</text>'.format(x, y + 26, escape(_label(node))))
+
+    lines.append('</g>')
+    lines.append('</svg>')
+
+    return "\n".join(lines) + "\n"
+
+
+def network_hash(interactions, min_score=None, **options):
+    """ Content hash of the network, independent of row order and edge direction.
+
+    :param interactions: Interactions table as returned from StringDBScraper.network_interactions().
+    :type  interactions: pandas.DataFrame
+
+    :param options: Render options (see render_network_svg()) changing the image of the same network, e.g. width and height.
+
+    :return: Hex digest identifying the network.
+    :rtype: str
+
+    """
+
+    digest = hashlib.sha1()
+    for a, b, score, channel in _canonical_edges(interactions, min_score):
+        digest.update("{0:s}\t{1:s}\t{2:.3f}\t{3:s}\n".format(a, b, score, channel or '').encode('utf-8'))
+    for name, value in sorted(options.items()):
+        digest.update("{0:s}={1!r}\n".format(name, value).encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def cached_network_image(interactions, cache_dir=None, min_score=None, **kwargs):
+    """ Render the network to an SVG file named by its content hash, reuse the file if it exists.
+
+    Genes sharing the same (sub)network share the same image file, rendered with other options it is another file.
+
+    :param interactions: Interactions table as returned from StringDBScraper.network_interactions().
+    :type  interactions: pandas.DataFrame
+
+    :param cache_dir: Directory to store images in. Default: DEFAULT_CACHE_DIR.
+    :type  cache_dir: str
+
+    :param kwargs: Further keyword arguments are forwarded to render_network_svg().
+
+    :return: Path to the image file.
+    :rtype: str
+
+    """
+
+    key = network_hash(interactions, min_score, **kwargs)
+    path = _cache_path(cache_dir, key, '.svg')
+
+    if not os.path.isfile(path):
+        store_image(render_network_svg(interactions, min_score=min_score, **kwargs).encode('utf-8'), '.svg', cache_dir=cache_dir, key=key)
+
+    return path
+
+
+def store_image(content, suffix, cache_dir=None, key=None):
+    """ Write image data to the cache, named by the content hash (or given key).
+
+    :param content: The image data.
+    :type  content: bytes
+
+    :param suffix: File extension including the dot, e.g. '.png'.
+    :type  suffix: str
+
+    :return: Path to the image file.
+    :rtype: str
+
+    """
+
+    if key is None:
+        key = hashlib.sha1(content).hexdigest()
+
+    path = _cache_path(cache_dir, key, suffix)
+    if os.path.isfile(path):
+        return path
+
+    # Write atomically, concurrent workers may render the same network.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=suffix)
+    with os.fdopen(fd, 'wb') as fp:
+        fp.write(content)
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def _cache_path(cache_dir, key, suffix):
+    """ Return the cache file path for the given key, create the cache directory if needed. """
+
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    return os.path.join(cache_dir, key + suffix)
+
+
+def _canonical_edges(interactions, min_score=None):
+    """ Return sorted, deduplicated (a, b, score, strongest_channel) tuples with a < b. """
+
+    channels = [c for c in CHANNEL_COLOURS.keys() if c in interactions.columns]
+
+    edges = {}
+    for row in interactions.itertuples(index=False):
+        row = row._asdict()
+        a, b = str(row['stringId_A']), str(row['stringId_B'])
+        if a == b:
+            continue
+
+        score = float(row['score']) if 'score' in row and row['score'] == row['score'] else 0.0
+        if min_score is not None and score < min_score:
+            continue
+
+        channel_scores = [(float(row[c]), c) for c in channels if row[c] == row[c]]
+        channel = max(channel_scores)[1] if channel_scores and max(channel_scores)[0] > 0 else None
+
+        edges[tuple(sorted((a, b)))] = (score, channel)
+
+    return [(a, b, score, channel) for (a, b), (score, channel) in sorted(edges.items())]
+
+
+def _label(node):
+    """ Strip the taxon prefix from a string-db identifier. """
+
+    return node.split('.', 1)[-1]
@@ -0,0 +1,325 @@
+""" :module network_store: Local store for string-db.org interaction networks as a (memory-mapped) CSR adjacency structure. """
+
+from GenDBScraper.Utilities.lazy_import import lazy_import
+
+import json
+import logging
+import os
+
+numpy = lazy_import('numpy')
+pandas = lazy_import('pandas')
+
+# Score channels as returned by StringDBScraper.network_interactions().
+CHANNELS = ('score', 'nscore', 'fscore', 'pscore', 'ascore', 'escore', 'dscore', 'tscore')
+
+# Partners requested per feature by from_scraper(). Without a limit, string-db.org returns only about 10 partners per protein.
+DEFAULT_PARTNER_LIMIT = 10000
+
+
+class NetworkStore():
+    """ Genome wide interaction network with integer indexed nodes and per channel score arrays.
+
+    Interactions are accumulated with add_interactions() (or fetched in bulk with from_scraper()), then compiled into compressed sparse row (CSR) arrays with build(). Stores written with save() can be reopened memory-mapped with load().
+
+    :example: store = NetworkStore.from_scraper(StringDBScraper(), features=['pflu_0001', 'pflu_0002'], taxonId='216595')
+    :example: store.neighbours('216595.PFLU_0001', min_score=0.7)
+
+    """
+
+    def __init__(self, taxonId=None):
+        """
+        NetworkStore constructor.
+
+        :param taxonId: The NCBI taxon id of the network.
+        :type  taxonId: (str | int)
+
+        """
+
+        self.__taxonId = None if taxonId is None else str(taxonId)
+        self.__nodes = []
+        self.__node_index = {}
+
+        # Accumulated edges, keyed by (min(a,b), max(a,b)) node indices.
+        self.__pending = {}
+
+        # CSR arrays.
+        self.__indptr = numpy.zeros(1, dtype=numpy.int64)
+        self.__indices = numpy.zeros(0, dtype=numpy.int32)
+        self.__scores = {channel: numpy.zeros(0, dtype=numpy.float32) for channel in CHANNELS}
+
+    @property
+    def taxonId(self):
+        """ The NCBI taxon id of the network. """
+        return self.__taxonId
+
+    @property
+    def nodes(self):
+        """ List of string-db identifiers, position is the node index. """
+        return self.__nodes
+
+    @property
+    def number_of_edges(self):
+        """ Number of (undirected) interactions in the built store. """
+        return len(self.__indices) // 2
+
+    @classmethod
+    def from_scraper(cls, scraper, features, taxonId=None, batch_size=100, required_score=None, limit=DEFAULT_PARTNER_LIMIT):
+        """ Fetch the interaction partners of all features from string-db.org and build the store.
+
+        Partners are fetched rather than the network among the batch (string-db's network endpoint only returns edges among the requested nodes), so interactions between features of different batches are kept. Edges reported from both ends are stored once.
+
+        :param scraper: The scraper to use for the requests. Its query is restored afterwards.
+        :type  scraper: StringDBScraper
+
+        :param features: The genes or string-db identifiers to fetch.
+        :type  features: list
+
+        :param taxonId: The NCBI taxon id. Default: The scraper's query taxonId.
+        :type  taxonId: (str | int)
+
+        :param batch_size: Number of features per request.
+        :type  batch_size: int
+
+        :param required_score: Minimum combined score (0 - 1000, see StringDBScraper.interaction_partners()).
+        :type  required_score: int
+
+        :param limit: Maximum number of partners per feature (see StringDBScraper.interaction_partners()). string-db.org caps the partners of hub genes at its own default of about 10 if no limit is sent, so a limit is required.
+        :type  limit: int
+
+        """
+
+        if limit is None:
+            raise ValueError("limit is required, string-db.org returns only about 10 partners per feature without it.")
+
+        # Local import to avoid circular dependency.
+        from GenDBScraper.StringDBScraper import stringdb_query
+
+        query = scraper.query
+        if taxonId is None:
+            taxonId = query.taxonId
+
+        store = cls(taxonId=taxonId)
+        features = list(features)
+
+        try:
+            for start in range(0, len(features), batch_size):
+                scraper.query = stringdb_query(taxonId=taxonId, features=features[start:start+batch_size])
+                store.add_interactions(scraper.interaction_partners(required_score=required_score, limit=limit))
+                logging.info("Fetched interactions for %d of %d features.", min(start+batch_size, len(features)), len(features))
+        finally:
+            scraper.query = query
+
+        return store.build()
+
+    def add_interactions(self, interactions):
+        """ Add interactions to the store. Call build() to make them available for queries. A/B and B/A rows of the same pair are stored as one edge, the last one's scores win.
+
+        :param interactions: Interactions table with columns 'stringId_A', 'stringId_B' and score channels, as returned from StringDBScraper.network_interactions() or interaction_partners().
+        :type  interactions: pandas.DataFrame
+
+        """
+
+        if interactions.empty:
+            return
+
+        if self.__taxonId is None and 'ncbiTaxonId' in interactions.columns:
+            self.__taxonId = str(interactions['ncbiTaxonId'].iloc[0])
+
+        a = [self._node_id(name) for name in interactions['stringId_A'].astype(str)]
+        b = [self._node_id(name) for name in interactions['stringId_B'].astype(str)]
+
+        scores = numpy.column_stack([
+            pandas.to_numeric(interactions[channel], errors='coerce').to_numpy(dtype=numpy.float32, na_value=numpy.nan) if channel in interactions.columns else numpy.full(len(a), numpy.nan, dtype=numpy.float32)
+            for channel in CHANNELS
+            ])
+
+        for i, j, row in zip(a, b, scores):
+            if i == j:
+                continue
+            self.__pending[(min(i, j), max(i, j))] = row
+
+    def build(self):
+        """ Compile all accumulated and stored interactions into CSR arrays.
+
+        :return: The store itself.
+        :rtype: NetworkStore
+
+        """
+
+        # Merge already built edges with pending ones, pending take precedence.
+        edges = dict(self._edges())
+        edges.update(self.__pending)
+        self.__pending = {}
+
+        number_of_nodes = len(self.__nodes)
+        if edges:
+            pairs = numpy.array(list(edges.keys()), dtype=numpy.int32)
+            scores = numpy.array(list(edges.values()), dtype=numpy.float32)
+        else:
+            pairs = numpy.zeros((0, 2), dtype=numpy.int32)
+            scores = numpy.zeros((0, len(CHANNELS)), dtype=numpy.float32)
+
+        # Store both directions, sort by source then target.
+        sources = numpy.concatenate([pairs[:, 0], pairs[:, 1]])
+        targets = numpy.concatenate([pairs[:, 1], pairs[:, 0]])
+        scores = numpy.concatenate([scores, scores])
+        order = numpy.lexsort((targets, sources))
+
+        self.__indices = targets[order]
+        self.__indptr = numpy.zeros(number_of_nodes + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(sources, minlength=number_of_nodes), out=self.__indptr[1:])
+        self.__scores = {channel: numpy.ascontiguousarray(scores[order, c]) for c, channel in enumerate(CHANNELS)}
+
+        return self
+
+    def neighbours(self, node, min_score=None):
+        """ Get all interactions of the given node.
+
+        :param node: The string-db identifier of the node.
+        :type  node: str
+
+        :param min_score: Only return interactions with combined score >= min_score.
+        :type  min_score: float
+
+        :return: Interactions in the layout of StringDBScraper.network_interactions(), best scores first.
+        :rtype: pandas.DataFrame
+
+        """
+
+        if node not in self.__node_index:
+            return self._frame(numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64))
+
+        i = self.__node_index[node]
+        positions = numpy.arange(self.__indptr[i], self.__indptr[i+1])
+        if min_score is not None:
+            positions = positions[self.__scores['score'][positions] >= min_score]
+
+        positions = positions[numpy.argsort(-self.__scores['score'][positions], kind='stable')]
+
+        return self._frame(numpy.full(len(positions), i), positions)
+
+    def subnetwork(self, nodes, min_score=None):
+        """ Get all interactions among the given nodes.
+
+        :param nodes: The string-db identifiers of the nodes.
+        :type  nodes: list
+
+        :param min_score: Only return interactions with combined score >= min_score.
+        :type  min_score: float
+
+        :return: Interactions (each once) in the layout of StringDBScraper.network_interactions().
+        :rtype: pandas.DataFrame
+
+        """
+
+        members = numpy.array(sorted({self.__node_index[n] for n in nodes if n in self.__node_index}), dtype=numpy.int64)
+
+        sources = []
+        positions = []
+        for i in members:
+            candidates = numpy.arange(self.__indptr[i], self.__indptr[i+1])
+            targets = numpy.asarray(self.__indices[candidates])
+            # Keep each undirected edge once (source < target).
+            keep = (targets > i) & numpy.isin(targets, members)
+            sources.append(numpy.full(keep.sum(), i))
+            positions.append(candidates[keep])
+
+        sources = numpy.concatenate(sources) if sources else numpy.zeros(0, dtype=numpy.int64)
+        positions = numpy.concatenate(positions) if positions else numpy.zeros(0, dtype=numpy.int64)
+
+        if min_score is not None:
+            keep = self.__scores['score'][positions] >= min_score
+            sources, positions = sources[keep], positions[keep]
+
+        return self._frame(sources, positions)
+
+    def degree(self, node):
+        """ Number of interaction partners of the given node. """
+
+        if node not in self.__node_index:
+            return 0
+
+        i = self.__node_index[node]
+        return int(self.__indptr[i+1] - self.__indptr[i])
+
+    def save(self, path):
+        """ Write the built store to a directory.
+
+        :param path: The directory to write to (created if not existing).
+        :type  path: str
+
+        """
+
+        if self.__pending:
+            self.build()
+
+        os.makedirs(path, exist_ok=True)
+
+        with open(os.path.join(path, 'nodes.json'), 'w') as fp:
+            json.dump({'taxonId': self.__taxonId, 'nodes': self.__nodes, 'channels': list(CHANNELS)}, fp)
+
+        numpy.save(os.path.join(path, 'indptr.npy'), self.__indptr)
+        numpy.save(os.path.join(path, 'indices.npy'), self.__indices)
+        for channel, scores in self.__scores.items():
+            numpy.save(os.path.join(path, '{}.npy'.format(channel)), scores)
+
+        return path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """ Open a store written with save().
+
+        :param path: The store directory.
+        :type  path: str
+
+        :param mmap: Whether to memory-map the arrays (default) or read them into memory.
+        :type  mmap: bool
+
+        """
+
+        with open(os.path.join(path, 'nodes.json'), 'r') as fp:
+            meta = json.load(fp)
+
+        mmap_mode = 'r' if mmap else None
+
+        store = cls(taxonId=meta['taxonId'])
+        store.__nodes = meta['nodes']
+        store.__node_index = {name: i for i, name in enumerate(store.__nodes)}
+        store.__indptr = numpy.load(os.path.join(path, 'indptr.npy'), mmap_mode=mmap_mode)
+        store.__indices = numpy.load(os.path.join(path, 'indices.npy'), mmap_mode=mmap_mode)
+        store.__scores = {channel: numpy.load(os.path.join(path, '{}.npy'.format(channel)), mmap_mode=mmap_mode) for channel in meta['channels']}
+
+        return store
+
+    def _node_id(self, name):
+        """ Return the index of the named node, register it if new. """
+
+        if name not in self.__node_index:
+            self.__node_index[name] = len(self.__nodes)
+            self.__nodes.append(name)
+
+        return self.__node_index[name]
+
+    def _edges(self):
+        """ Return built edges as ((a, b), scores) pairs with a < b. """
+
+        sources = numpy.repeat(numpy.arange(len(self.__indptr) - 1), numpy.diff(self.__indptr))
+        targets = numpy.asarray(self.__indices)
+        keep = sources < targets
+        scores = numpy.column_stack([numpy.asarray(self.__scores[channel])[keep] for channel in CHANNELS])
+
+        return zip(zip(sources[keep].tolist(), targets[keep].tolist()), scores)
+
+    def _frame(self, sources, positions):
+        """ Assemble an interactions table from source node indices and CSR positions. """
+
+        nodes = numpy.array(self.__nodes, dtype=object)
+        df = pandas.DataFrame({'stringId_A': nodes[numpy.asarray(sources, dtype=numpy.int64)],
+                               'stringId_B': nodes[numpy.asarray(self.__indices[positions], dtype=numpy.int64)],
+                               'ncbiTaxonId': self.__taxonId,
+                               })
+
+        for channel in CHANNELS:
+            df[channel] = numpy.asarray(self.__scores[channel][positions])
+
+        return df
@@ -0,0 +1,111 @@
+""" :module orthoxml_utilities: Streaming parser for OrthoXML documents (e.g. from pseudoluge.pseudomonas.com). """
+
+from GenDBScraper.Utilities.lazy_import import lazy_import
+from GenDBScraper.Utilities.schema_utilities import compact_frame
+
+# 3rd party imports, loaded on first use.
+etree = lazy_import('lxml.etree')
+pandas = lazy_import('pandas')
+
+# Group elements in the OrthoXML schema.
+_GROUP_TAGS = ('orthologGroup', 'paralogGroup')
+
+
+def read_orthoxml(source):
+    """ Parse an OrthoXML document into compact tables without building the document tree.
+
+    :param source: The OrthoXML document to parse.
+    :type  source: (str | file-like object), a file path or binary stream.
+
+    :return: Dictionary with the tables 'Species' (one row per species database), 'Genes' (one row per gene) and 'Groups' (one row per gene membership in a top level ortholog group, with the group's scores as columns).
+    :rtype: dict of pandas.DataFrame
+
+    """
+
+    species_rows = []
+    gene_rows = []
+    group_rows = []
+
+    species = None
+    # Stack of open (group_type, group_id) tuples.
+    groups = []
+    # Membership rows and scores of the currently open top level group.
+    members = []
+    scores = {}
+    in_gene_ref = False
+    group_count = 0
+
+    for event, element in etree.iterparse(source, events=('start', 'end'), remove_comments=True):
+        tag = etree.QName(element).localname
+
+        if event == 'start':
+            if tag == 'species':
+                species = element.get('name')
+                species_rows.append(dict(species=species, NCBITaxId=element.get('NCBITaxId'), database=None, database_version=None))
+            elif tag == 'database':
+                species_rows[-1]['database'] = element.get('name')
+                species_rows[-1]['database_version'] = element.get('version')
+            elif tag in _GROUP_TAGS:
+                group_id = element.get('id')
+                if not groups:
+                    group_count += 1
+                    if group_id is None:
+                        group_id = str(group_count)
+                groups.append((tag, group_id))
+            elif tag == 'geneRef':
+                in_gene_ref = True
+            continue
+
+        # End events: collect data and free the element.
+        if tag == 'gene':
+            gene_rows.append(dict(gene=element.get('id'),
+                                  species=species,
+                                  protId=element.get('protId'),
+                                  geneId=element.get('geneId'),
+                                  transcriptId=element.get('transcriptId'),
+                                  ))
+        elif tag == 'geneRef':
+            in_gene_ref = False
+            members.append(dict(group=groups[0][1], group_type=groups[-1][0], depth=len(groups), gene=element.get('id')))
+        elif tag == 'score' and groups and not in_gene_ref and len(groups) == 1:
+            scores[element.get('id')] = element.get('value')
+        elif tag in _GROUP_TAGS:
+            groups.pop()
+            if not groups:
+                for member in members:
+                    member.update(scores)
+                group_rows.extend(members)
+                members = []
+                scores = {}
+        elif tag == 'species':
+            species = None
+        else:
+            continue
+
+        # Free memory held by processed elements.
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+    group_columns = _group_columns(group_rows)
+
+    return {
+            'Species': compact_frame(pandas.DataFrame(species_rows, columns=['species', 'NCBITaxId', 'database', 'database_version']),
+                                     dict(species='category', NCBITaxId='id', database='category', database_version='category')),
+            'Genes': compact_frame(pandas.DataFrame(gene_rows, columns=['gene', 'species', 'protId', 'geneId', 'transcriptId']),
+                                   dict(gene='id', species='category')),
+            'Groups': compact_frame(pandas.DataFrame(group_rows, columns=group_columns),
+                                    dict(group='id', group_type='category', depth='id', gene='id', **{score: 'float' for score in group_columns[4:]})),
+            }
+
+
+def _group_columns(group_rows):
+    """ Return the columns of the groups table: membership columns followed by all score ids in order of appearance. """
+
+    columns = ['group', 'group_type', 'depth', 'gene']
+    for row in group_rows:
+        for key in row.keys():
+            if key not in columns:
+                columns.append(key)
+
+    return columns
@@ -0,0 +1,484 @@
+""" :module page_server: Http server rendering feature pages on first request instead of pre-generating all of them, with an LRU and time-to-live page cache.
+
+Serves /<strain>_<locus_tag>.html (pages as written by static_renderer.write_feature()), the tab shards under /<strain>_<locus_tag>/ and the shared grid bundle.
+With a search_index.SearchIndex, /search?q=<query>&limit=<n> returns the matching features as json.
+
+"""
+
+from GenDBScraper.Utilities import static_renderer, static_serving
+
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+import gzip
+import logging
+import queue
+import re
+import threading
+import time
+
+# Default cache size (pages) and time to live (seconds).
+DEFAULT_MAX_PAGES = 512
+DEFAULT_TTL = 24 * 3600
+
+# Default seconds a failed rendering is answered from the cache before the page is rendered again.
+DEFAULT_FAILURE_TTL = 60
+
+# Default and maximum number of /search results.
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 200
+
+# Strain and locus tag in a page name, strains do not contain '_'.
+_PAGE_PATTERN = re.compile(r'^/([A-Za-z0-9.\-]+)_([A-Za-z0-9.\-_]+)\.html$')
+_SHARD_PATTERN = re.compile(r'^/([A-Za-z0-9.\-]+)_([A-Za-z0-9.\-_]+)/([0-9\-]+\.json\.gz)$')
+
+RenderedPage = namedtuple('RenderedPage', ('page', 'shards', 'created'))
+
+
+class PageCache():
+    """ Thread safe mapping evicting the least recently used entry beyond maxsize and entries older than ttl seconds. """
+
+    def __init__(self, maxsize=DEFAULT_MAX_PAGES, ttl=DEFAULT_TTL, clock=time.monotonic):
+        """
+        PageCache constructor.
+
+        :param maxsize: Maximum number of entries.
+        :type  maxsize: int
+
+        :param ttl: Seconds after which an entry expires, None for never.
+        :type  ttl: float
+
+        :param clock: Returns the current time in seconds.
+        :type  clock: callable
+
+        """
+
+        self.__maxsize = maxsize
+        self.__ttl = ttl
+        self.__clock = clock
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+        self.__hits = 0
+        self.__misses = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key):
+        """ Return the entry for key, None if missing or expired. """
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and self.__expired(entry[0]):
+                del self.__entries[key]
+                entry = None
+
+            if entry is None:
+                self.__misses += 1
+                return None
+
+            self.__hits += 1
+            self.__entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        """ Store value under key, evict the least recently used entries beyond maxsize. """
+
+        with self.__lock:
+            self.__entries[key] = (self.__clock(), value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__maxsize:
+                self.__entries.popitem(last=False)
+
+    def age(self, key):
+        """ Return the age of the entry for key in seconds, None if missing. """
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            return None if entry is None else self.__clock() - entry[0]
+
+    def stats(self):
+        """ Return entry count, hits and misses. """
+
+        return dict(pages=len(self.__entries), hits=self.__hits, misses=self.__misses)
+
+    def __expired(self, created):
+        return self.__ttl is not None and self.__clock() - created > self.__ttl
+
+
+# Idle workers of render_data(), a ScraperWorker runs one job at a time.
+_idle_workers = queue.LifoQueue()
+
+def render_data(strain, locus_tag):
+    """ Default renderer: the data page of one feature from pseudomonas.com and string-db.org. Each rendering takes an idle ScraperWorker or creates one, so pages of different features render in parallel. """
+
+    from GenDBScraper.Utilities.worker import ScraperWorker
+
+    try:
+        worker = _idle_workers.get_nowait()
+    except queue.Empty:
+        worker = ScraperWorker()
+
+    try:
+        return static_renderer.feature_data(strain, locus_tag, worker.run_pdc(strain, locus_tag), worker.run_stdb(locus_tag))
+    finally:
+        _idle_workers.put(worker)
+
+
+class PageService():
+    """ Renders feature pages on demand and caches them. Concurrent requests for a page not in the cache wait for one rendering, failed renderings are cached for a short time.
+
+    :example: service = PageService(max_pages=1000, ttl=3600); html = service.get('sbw25', 'pflu0916').page
+
+    """
+
+    def __init__(self, render=render_data, max_pages=DEFAULT_MAX_PAGES, ttl=DEFAULT_TTL, failure_ttl=DEFAULT_FAILURE_TTL, clock=time.monotonic):
+        """
+        PageService constructor.
+
+        :param render: Returns the data page (see static_renderer.feature_data()) for (strain, locus_tag).
+        :type  render: callable
+
+        :param max_pages: Maximum number of cached pages.
+        :type  max_pages: int
+
+        :param ttl: Seconds after which a page is rendered again, None for never.
+        :type  ttl: float
+
+        :param failure_ttl: Seconds the exception of a failed rendering is raised again without rendering, 0 to not cache failures.
+        :type  failure_ttl: float
+
+        """
+
+        self.__render = render
+        self.__cache = PageCache(max_pages, ttl, clock)
+        self.__failures = PageCache(max_pages, failure_ttl, clock) if failure_ttl else None
+        self.__ttl = ttl
+
+        # Futures of pages being rendered by key.
+        self.__pending = {}
+        self.__lock = threading.Lock()
+
+        self.__renders = 0
+        self.__failed = 0
+
+    @property
+    def ttl(self):
+        """ Seconds after which a page is rendered again. """
+        return self.__ttl
+
+    def get(self, strain, locus_tag):
+        """ Return the RenderedPage of a feature, render it if not cached. Exceptions of the renderer are raised to all waiting callers and to later callers within failure_ttl. """
+
+        key = (strain, locus_tag)
+
+        page = self.__cache.get(key)
+        if page is not None:
+            return page
+
+        error = None if self.__failures is None else self.__failures.get(key)
+        if error is not None:
+            raise error
+
+        with self.__lock:
+            future = self.__pending.get(key)
+            owner = future is None
+            if owner:
+                # Rendered by another thread since the lookup above.
+                page = self.__cache.get(key)
+                if page is not None:
+                    return page
+                future = Future()
+                self.__pending[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            page = self.__render_page(strain, locus_tag)
+        except Exception as e:
+            self.__failed += 1
+            if self.__failures is not None:
+                self.__failures.put(key, e)
+            future.set_exception(e)
+            raise
+        else:
+            self.__cache.put(key, page)
+            future.set_result(page)
+        finally:
+            with self.__lock:
+                del self.__pending[key]
+
+        return page
+
+    def age(self, strain, locus_tag):
+        """ Return the age of the cached page in seconds, None if not cached. """
+
+        return self.__cache.age((strain, locus_tag))
+
+    def prewarm(self, features, jobs=4):
+        """ Render the pages of (strain, locus_tag) pairs in the background, failures are logged.
+
+        :return: The executor running the renderings, shut down once all are done.
+        :rtype: concurrent.futures.ThreadPoolExecutor
+
+        """
+
+        def warm(feature):
+            try:
+                self.get(*feature)
+            except Exception as e:
+                logging.warning("Could not prewarm %s_%s: %s", feature[0], feature[1], e)
+
+        executor = ThreadPoolExecutor(max_workers=jobs)
+        for feature in features:
+            executor.submit(warm, feature)
+        executor.shutdown(wait=False)
+
+        return executor
+
+    def stats(self):
+        """ Return cache statistics and render counts. """
+
+        stats = self.__cache.stats()
+        stats.update(renders=self.__renders, failed=self.__failed, pending=len(self.__pending))
+
+        return stats
+
+    def __render_page(self, strain, locus_tag):
+        self.__renders += 1
+        start = time.perf_counter()
+
+        page, manifest, shards = static_renderer.render_feature(self.__render(strain, locus_tag))
+        logging.info("Rendered %s_%s in %.1f s.", strain, locus_tag, time.perf_counter() - start)
+
+        return RenderedPage(page.encode('utf-8'), shards, time.time())
+
+
+class PageServer():
+    """ Serves the pages of a PageService over http.
+
+    :example: server = PageServer(PageService(), port=8080).start()
+
+    """
+
+    def __init__(self, service, host='127.0.0.1', port=0, index=None):
+        """
+        PageServer constructor.
+
+        :param service: Renders and caches the pages.
+        :type  service: PageService
+
+        :param host: The interface to bind to.
+        :type  host: str
+
+        :param port: The port to listen on. Default: 0, pick a free port.
+        :type  port: int
+
+        :param index: Answers /search queries, None to not serve /search.
+        :type  index: search_index.SearchIndex
+
+        """
+
+        self.__service = service
+        self.__httpd = ThreadingHTTPServer((host, port), _make_handler(service, index))
+        self.__thread = None
+
+    @property
+    def url(self):
+        """ The base url of the server. """
+        host, port = self.__httpd.server_address[:2]
+        return "http://{0:s}:{1:d}".format(host, port)
+
+    def start(self):
+        """ Serve in a background thread. """
+
+        self.__thread = threading.Thread(target=self.__httpd.serve_forever, daemon=True)
+        self.__thread.start()
+        logging.info("Serving feature pages on %s .", self.url)
+
+        return self
+
+    def serve_forever(self):
+        """ Serve in the calling thread. """
+
+        logging.info("Serving feature pages on %s .", self.url)
+        self.__httpd.serve_forever()
+
+    def stop(self):
+        """ Shut down the server. """
+
+        self.__httpd.shutdown()
+        self.__httpd.server_close()
+
+
+def _make_handler(service, index=None):
+    """ Create a request handler class serving the pages of the passed service and searching the passed index. """
+
+    bundle = static_renderer.GRID_BUNDLE.encode('utf-8')
+
+    class PageHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            self._serve(True)
+
+        def do_HEAD(self):
+            self._serve(False)
+
+        def _serve(self, body):
+            url = urlsplit(self.path)
+            path = unquote(url.path)
+
+            if path == '/' + static_renderer.BUNDLE_NAME:
+                self._send(200, 'application/javascript', bundle, body, max_age=service.ttl)
+                return
+
+            if path == '/stats':
+                self._send(200, 'application/json', static_renderer.render_json(service.stats()).encode('utf-8'), body, max_age=0)
+                return
+
+            if path == '/search' and index is not None:
+                query = parse_qs(url.query)
+                try:
+                    limit = int(query.get('limit', [DEFAULT_SEARCH_LIMIT])[0])
+                except ValueError:
+                    self.send_error(400, "limit must be an integer.")
+                    return
+                q = query.get('q', [''])[0]
+                results = dict(query=q, results=index.search(q, limit=max(0, min(limit, MAX_SEARCH_LIMIT))))
+                self._send(200, 'application/json', static_renderer.render_json(results).encode('utf-8'), body, max_age=0)
+                return
+
+            match = _PAGE_PATTERN.match(path) or _SHARD_PATTERN.match(path)
+            if match is None:
+                self.send_error(404, "Expected /<strain>_<locus_tag>.html .")
+                return
+
+            strain, locus_tag = match.group(1), match.group(2)
+            try:
+                page = service.get(strain, locus_tag)
+            except Exception as e:
+                logging.error("Could not render %s_%s: %s", strain, locus_tag, e)
+                self.send_error(502, "Could not render {0:s}_{1:s}.".format(strain, locus_tag))
+                return
+
+            age = service.age(strain, locus_tag) or 0
+            max_age = None if service.ttl is None else max(0, int(service.ttl - age))
+
+            if match.re is _PAGE_PATTERN:
+                self._send(200, 'text/html; charset=utf-8', page.page, body, max_age=max_age)
+                return
+
+            shard = page.shards.get(match.group(3))
+            if shard is None:
+                self.send_error(404, "No shard {0:s} for {1:s}_{2:s}.".format(match.group(3), strain, locus_tag))
+                return
+
+            if 'gzip' in static_serving.accepted_encodings(self.headers.get('Accept-Encoding')):
+                self._send(200, 'application/json', shard, body, max_age=max_age, encoding='gzip')
+            else:
+                self._send(200, 'application/json', gzip.decompress(shard), body, max_age=max_age)
+
+        def _send(self, status, content_type, content, body, max_age=None, encoding=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(content)))
+            if encoding is not None:
+                self.send_header('Content-Encoding', encoding)
+            if max_age is not None:
+                self.send_header('Cache-Control', 'max-age={0:d}'.format(max_age))
+            self.end_headers()
+            if body:
+                self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            logging.debug(format, *args)
+
+    return PageHandler
+
+
+def read_features(path):
+    """ Read (strain, locus_tag) pairs from a file, one '<strain> <locus_tag>' or '<strain>_<locus_tag>' per line. Empty lines and lines starting with '#' are skipped. """
+
+    features = []
+    with open(path) as fp:
+        for line in fp:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split(None, 1)
+            if len(parts) == 1:
+                parts = line.split('_', 1)
+            features.append((parts[0], parts[1].strip()))
+
+    return features
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Serve feature pages, rendered on first request and cached.")
+
+    parser.add_argument("-H",
+                        "--host",
+                        dest="host",
+                        default='127.0.0.1',
+                        help="The interface to bind to.")
+
+    parser.add_argument("-p",
+                        "--port",
+                        dest="port",
+                        type=int,
+                        default=8080,
+                        help="The port to listen on.")
+
+    parser.add_argument("--max-pages",
+                        dest="max_pages",
+                        type=int,
+                        default=DEFAULT_MAX_PAGES,
+                        help="Maximum number of cached pages.")
+
+    parser.add_argument("--ttl",
+                        dest="ttl",
+                        type=float,
+                        default=DEFAULT_TTL,
+                        help="Seconds after which a page is rendered again.")
+
+    parser.add_argument("--failure-ttl",
+                        dest="failure_ttl",
+                        type=float,
+                        default=DEFAULT_FAILURE_TTL,
+                        help="Seconds a failed rendering is answered with an error before the page is rendered again.")
+
+    parser.add_argument("--prewarm",
+                        dest="prewarm",
+                        default=None,
+                        help="File listing features to render at startup, one '<strain> <locus_tag>' per line.")
+
+    parser.add_argument("-j",
+                        "--jobs",
+                        dest="jobs",
+                        type=int,
+                        default=4,
+                        help="Number of features prewarmed in parallel.")
+
+    parser.add_argument("--index",
+                        dest="index",
+                        default=None,
+                        help="Search index (see search_index.SearchIndex.save()) to serve under /search.")
+
+    args = parser.parse_args()
+
+    service = PageService(max_pages=args.max_pages, ttl=args.ttl, failure_ttl=args.failure_ttl)
+    if args.prewarm is not None:
+        service.prewarm(read_features(args.prewarm), jobs=args.jobs)
+
+    index = None
+    if args.index is not None:
+        from GenDBScraper.Utilities.search_index import SearchIndex
+        index = SearchIndex.load(args.index)
+
+    PageServer(service, host=args.host, port=args.port, index=index).serve_forever()
@@ -0,0 +1,237 @@
+""" :module page_store: Output layouts for generated feature pages and a packed, memory-mapped page archive.
+
+Layouts:
+    'flat': <outdir>/<strain>_<locus_tag>.html
+    'sharded': <outdir>/<strain>/<locus_tag without its last digits>/<strain>_<locus_tag>.html , e.g. sbw25/pflu09/sbw25_pflu0916.html
+
+Archive format: magic, file contents back to back, json index {name: [offset, length, crc32]}, trailer (magic, index offset, index length).
+
+"""
+
+import json
+import mmap
+import os
+import struct
+import zlib
+
+LAYOUTS = ('flat', 'sharded')
+
+# Trailing characters of the locus tag dropped for the shard directory, 2 gives at most 100 pages per directory.
+DEFAULT_BUCKET_DIGITS = 2
+
+ARCHIVE_MAGIC = b'GDBPACK1'
+_TRAILER = struct.Struct('<8sQQ')
+
+
+def page_dir(outdir, strain, locus_tag, layout='flat', bucket_digits=DEFAULT_BUCKET_DIGITS):
+    """ Return the directory the page of a feature goes to.
+
+    :param layout: One of LAYOUTS.
+    :type  layout: str
+
+    :param bucket_digits: For the 'sharded' layout, number of trailing locus tag characters not part of the shard directory name.
+    :type  bucket_digits: int
+
+    """
+
+    if layout == 'flat':
+        return outdir
+
+    if layout == 'sharded':
+        bucket = locus_tag[:-bucket_digits] if len(locus_tag) > bucket_digits else locus_tag
+        return os.path.join(outdir, strain, bucket)
+
+    raise ValueError("Unknown layout '{0:s}', expected one of {1:s}.".format(str(layout), ", ".join(LAYOUTS)))
+
+
+def page_path(outdir, strain, locus_tag, layout='flat', suffix='.html', bucket_digits=DEFAULT_BUCKET_DIGITS):
+    """ Return the path of the page of a feature. """
+
+    return os.path.join(page_dir(outdir, strain, locus_tag, layout, bucket_digits), "{0:s}_{1:s}{2:s}".format(strain, locus_tag, suffix))
+
+
+def relative_url(outdir, path, strain, locus_tag, layout='flat', bucket_digits=DEFAULT_BUCKET_DIGITS):
+    """ Return the url of outdir/path relative to the page of a feature (e.g. the shared grid bundle). """
+
+    directory = page_dir(outdir, strain, locus_tag, layout, bucket_digits)
+
+    return os.path.relpath(os.path.join(outdir, path), directory).replace(os.sep, '/')
+
+
+class ArchiveWriter():
+    """ Writes files into a page archive. The archive appears at path only once closed.
+
+    :example: with ArchiveWriter('/var/www/sbw25.pack') as archive: archive.add('sbw25_pflu0916.html', page)
+
+    """
+
+    def __init__(self, path):
+        """
+        ArchiveWriter constructor.
+
+        :param path: The archive to write.
+        :type  path: str
+
+        """
+
+        self.__path = path
+        self.__tmp = path + '.tmp'
+        self.__fp = open(self.__tmp, 'wb')
+        self.__fp.write(ARCHIVE_MAGIC)
+        self.__index = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.__fp.close()
+            os.remove(self.__tmp)
+
+    def add(self, name, data):
+        """ Add a file.
+
+        :param name: The name ('/' separated path) of the file in the archive.
+        :type  name: str
+
+        :param data: The file content.
+        :type  data: bytes
+
+        """
+
+        if name in self.__index:
+            raise ValueError("Duplicate archive entry {0:s}.".format(name))
+
+        self.__index[name] = [self.__fp.tell(), len(data), zlib.crc32(data)]
+        self.__fp.write(data)
+
+    def close(self):
+        """ Write the index and move the archive into place. """
+
+        index = json.dumps(self.__index, separators=(',', ':')).encode('utf-8')
+        offset = self.__fp.tell()
+        self.__fp.write(index)
+        self.__fp.write(_TRAILER.pack(ARCHIVE_MAGIC, offset, len(index)))
+        self.__fp.close()
+
+        os.replace(self.__tmp, self.__path)
+
+
+def pack_directory(directory, path):
+    """ Pack all files below directory into an archive at path, names are paths relative to directory.
+
+    :return: The number of packed files.
+    :rtype: int
+
+    """
+
+    # The archive may be written into the packed directory.
+    skipped = (os.path.abspath(path), os.path.abspath(path) + '.tmp')
+
+    count = 0
+    with ArchiveWriter(path) as archive:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                filename = os.path.join(root, name)
+                if os.path.abspath(filename) in skipped:
+                    continue
+                with open(filename, 'rb') as fp:
+                    archive.add(os.path.relpath(filename, directory).replace(os.sep, '/'), fp.read())
+                count += 1
+
+    return count
+
+
+class PageArchive():
+    """ Read access to a page archive through a memory map, file contents are returned without copying.
+
+    :example: archive = PageArchive('/var/www/sbw25.pack'); html = bytes(archive['sbw25_pflu0916.html'])
+
+    """
+
+    def __init__(self, path):
+        """
+        PageArchive constructor.
+
+        :param path: The archive to open.
+        :type  path: str
+
+        """
+
+        self.__path = path
+        self.__view = None
+        with open(path, 'rb') as fp:
+            self.__mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.__mmap) < len(ARCHIVE_MAGIC) + _TRAILER.size or self.__mmap[:len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError("{0:s} is not a page archive.".format(path))
+
+        magic, offset, length = _TRAILER.unpack(self.__mmap[-_TRAILER.size:])
+        if magic != ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError("{0:s} is truncated.".format(path))
+
+        self.__index = json.loads(self.__mmap[offset:offset + length].decode('utf-8'))
+        self.__view = memoryview(self.__mmap)
+
+    @property
+    def path(self):
+        """ The archive file. """
+        return self.__path
+
+    def __len__(self):
+        return len(self.__index)
+
+    def __contains__(self, name):
+        return name in self.__index
+
+    def __iter__(self):
+        return iter(self.__index)
+
+    def __getitem__(self, name):
+        """ Return the content of a file as memoryview, raise KeyError if missing. """
+
+        offset, length, crc = self.__index[name]
+
+        return self.__view[offset:offset + length]
+
+    def get(self, name, default=None):
+        """ Return the content of a file as memoryview, default if missing. """
+
+        return self[name] if name in self.__index else default
+
+    def crc32(self, name):
+        """ Return the CRC32 checksum of a file. """
+
+        return self.__index[name][2]
+
+    def verify(self):
+        """ Return the names of files whose content does not match their checksum. """
+
+        return [name for name, (offset, length, crc) in self.__index.items() if zlib.crc32(self.__view[offset:offset + length]) != crc]
+
+    def close(self):
+        """ Release the memory map. Views returned before must be released first. """
+
+        if self.__view is not None:
+            self.__view.release()
+            self.__view = None
+        self.__mmap.close()
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Pack a directory of generated pages into one archive.")
+
+    parser.add_argument("directory", help="The directory to pack.")
+    parser.add_argument("archive", help="The archive to write.")
+
+    args = parser.parse_args()
+
+    print("Packed {0:d} files into {1:s} .".format(pack_directory(args.directory, args.archive), args.archive))
@@ -0,0 +1,190 @@
+""" :module profiling: cProfile runs per process, merging of profiles across worker pools, flamegraph (folded stacks) and hot function reports. """
+
+from contextlib import contextmanager
+import cProfile
+import glob
+import io
+import itertools
+import logging
+import os
+import pstats
+import shutil
+import tempfile
+
+# Number of functions listed in the summary.
+DEFAULT_TOP = 30
+
+# Frames deeper than this are not expanded in the folded stacks.
+MAX_STACK_DEPTH = 64
+
+# Numbers the profile dumps of this process (tasks are unpickled anew per chunk, so the count cannot live on the task).
+_dumps = itertools.count(1)
+
+
+class ProfiledTask():
+    """ Picklable wrapper running a function under cProfile and dumping the profile of each call into a directory.
+
+    Use it in place of the function passed to multiprocessing.Pool.map() or concurrent.futures executors, then merge the dumps with merge_profiles(). Dump into a fresh directory per run (see dump_directory()), merge_profiles() picks up every dump in it.
+
+    :example: with dump_directory() as dumps: pool.map(ProfiledTask(process_tag, dumps), tags); stats = merge_profiles(dumps)
+
+    """
+
+    def __init__(self, func, profile_dir):
+        """
+        ProfiledTask constructor.
+
+        :param func: The function to profile (must be picklable, i.e. defined at module level).
+        :type  func: callable
+
+        :param profile_dir: Where to dump the profiles.
+        :type  profile_dir: str
+
+        """
+
+        self.func = func
+        self.profile_dir = profile_dir
+
+    def __call__(self, *args, **kwargs):
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(self.func, *args, **kwargs)
+        finally:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profile.dump_stats(os.path.join(self.profile_dir, "{0:d}_{1:d}.prof".format(os.getpid(), next(_dumps))))
+
+
+def profile_call(func, *args, **kwargs):
+    """ Call func under cProfile and return the result and the pstats.Stats of the call. """
+
+    profile = cProfile.Profile()
+    result = profile.runcall(func, *args, **kwargs)
+
+    return result, pstats.Stats(profile)
+
+
+@contextmanager
+def dump_directory(parent=None):
+    """ Create a fresh directory for the profile dumps of one run and remove it on exit, so dumps of earlier runs are never merged in.
+
+    :param parent: Where to create the directory. Default: The system's temporary directory.
+    :type  parent: str
+
+    """
+
+    if parent is not None:
+        os.makedirs(parent, exist_ok=True)
+
+    path = tempfile.mkdtemp(prefix='profiles_', dir=parent)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def merge_profiles(paths):
+    """ Merge profile dumps (list of files or all dumps in a directory) into one pstats.Stats.
+
+    :raises ValueError: No profiles found.
+
+    """
+
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(os.path.join(paths, '*.prof')))
+
+    if not paths:
+        raise ValueError("No profiles to merge.")
+
+    return pstats.Stats(*paths)
+
+
+def folded_stacks(stats):
+    """ Reconstruct call stacks from the caller/callee graph and return them in the folded format of flamegraph.pl and speedscope ('a;b;c weight', weights in microseconds).
+
+    cProfile only records caller-callee pairs, so the time of a function called from several places is split between its callers in proportion to their share of its cumulative time.
+
+    """
+
+    raw = stats.stats
+
+    # Invert the callers to callees: callees[caller][callee] = (inline time, cumulative time) of that edge.
+    callees = {}
+    for func, (cc, nc, tt, ct, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = (edge[2], edge[3])
+
+    weights = {}
+
+    def expand(func, stack, cumulative):
+        total_tt, total_ct = raw[func][2], raw[func][3]
+        ratio = cumulative / total_ct if total_ct > 0 else 0.0
+        stack = stack + (func,)
+
+        key = ";".join(_label(f) for f in stack)
+        weights[key] = weights.get(key, 0.0) + total_tt * ratio
+
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+
+        for callee, (tt, ct) in callees.get(func, {}).items():
+            # Skip recursion, it is already contained in the cumulative time of the outer call.
+            if callee in stack or callee not in raw:
+                continue
+            if ct * ratio > 1e-6:
+                expand(callee, stack, ct * ratio)
+
+    for func, (cc, nc, tt, ct, callers) in raw.items():
+        if not callers:
+            expand(func, (), ct)
+
+    return ["{0:s} {1:d}".format(key, int(round(weight * 1e6))) for key, weight in sorted(weights.items()) if weight * 1e6 >= 1]
+
+
+def summary(stats, top=DEFAULT_TOP):
+    """ Return the top functions by cumulative and by own time as text. """
+
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats('cumulative').print_stats(top)
+    stats.sort_stats('tottime').print_stats(top)
+
+    return stream.getvalue()
+
+
+def write_report(stats, outdir, top=DEFAULT_TOP):
+    """ Write the merged profile (profile.prof, for snakeviz or pstats), the folded stacks (profile.folded, for flamegraph.pl or speedscope) and the hot function summary (summary.txt).
+
+    :return: Paths to the written files.
+    :rtype: dict
+
+    """
+
+    os.makedirs(outdir, exist_ok=True)
+
+    paths = dict(profile=os.path.join(outdir, 'profile.prof'),
+                 folded=os.path.join(outdir, 'profile.folded'),
+                 summary=os.path.join(outdir, 'summary.txt'),
+                 )
+
+    stats.dump_stats(paths['profile'])
+
+    with open(paths['folded'], 'w') as fp:
+        fp.write("\n".join(folded_stacks(stats)) + "\n")
+
+    with open(paths['summary'], 'w') as fp:
+        fp.write(summary(stats, top))
+
+    logging.info("Profile written to %s .", outdir)
+
+    return paths
+
+
+def _label(func):
+    """ Format a pstats function key (file, line, name) as frame label. """
+
+    filename, line, name = func
+    if filename == '~':
+        # Builtins.
+        return name.replace(';', ',')
+
+    return "{0:s} ({1:s}:{2:d})".format(name, os.path.basename(filename), line).replace(';', ',')
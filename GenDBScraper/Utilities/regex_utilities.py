@@ -0,0 +1,79 @@
+""" :module regex_utilities: Registry of precompiled patterns and single pass text normalisation used by the parsers. """
+
+import functools
+import re
+
+# Precompiled patterns by name. Extend with register_pattern().
+PATTERNS = {
+        # Single whitespace characters.
+        'whitespace': re.compile(r'\s'),
+        # pseudomonas.com headings and labels.
+        'cross_references': re.compile(r'Cross-References'),
+        'operon_name': re.compile(r'Operon name'),
+        'evidence': re.compile(r'Evidence'),
+        'pubmed_id': re.compile(r'PubMed ID'),
+        'annotation_updates': re.compile(r'Annotation Updates'),
+        'references': re.compile(r'^References'),
+        'doi_label': re.compile(r'DOI'),
+        'doi': re.compile(r'10\.[0-9]*\/'),
+        # Numbered identifiers (prefix, number).
+        'numbered': re.compile(r'^(.*?)(\d+)$'),
+        # Locus tag to string-db.org name (pflu0916 -> pflu_0916).
+        'string_name': re.compile(r'([a-z](?=[0-9]))'),
+        # Grid columns and tab titles with linked cells (static_renderer.CELL_LINKS, nb_utilities.get_grids()).
+        'column_gi': re.compile(r"^GI$"),
+        'column_gi_strain': re.compile(r"^GI \(Strain [1,2]\)$"),
+        'column_url': re.compile(r"^[U,u]rl$"),
+        'column_pmid': re.compile(r"^PMID$"),
+        'column_go_accession': re.compile(r"^Accession$"),
+        'column_eco_code': re.compile(r"^Evidence Ontology \(ECO\) Code$"),
+        'column_interpro_accession': re.compile(r"^Interpro Accession$"),
+        'column_reference': re.compile(r"^Reference$"),
+        'column_unnamed_7': re.compile(r"^Unnamed: 7$", re.IGNORECASE),
+        'column_pubmed_id': re.compile(r"^Pubmed_id$", re.IGNORECASE),
+        'title_transposon': re.compile(r'^transposon.*$'),
+        }
+
+
+def register_pattern(name, expression, flags=0):
+    """ Compile expression and register it under name.
+
+    :return: The compiled pattern.
+    :rtype: re.Pattern
+
+    """
+
+    PATTERNS[name] = re.compile(expression, flags)
+
+    return PATTERNS[name]
+
+
+@functools.lru_cache(maxsize=4096)
+def pattern(expression, flags=0):
+    """ Return the compiled expression, compile only on first request. Use for patterns built at run time (headings, feature names). """
+
+    return re.compile(expression, flags)
+
+
+def collapse_whitespace(text):
+    """ Replace runs of whitespace by one blank and strip leading and trailing whitespace. """
+
+    return " ".join(text.split())
+
+
+def remove_whitespace(text):
+    """ Remove all whitespace. """
+
+    return "".join(text.split())
+
+
+def underscore_whitespace(text):
+    """ Replace every whitespace character by '_'. """
+
+    return PATTERNS['whitespace'].sub("_", text)
+
+
+def remove_tabs(text):
+    """ Remove all tab characters. """
+
+    return text.replace("\t", "")
@@ -0,0 +1,149 @@
+""" :module replay_server: Local http server standing in for pseudomonas.com, pseudoluge and string-db.org, serving responses recorded in a cassette. """
+
+from GenDBScraper.Utilities.web_utilities import Cassette
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import json
+import logging
+import threading
+
+# Sites queried by the scrapers.
+DEFAULT_ORIGINS = ('https://www.pseudomonas.com',
+                   'http://pseudoluge.pseudomonas.com',
+                   'http://string-db.org',
+                   )
+
+
+class ReplayServer():
+    """ Serves recorded responses under http://host:port/<scheme>/<netloc>/<path>?<query>.
+
+    :example: server = ReplayServer('tests/cassettes/pflu0916').start()
+    :example: web_utilities.set_url_rewrites(server.rewrites())
+
+    """
+
+    def __init__(self, cassette_path, host='127.0.0.1', port=0):
+        """
+        ReplayServer constructor.
+
+        :param cassette_path: The cassette directory to serve.
+        :type  cassette_path: str
+
+        :param host: The interface to bind to.
+        :type  host: str
+
+        :param port: The port to listen on. Default: 0, pick a free port.
+        :type  port: int
+
+        """
+
+        self.__cassette = Cassette(cassette_path, mode='replay')
+        self.__httpd = ThreadingHTTPServer((host, port), _make_handler(self.__cassette))
+        self.__thread = None
+
+    @property
+    def url(self):
+        """ The base url of the server. """
+        host, port = self.__httpd.server_address[:2]
+        return "http://{0:s}:{1:d}".format(host, port)
+
+    def rewrites(self, origins=DEFAULT_ORIGINS):
+        """ Return url rewrites (see web_utilities.set_url_rewrites()) sending requests for the given origins to this server. """
+
+        rewrites = {}
+        for origin in origins:
+            parts = urlsplit(origin)
+            rewrites[origin] = "/".join([self.url, parts.scheme, parts.netloc])
+
+        return rewrites
+
+    def start(self):
+        """ Serve in a background thread. """
+
+        self.__thread = threading.Thread(target=self.__httpd.serve_forever, daemon=True)
+        self.__thread.start()
+        logging.info("Replaying %s on %s .", self.__cassette.path, self.url)
+
+        return self
+
+    def serve_forever(self):
+        """ Serve in the calling thread. """
+
+        logging.info("Replaying %s on %s .", self.__cassette.path, self.url)
+        self.__httpd.serve_forever()
+
+    def stop(self):
+        """ Shut down the server. """
+
+        self.__httpd.shutdown()
+        self.__httpd.server_close()
+
+
+def _make_handler(cassette):
+    """ Create a request handler class looking up responses in the passed cassette. """
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            self._replay('GET', None)
+
+        def do_HEAD(self):
+            self._replay('HEAD', None)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            self._replay('POST', self.rfile.read(length))
+
+        def _replay(self, method, body):
+            # Reconstruct the original url from /<scheme>/<netloc>/<path>.
+            parts = self.path.lstrip('/').split('/', 2)
+            if len(parts) < 2:
+                self.send_error(404, "Expected /<scheme>/<host>/<path>.")
+                return
+
+            url = "{0:s}://{1:s}/{2:s}".format(parts[0], parts[1], parts[2] if len(parts) > 2 else '')
+            response = cassette.lookup(method, url, body)
+            if response is None and method == 'HEAD':
+                response = cassette.lookup('GET', url, body)
+            if response is None:
+                self.send_error(404, "Not recorded: {0:s} {1:s}".format(method, url))
+                return
+
+            self.send_response(response.status_code)
+            for name, value in response.headers.items():
+                if name != 'Content-Type' and name != 'Content-Length':
+                    self.send_header(name, value)
+            self.send_header('Content-Type', response.headers.get('Content-Type') or 'application/octet-stream')
+            self.send_header('Content-Length', str(len(response.content)))
+            self.end_headers()
+            if method != 'HEAD':
+                self.wfile.write(response.content)
+
+        def log_message(self, format, *args):
+            logging.debug(format, *args)
+
+    return ReplayHandler
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Serve recorded responses for offline testing and benchmarking.")
+
+    parser.add_argument("cassette",
+                        help="The cassette directory to serve.")
+
+    parser.add_argument("-p",
+                        "--port",
+                        dest="port",
+                        type=int,
+                        default=8000,
+                        help="The port to listen on.")
+
+    args = parser.parse_args()
+
+    server = ReplayServer(args.cassette, port=args.port)
+    print("export GENDBSCRAPER_URL_REWRITES='{}'".format(json.dumps(server.rewrites())))
+    server.serve_forever()
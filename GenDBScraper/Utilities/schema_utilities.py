@@ -0,0 +1,241 @@
+""" :module schema_utilities: Registry of column dtype schemas for scraped panels and utilities to apply them. """
+
+from GenDBScraper.Utilities.lazy_import import lazy_import
+
+import logging
+
+pandas = lazy_import('pandas')
+
+# Column kinds understood by compact_frame():
+#   'category': repeated strings, stored as pandas.Categorical.
+#   'id':       identifiers, stored as smallest unsigned integer if all values are non-negative integers, else as category.
+#   'integer':  counts and positions, downcast to the smallest integer type (float if values are missing).
+#   'float':    scores and measures, downcast to float32.
+#   'double':   E-values, p-values and bit scores, kept as float64 (float32 flushes values below ~1e-45 to 0, e.g. Interpro E-values of 1e-80).
+PANEL_SCHEMAS = {
+        # pseudomonas.com
+        'Gene Feature Overview': {0: 'category'},
+        'Product': {0: 'category'},
+        'Cross-References': {'type': 'category', 'id': 'id'},
+        'Pathogen Association Analysis': {},
+        'Individual Mappings': {'Localization': 'category', 'Evidence': 'category', 'PMID': 'id'},
+        'Additional evidence': {},
+        'Gene Ontology': {'Ontology': 'category',
+                          'Accession': 'category',
+                          'Term': 'category',
+                          'GO Evidence': 'category',
+                          'Evidence Ontology (ECO) Code': 'category',
+                          'Reference': 'id',
+                          },
+        'Functional Classifications Manually Assigned by PseudoCAP': {},
+        'Functional Predictions from Interpro': {'Analysis': 'category',
+                                                 'Accession': 'category',
+                                                 'Interpro Accession': 'category',
+                                                 'Interpro Description': 'category',
+                                                 'Amino Acid Start': 'integer',
+                                                 'Amino Acid Stop': 'integer',
+                                                 'E-value': 'double',
+                                                 },
+        'Genes': {},
+        'Transposon Insertions': {'Reference': 'id'},
+        'References': {'pubmed_id': 'id'},
+        'Annotation Updates': {},
+        'Ortholog group': {'Strain': 'category',
+                           'GI': 'id',
+                           'Percent Identity': 'float',
+                           'Alignment Length': 'integer',
+                           },
+        'Ortholog cluster': {'Strain 1': 'category',
+                             'Strain 2': 'category',
+                             'GI (Strain 1)': 'id',
+                             'GI (Strain 2)': 'id',
+                             'Percent Identity': 'float',
+                             'Alignment Length': 'integer',
+                             'E-value': 'double',
+                             'Bit Score': 'double',
+                             },
+        # string-db.org
+        'Network Interactions': {'stringId_A': 'category',
+                                 'stringId_B': 'category',
+                                 'preferredName_A': 'category',
+                                 'preferredName_B': 'category',
+                                 'ncbiTaxonId': 'id',
+                                 'score': 'float',
+                                 'nscore': 'float',
+                                 'fscore': 'float',
+                                 'pscore': 'float',
+                                 'ascore': 'float',
+                                 'escore': 'float',
+                                 'dscore': 'float',
+                                 'tscore': 'float',
+                                 },
+        'Functional Enrichments': {'category': 'category',
+                                   'term': 'category',
+                                   'number_of_genes': 'integer',
+                                   'number_of_genes_in_background': 'integer',
+                                   'ncbiTaxonId': 'id',
+                                   'p_value': 'double',
+                                   'fdr': 'double',
+                                   },
+        'Interaction Enrichments': {'number_of_nodes': 'integer',
+                                    'number_of_edges': 'integer',
+                                    'average_node_degree': 'float',
+                                    'local_clustering_coefficient': 'float',
+                                    'expected_number_of_edges': 'integer',
+                                    'p_value': 'double',
+                                    },
+        }
+
+# Interaction partners share the network interactions layout.
+PANEL_SCHEMAS['Interaction Partners'] = PANEL_SCHEMAS['Network Interactions']
+
+# Unlisted string columns become categorical if at most this fraction of their values is unique.
+CATEGORY_MAX_UNIQUE_FRACTION = 0.5
+
+
+def register_schema(title, schema):
+    """ Register (or replace) the dtype schema for a panel.
+
+    :param title: The panel title, e.g. 'Gene Ontology'.
+    :type  title: str
+
+    :param schema: Mapping of column name to kind ('category', 'id', 'integer', 'float', 'double').
+    :type  schema: dict
+
+    """
+
+    if not isinstance(schema, dict):
+        raise TypeError("schema must be a dict of column names to column kinds.")
+
+    for column, kind in schema.items():
+        if kind not in _CONVERTERS:
+            raise ValueError("Unknown column kind '{0}' for column '{1}'. Valid kinds are {2}.".format(kind, column, ", ".join(_CONVERTERS.keys())))
+
+    PANEL_SCHEMAS[title] = schema
+
+
+def compact_frame(df, schema=None):
+    """ Convert the columns of the passed frame to compact dtypes.
+
+    Columns listed in the schema are converted to their kind, remaining string columns become categorical if their values repeat (see CATEGORY_MAX_UNIQUE_FRACTION).
+
+    :param df: The frame to convert (modified in place).
+    :type  df: pandas.DataFrame
+
+    :param schema: Mapping of column name to kind ('category', 'id', 'integer', 'float', 'double').
+    :type  schema: dict
+
+    :return: The converted frame.
+    :rtype: pandas.DataFrame
+
+    """
+
+    if schema is None:
+        schema = {}
+
+    for column in df.columns:
+        kind = schema.get(column)
+        try:
+            if kind is not None:
+                df[column] = _CONVERTERS[kind](df[column])
+            elif _is_repeated_string(df[column]):
+                df[column] = df[column].astype('category')
+        except (TypeError, ValueError):
+            logging.debug("Could not convert column %s to %s, keeping dtype %s.", column, kind, df[column].dtype)
+
+    return df
+
+
+def normalize_panels(panels):
+    """ Apply the registered schemas to all frames in a (nested) panels dictionary.
+
+    :param panels: The panels as returned from a scraper, dict of pandas.DataFrame or dicts thereof (modified in place).
+    :type  panels: dict
+
+    :return: The normalized panels.
+    :rtype: dict
+
+    """
+
+    for title, value in panels.items():
+        if isinstance(value, pandas.DataFrame):
+            panels[title] = normalize_panel(title, value)
+        elif isinstance(value, dict):
+            normalize_panels(value)
+
+    return panels
+
+
+def normalize_panel(title, df):
+    """ Apply the registered schema for the given panel title to the passed frame.
+
+    Transposon insertion panels share one schema regardless of the strain in their title.
+
+    """
+
+    if title.startswith('Transposon Insertions'):
+        title = 'Transposon Insertions'
+
+    return compact_frame(df, PANEL_SCHEMAS.get(title))
+
+
+def _is_repeated_string(series):
+    """ Check if the passed series holds strings with repeated values. """
+
+    if len(series) < 2 or not (series.dtype == object or pandas.api.types.is_string_dtype(series.dtype)) or isinstance(series.dtype, pandas.CategoricalDtype):
+        return False
+
+    values = series.dropna()
+    if len(values) == 0 or not values.map(lambda v: isinstance(v, str)).all():
+        return False
+
+    return values.nunique() <= CATEGORY_MAX_UNIQUE_FRACTION * len(values)
+
+
+def _to_category(series):
+    return series.astype('category')
+
+
+def _to_id(series):
+    numeric = pandas.to_numeric(series, errors='coerce')
+    if numeric.notna().all() and (numeric >= 0).all() and (numeric == numeric.round()).all():
+        return pandas.to_numeric(numeric, downcast='unsigned')
+
+    return series.astype('category')
+
+
+def _to_integer(series):
+    numeric = _to_numeric(series)
+    if numeric.isna().any():
+        return pandas.to_numeric(numeric, downcast='float')
+
+    return pandas.to_numeric(numeric, downcast='integer')
+
+
+def _to_float(series):
+    return pandas.to_numeric(_to_numeric(series), downcast='float')
+
+
+def _to_double(series):
+    return _to_numeric(series).astype('float64')
+
+
+def _to_numeric(series):
+    """ Convert to numbers, values that are no numbers (e.g. '<1e-300', 'N/A') become NaN and are counted in the log. """
+
+    numeric = pandas.to_numeric(series, errors='coerce')
+
+    coerced = int((numeric.isna() & series.notna()).sum())
+    if coerced:
+        logging.warning("%d values of column %s are not numeric, stored as NaN.", coerced, series.name)
+
+    return numeric
+
+
+_CONVERTERS = {
+        'category': _to_category,
+        'id': _to_id,
+        'integer': _to_integer,
+        'float': _to_float,
+        'double': _to_double,
+        }
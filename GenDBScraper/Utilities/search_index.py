@@ -0,0 +1,443 @@
+""" :module search_index: Genome wide inverted index over scraped annotations (names, products, GO terms, Interpro accessions, cross-references, string-db.org names) with prefix search.
+
+:example: index = SearchIndex(); index.add_results(scraper.results); index.search('dna bind')
+
+"""
+
+from GenDBScraper.Utilities.lazy_import import lazy_import
+from GenDBScraper.Utilities.regex_utilities import PATTERNS, register_pattern
+
+from bisect import bisect_left
+from io import StringIO
+import gzip
+import json
+import os
+
+pandas = lazy_import('pandas')
+
+register_pattern('search_token', r"[0-9a-z]+")
+
+# Indexed fields, position is the bit in the field masks.
+FIELDS = ('name', 'product', 'go', 'interpro', 'xref', 'string')
+
+# Rows of the 'Gene Feature Overview' and 'Product' tables indexed as names and product.
+NAME_KEYS = ('Locus Tag', 'Name', 'Gene Name', 'Synonyms', 'Alternate Locus Tag')
+PRODUCT_KEY = 'Product Name'
+
+# Indexed table columns: (panel group, panel, column, field). Label columns are named differently in older result files.
+INDEXED_COLUMNS = (("Function/Pathways/GO", "Gene Ontology", "Accession", 'go'),
+                   ("Function/Pathways/GO", "Gene Ontology", "GO Term", 'go'),
+                   ("Function/Pathways/GO", "Gene Ontology", "Term", 'go'),
+                   ("Function/Pathways/GO", "Functional Predictions from Interpro", "Interpro Accession", 'interpro'),
+                   ("Function/Pathways/GO", "Functional Predictions from Interpro", "Interpro Short Name", 'interpro'),
+                   ("Function/Pathways/GO", "Functional Predictions from Interpro", "Interpro Description", 'interpro'),
+                   )
+
+# Score of a query token matching an index token exactly or as prefix, bonus for name matches.
+EXACT_SCORE = 3
+PREFIX_SCORE = 1
+NAME_BONUS = 2
+
+# Maximum number of index tokens a query prefix expands to.
+MAX_EXPANSIONS = 1000
+
+# Default number of leading token characters naming the static index shards.
+DEFAULT_PREFIX_LENGTH = 2
+
+
+def tokenize(text):
+    """ Return the search tokens of text: lower case alphanumeric words and, for identifiers such as 'GO:0003677', the whole lower cased text. """
+
+    text = str(text).lower().strip()
+    tokens = PATTERNS['search_token'].findall(text)
+    if text and ' ' not in text and len(tokens) > 1:
+        tokens.append(text)
+
+    return tokens
+
+
+def feature_terms(panels, stdb_results=None):
+    """ Return the indexed (field, text) pairs of one feature.
+
+    :param panels: The pseudomonas.com results of the feature ({'Overview': {'Gene Feature Overview': DataFrame, ...}, ...}). Tables may be json strings as in result files.
+    :type  panels: dict
+
+    :param stdb_results: The string-db.org results of the feature (see nb_utilities.run_stdb()).
+    :type  stdb_results: dict
+
+    """
+
+    terms = []
+
+    rows = {}
+    for title in ("Gene Feature Overview", "Product"):
+        table = panel_table(panels, "Overview", title)
+        if table is not None:
+            rows.update(key_values(table))
+
+    names = [_key(key) for key in NAME_KEYS]
+    terms += [('name', str(value)) for key, value in rows.items() if key in names and _present(value)]
+    terms += [('product', str(value)) for key, value in rows.items() if key == _key(PRODUCT_KEY) and _present(value)]
+
+    for group, title, column, field in INDEXED_COLUMNS:
+        table = panel_table(panels, group, title)
+        if table is not None and column in table.columns:
+            terms += [(field, str(value)) for value in table[column].unique() if _present(value)]
+
+    xrefs = panel_table(panels, "Overview", "Cross-References")
+    if xrefs is not None:
+        terms += [('xref', str(ref_id)) for ref_type, ref_id in cross_references(xrefs) if _present(ref_id)]
+
+    if stdb_results is not None:
+        for title in ('Interaction Partners', 'Network Interactions'):
+            table = stdb_results.get(title)
+            if isinstance(table, pandas.DataFrame) and 'preferredName_A' in table.columns and not table.empty:
+                terms.append(('string', str(table['preferredName_A'].iloc[0])))
+                break
+
+    return terms
+
+
+class SearchIndex():
+    """ Inverted index from tokens to features with the fields they occur in. Features are added incrementally, the sorted token list for prefix search is rebuilt on the next search. """
+
+    def __init__(self):
+        """ SearchIndex constructor. """
+
+        # Documents (strain, locus_tag, name, product) by id and ids by (strain, locus_tag).
+        self.__documents = []
+        self.__ids = {}
+
+        # token -> {document id: field mask}
+        self.__postings = {}
+        self.__document_tokens = []
+
+        self.__tokens = None
+
+    def __len__(self):
+        return len(self.__ids)
+
+    @property
+    def documents(self):
+        """ The indexed features as list of dicts with keys strain, locus_tag, name and product. None for removed features. """
+        return self.__documents
+
+    def add(self, strain, locus_tag, terms):
+        """ Index a feature, replace its previous entry.
+
+        :param terms: (field, text) pairs as returned by feature_terms(). The first 'name' and 'product' are shown in results.
+        :type  terms: list
+
+        :return: The document id.
+        :rtype: int
+
+        """
+
+        self.remove(strain, locus_tag)
+
+        document = dict(strain=strain,
+                        locus_tag=locus_tag,
+                        name=next((text for field, text in terms if field == 'name' and text.lower() != locus_tag.lower()), None),
+                        product=next((text for field, text in terms if field == 'product'), None),
+                        )
+
+        doc = len(self.__documents)
+        self.__documents.append(document)
+        self.__ids[(strain, locus_tag)] = doc
+
+        masks = {}
+        for field, text in [('name', locus_tag)] + list(terms):
+            bit = 1 << FIELDS.index(field)
+            for token in tokenize(text):
+                masks[token] = masks.get(token, 0) | bit
+
+        for token, mask in masks.items():
+            self.__postings.setdefault(token, {})[doc] = mask
+        self.__document_tokens.append(list(masks))
+
+        self.__tokens = None
+
+        return doc
+
+    def remove(self, strain, locus_tag):
+        """ Remove a feature from the index, return True if it was indexed. """
+
+        doc = self.__ids.pop((strain, locus_tag), None)
+        if doc is None:
+            return False
+
+        for token in self.__document_tokens[doc]:
+            postings = self.__postings[token]
+            del postings[doc]
+            if not postings:
+                del self.__postings[token]
+
+        self.__documents[doc] = None
+        self.__document_tokens[doc] = []
+        self.__tokens = None
+
+        return True
+
+    def add_results(self, results, stdb_results=None):
+        """ Index all features of pseudomonas.com results ({'strain__feature': panels}).
+
+        :param stdb_results: string-db.org results by locus tag.
+        :type  stdb_results: dict
+
+        :return: The number of indexed features.
+        :rtype: int
+
+        """
+
+        for key, panels in results.items():
+            strain, _, locus_tag = key.partition("__")
+            stdb = None if stdb_results is None else stdb_results.get(locus_tag)
+            self.add(strain, locus_tag, feature_terms(panels, stdb))
+
+        return len(results)
+
+    def search(self, query, limit=20):
+        """ Return the features matching all words of query, each word matching index tokens it is a prefix of.
+
+        :return: Up to limit matches, best first, as dicts with the document keys plus 'score' and 'fields' (the fields matched).
+        :rtype: list
+
+        """
+
+        words = tokenize(query)
+        if not words:
+            return []
+
+        scores = None
+        fields = {}
+        for word in words:
+            word_scores = {}
+            for token in self.expand(word):
+                score = EXACT_SCORE if token == word else PREFIX_SCORE
+                for doc, mask in self.__postings[token].items():
+                    token_score = score + (NAME_BONUS if mask & 1 else 0)
+                    if token_score > word_scores.get(doc, 0):
+                        word_scores[doc] = token_score
+                    fields[doc] = fields.get(doc, 0) | mask
+
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {doc: scores[doc] + score for doc, score in word_scores.items() if doc in scores}
+
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.__documents[item[0]]['strain'], self.__documents[item[0]]['locus_tag']))
+
+        matches = []
+        for doc, score in ranked[:limit]:
+            match = dict(self.__documents[doc], score=score)
+            match['fields'] = [field for i, field in enumerate(FIELDS) if fields[doc] & (1 << i)]
+            matches.append(match)
+
+        return matches
+
+    def expand(self, prefix):
+        """ Return the index tokens starting with prefix, at most MAX_EXPANSIONS. """
+
+        tokens = self.__sorted_tokens()
+
+        expanded = []
+        for i in range(bisect_left(tokens, prefix), len(tokens)):
+            if not tokens[i].startswith(prefix) or len(expanded) == MAX_EXPANSIONS:
+                break
+            expanded.append(tokens[i])
+
+        return expanded
+
+    def to_dict(self):
+        """ Return the index as json serializable dict. """
+
+        return dict(fields=FIELDS,
+                    documents=self.__documents,
+                    postings={token: [[doc, mask] for doc, mask in sorted(postings.items())] for token, postings in self.__postings.items()},
+                    )
+
+    @classmethod
+    def from_dict(cls, data):
+        """ Restore an index from to_dict() output. """
+
+        index = cls()
+        index.__documents = data['documents']
+        index.__ids = {(d['strain'], d['locus_tag']): i for i, d in enumerate(index.__documents) if d is not None}
+        index.__document_tokens = [[] for d in index.__documents]
+        for token, postings in data['postings'].items():
+            index.__postings[token] = {doc: mask for doc, mask in postings}
+            for doc, mask in postings:
+                index.__document_tokens[doc].append(token)
+
+        return index
+
+    def save(self, path):
+        """ Write the index as gzip compressed json. """
+
+        with gzip.open(path, 'wt', encoding='utf-8') as fp:
+            json.dump(self.to_dict(), fp, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        """ Read an index written by save(). """
+
+        with gzip.open(path, 'rt', encoding='utf-8') as fp:
+            return cls.from_dict(json.load(fp))
+
+    def write_static(self, outdir, prefix_length=DEFAULT_PREFIX_LENGTH):
+        """ Write the index as static files for clients searching without a server.
+
+        outdir/manifest.json lists the fields, the prefix length and the shards as {prefix: file name}, outdir/documents.json the documents and each shard the postings ({token: [[document id, field mask], ...]}) of all tokens starting with prefix (the first prefix_length characters). Shard files are named by the hex encoded utf-8 prefix (see shard_file()), since identifier tokens such as 'n/a' may contain path separators. A query word is looked up in the shard of its first prefix_length characters, or in all shards starting with it if shorter (see lookup_static()).
+
+        :return: The number of shards.
+        :rtype: int
+
+        """
+
+        os.makedirs(outdir, exist_ok=True)
+
+        shards = {}
+        for token, postings in self.__postings.items():
+            shards.setdefault(token[:prefix_length], {})[token] = [[doc, mask] for doc, mask in sorted(postings.items())]
+
+        for prefix, postings in shards.items():
+            with open(os.path.join(outdir, shard_file(prefix)), 'w') as fp:
+                json.dump(postings, fp, separators=(',', ':'), sort_keys=True)
+
+        with open(os.path.join(outdir, "documents.json"), 'w') as fp:
+            json.dump(self.__documents, fp, separators=(',', ':'))
+
+        with open(os.path.join(outdir, "manifest.json"), 'w') as fp:
+            json.dump(dict(fields=FIELDS, prefix_length=prefix_length, shards={prefix: shard_file(prefix) for prefix in sorted(shards)}), fp, separators=(',', ':'))
+
+        return len(shards)
+
+    def __sorted_tokens(self):
+        if self.__tokens is None:
+            self.__tokens = sorted(self.__postings)
+        return self.__tokens
+
+
+def shard_file(prefix):
+    """ Return the file name of the static shard of prefix, 'dn' -> '646e.json'. Hex encoding keeps separators and '..' out of the name. """
+
+    return prefix.encode('utf-8').hex() + ".json"
+
+
+def lookup_static(outdir, word):
+    """ Return the postings ({token: [[document id, field mask], ...]}) of all tokens starting with word in a static index, as a client of write_static() output does.
+
+    :param outdir: The directory written by SearchIndex.write_static().
+    :type  outdir: str
+
+    :param word: A query word, see tokenize().
+    :type  word: str
+
+    :rtype: dict
+
+    """
+
+    with open(os.path.join(outdir, "manifest.json")) as fp:
+        manifest = json.load(fp)
+
+    prefix = word[:manifest['prefix_length']]
+    files = [name for shard, name in manifest['shards'].items() if shard.startswith(prefix)]
+
+    postings = {}
+    for name in files:
+        with open(os.path.join(outdir, name)) as fp:
+            postings.update({token: docs for token, docs in json.load(fp).items() if token.startswith(word)})
+
+    return postings
+
+
+def load_results(paths):
+    """ Yield (key, panels) pairs from result json files as written by the command line interface. Tables stay json strings until needed. """
+
+    for path in paths:
+        with open(path) as fp:
+            results = json.load(fp)
+        for key, panels in results.items():
+            yield key, panels
+
+
+def panel_table(panels, group, title):
+    """ Return the table panels[group][title] (panels[title] in older, ungrouped result files) as DataFrame, None if missing. """
+
+    if group in panels:
+        value = panels[group]
+        value = value.get(title) if isinstance(value, dict) else None
+    else:
+        value = panels.get(title)
+
+    if isinstance(value, str):
+        value = pandas.read_json(StringIO(value))
+
+    return value if isinstance(value, pandas.DataFrame) and not value.empty else None
+
+
+def key_values(table):
+    """ Return the rows of a key/value table ('Gene Feature Overview', 'Product') as dict with normalized keys (see NAME_KEYS). Keys are in the first column, or in the index of single column tables in older result files. """
+
+    if len(table.columns) >= 2:
+        keys, values = table.iloc[:, 0], table.iloc[:, 1]
+    else:
+        keys, values = table.index, table.iloc[:, 0]
+
+    return {_key(key): value for key, value in zip(keys, values)}
+
+
+def cross_references(table):
+    """ Return the (type, id) pairs of a 'Cross-References' table. The type is a column, or the index in older result files. """
+
+    if {'type', 'id'} <= set(table.columns):
+        return list(zip(table['type'], table['id']))
+
+    if len(table.columns) == 1:
+        return list(zip(table.index, table.iloc[:, 0]))
+
+    return []
+
+
+def _key(text):
+    """ Lower case key without whitespace and '_', 'Product\tName' and 'Product_Name' -> 'productname'. """
+
+    return PATTERNS['whitespace'].sub('', str(text)).replace('_', '').lower()
+
+
+def _present(value):
+    return value is not None and not (isinstance(value, float) and value != value) and str(value).strip() != ''
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Build or query the genome wide search index.")
+
+    parser.add_argument("results", nargs="*", help="Result json files to index.")
+    parser.add_argument("-i", "--index", dest="index", required=True, help="The index file (gzip compressed json). Built from the result files if given, else read.")
+    parser.add_argument("--static", dest="static", default=None, help="Also write the index as static shards to this directory.")
+    parser.add_argument("-q", "--query", dest="query", default=None, help="Search the index and print the matches.")
+    parser.add_argument("-n", "--limit", dest="limit", type=int, default=20, help="Maximum number of matches.")
+
+    args = parser.parse_args()
+
+    if args.results:
+        index = SearchIndex()
+        for key, panels in load_results(args.results):
+            strain, _, locus_tag = key.partition("__")
+            index.add(strain, locus_tag, feature_terms(panels))
+        index.save(args.index)
+    else:
+        index = SearchIndex.load(args.index)
+
+    if args.static is not None:
+        index.write_static(args.static)
+
+    if args.query is not None:
+        for match in index.search(args.query, args.limit):
+            print("{0:s}\t{1:s}\t{2:s}\t{3:s}".format(match['strain'], match['locus_tag'], match['name'] or '', match['product'] or ''))
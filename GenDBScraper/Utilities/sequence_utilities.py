@@ -0,0 +1,147 @@
+""" :module sequence_utilities: Cleanup of the pseudomonas.com 'Sequences' panel and streaming export of its sequences to FASTA. """
+
+from GenDBScraper.Utilities.lazy_import import lazy_import
+
+from io import StringIO
+import json
+import logging
+
+pandas = lazy_import('pandas')
+SeqIO = lazy_import('Bio.SeqIO')
+SeqRecord = lazy_import('Bio.SeqRecord')
+Seq = lazy_import('Bio.Seq')
+
+# Row tags (column 0) of the 'Sequences' panel.
+UPSTREAM_TAG = "DNA Sequence Upstream of Gene"
+GENE_TAG = "DNA Sequence for Gene"
+DOWNSTREAM_TAG = "DNA Sequence Downstream of Gene"
+PROTEIN_TAG = "Amino Acid Sequence"
+SEQUENCE_TAGS = (UPSTREAM_TAG, GENE_TAG, DOWNSTREAM_TAG, PROTEIN_TAG)
+
+# Cleanup patterns: BLAST links, blanks inside the sequence and the blank separating the header from the sequence.
+_BLAST_PATTERN = r"BLAST.+$"
+_SPACE_PATTERN = r"[A-Z]\s[A-Z]"
+_SEPARATOR_PATTERN = r"([a-z,1-9])\s([A-Z]+)\s*$"
+
+
+def clean_sequences(df):
+    """ Strip BLAST links and blanks from all sequence cells of a raw 'Sequences' table at once and separate the FASTA header from the sequence.
+
+    :param df: The raw table, tags in column 0, sequences in column 1.
+    :type  df: pandas.DataFrame
+
+    :return: The table with cleaned sequence cells ('>header\\nSEQUENCE').
+    :rtype: pandas.DataFrame
+
+    """
+
+    mask = df[0].str.match(r"^DNA.+$") | (df[0] == PROTEIN_TAG)
+
+    df.loc[mask, 1] = (df.loc[mask, 1].str.replace(_BLAST_PATTERN, "", regex=True)
+                                      .str.replace(_SPACE_PATTERN, "", regex=True)
+                                      .str.replace(_SEPARATOR_PATTERN, r'\1\n\2', regex=True)
+                       )
+
+    return df
+
+
+def sequence_record(panel, tag=PROTEIN_TAG, default_id=None):
+    """ Return the sequence under tag in a 'Sequences' panel as Bio.SeqRecord.SeqRecord, None if the panel has no such sequence.
+
+    :param panel: The 'Sequences' panel.
+    :type  panel: pandas.DataFrame
+
+    :param tag: Which sequence to return, one of SEQUENCE_TAGS.
+    :type  tag: str
+
+    :param default_id: Record id if the cell has no FASTA header.
+    :type  default_id: str
+
+    """
+
+    cells = panel.loc[panel[0] == tag, 1]
+    if cells.empty or not isinstance(cells.iloc[0], str):
+        return None
+
+    header, separator, sequence = cells.iloc[0].partition("\n")
+    if not separator or not header.startswith('>'):
+        header, sequence = ">{0:s}".format(default_id or ''), cells.iloc[0]
+
+    description = header[1:].strip()
+    identifier = description.split()[0] if description else default_id
+
+    return SeqRecord.SeqRecord(Seq.Seq("".join(sequence.split())), id=identifier or '', description=description)
+
+
+def iter_records(results, tag=PROTEIN_TAG):
+    """ Yield one SeqRecord per query in results.
+
+    :param results: Query results as in PseudomonasDotComScraper.results ({'strain__feature': {'Sequences': DataFrame, ...}}) or an iterable of (key, panel) pairs as from load_sequences(). SeqRecords in the iterable are passed through.
+    :type  results: (dict | iterable)
+
+    :param tag: Which sequence to export, one of SEQUENCE_TAGS.
+    :type  tag: str
+
+    """
+
+    items = ((key, panels['Sequences']) for key, panels in results.items()) if isinstance(results, dict) else results
+
+    for item in items:
+        if isinstance(item, SeqRecord.SeqRecord):
+            yield item
+            continue
+
+        key, panel = item
+        record = sequence_record(panel, tag, default_id=key)
+        if record is None:
+            logging.warning("No '%s' found for %s.", tag, key)
+            continue
+        yield record
+
+
+def load_sequences(paths):
+    """ Yield (key, 'Sequences' panel) pairs from result json files (as written by PseudomonasDotComScraper.to_json() or the command line interface), without parsing the other panels. """
+
+    for path in paths:
+        with open(path) as fp:
+            results = json.load(fp)
+
+        for key, panels in results.items():
+            sequences = panels.get('Sequences') if isinstance(panels, dict) else None
+            if sequences is None:
+                logging.warning("No 'Sequences' panel in %s for %s.", path, key)
+                continue
+            yield key, pandas.read_json(StringIO(sequences))
+
+
+def write_fasta(records, handle, tag=PROTEIN_TAG):
+    """ Write the sequences to a multi record FASTA file, one query at a time.
+
+    :param records: Anything accepted by iter_records().
+    :type  records: (dict | iterable)
+
+    :param handle: The file path or open text stream to write to.
+    :type  handle: (str | file-like object)
+
+    :return: The number of written records.
+    :rtype: int
+
+    """
+
+    return SeqIO.write(iter_records(records, tag), handle, 'fasta')
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Export sequences from result json files to one FASTA file.")
+
+    parser.add_argument("results", nargs="+", help="Result json files.")
+    parser.add_argument("-o", "--outfile", dest="outfile", required=True, help="The FASTA file to write.")
+    parser.add_argument("-t", "--tag", dest="tag", default=PROTEIN_TAG, choices=SEQUENCE_TAGS, help="Which sequence to export.")
+
+    args = parser.parse_args()
+
+    count = write_fasta(load_sequences(args.results), args.outfile, args.tag)
+    logging.info("Wrote %d records to %s .", count, args.outfile)
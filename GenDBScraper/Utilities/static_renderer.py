@@ -0,0 +1,421 @@
+""" :module static_renderer: Render feature results as compact static HTML or JSON data pages, displayed by one shared javascript grid bundle instead of embedded notebook widgets.
+
+The cell link rules (NCBI protein, PubMed, QuickGO, Interpro, ...) are shared with nb_utilities.get_grids(). Pages written with write_feature() load each tab from its own compressed json shard when the tab is first opened.
+
+"""
+
+from GenDBScraper.Utilities.json_utilities import JSONEncoder
+from GenDBScraper.Utilities.lazy_import import lazy_import
+from GenDBScraper.Utilities.regex_utilities import PATTERNS
+
+from xml.sax.saxutils import escape
+import base64
+import glob
+import gzip
+import json
+import logging
+import os
+
+pandas = lazy_import('pandas')
+
+NCBI_PROTEIN_URL = "http://www.ncbi.nlm.nih.gov/protein/"
+PUBMED_URL = "http://ncbi.nlm.nih.gov/pubmed/"
+
+# Cell links: (tab title (lower case) or compiled title pattern, column pattern name in regex_utilities.PATTERNS, url prefix). Cells in matching columns link to prefix + value.
+CELL_LINKS = (("ortholog group", 'column_gi', NCBI_PROTEIN_URL),
+              ("ortholog cluster", 'column_gi_strain', NCBI_PROTEIN_URL),
+              ("cross-references", 'column_url', ""),
+              ("individual mappings", 'column_pmid', PUBMED_URL),
+              ("gene ontology", 'column_go_accession', "http://www.ebi.ac.uk/QuickGO/GTerm?id="),
+              ("gene ontology", 'column_eco_code', "http://www.ebi.ac.uk/ontology-lookup/?termId="),
+              ("functional predictions from interpro", 'column_interpro_accession', "http://www.ebi.ac.uk/interpro/entry/"),
+              (PATTERNS['title_transposon'], 'column_reference', PUBMED_URL),
+              ("references", 'column_pubmed_id', PUBMED_URL),
+              )
+
+# Tabs not rendered.
+SKIPPED = ("Ortholog xml",)
+
+# Media types of raster images embedded as data URIs (e.g. a downloaded string-db.org 'Network Image').
+IMAGE_TYPES = {'.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.gif': 'image/gif'}
+
+# File name of the shared grid bundle.
+BUNDLE_NAME = 'gendb-grid.js'
+
+
+def cell_link(title, column):
+    """ Return the url prefix for cells in column of the tab title, None if the cells are not links. """
+
+    title = title.lower()
+    for link_title, column_pattern, prefix in CELL_LINKS:
+        if isinstance(link_title, str):
+            if link_title != title:
+                continue
+        elif not link_title.match(title):
+            continue
+
+        if PATTERNS[column_pattern].match(column):
+            return prefix
+
+    return None
+
+
+def link_renderer(prefix):
+    """ Return the ag-grid cell renderer linking cells to prefix + value. """
+
+    return """function(params) {{ return '<a href={0:s}'+params.value+' target=_blank>'+params.value+'</a>'; }}""".format(prefix)
+
+
+def table_data(title, df, index=True):
+    """ Return one table as json serializable dict with keys 'title', 'columns' (list of {'field', 'link'}) and 'rows' (list of lists). """
+
+    df = df.rename(str, axis='columns')
+    if index:
+        df = df.reset_index()
+        df = df.rename(columns={df.columns[0]: ''})
+
+    columns = [dict(field=column, link=cell_link(title, column)) for column in df.columns]
+    # Let pandas convert numpy scalars, timestamps and NaN.
+    rows = json.loads(df.to_json(orient='values', date_format='iso'))
+
+    return dict(title=title, columns=columns, rows=rows)
+
+
+def tabs_data(results, index=True):
+    """ Return the tabs of one results dict (panels by title, nested dicts become sub tabs) as json serializable list, same tabs as nb_utilities.get_grids().
+
+    Values that are paths to svg files (as the string-db.org 'Network Image') are inlined as 'svg', paths to raster images (see IMAGE_TYPES) are embedded as data URI in 'image'.
+
+    """
+
+    tabs = []
+    for title, value in results.items():
+        if title in SKIPPED or value is None:
+            logging.debug("Skipping %s", title)
+            continue
+
+        if isinstance(value, pandas.DataFrame):
+            if value.empty:
+                logging.debug("Skipping %s", title)
+                continue
+            tabs.append(table_data(title, value, index))
+
+        elif isinstance(value, dict):
+            tabs.append(dict(title=title, tabs=tabs_data(value, index)))
+
+        elif isinstance(value, str) and value.endswith('.svg') and os.path.isfile(value):
+            with open(value) as fp:
+                tabs.append(dict(title=title, svg=fp.read()))
+
+        elif isinstance(value, str) and os.path.splitext(value)[1].lower() in IMAGE_TYPES and os.path.isfile(value):
+            media_type = IMAGE_TYPES[os.path.splitext(value)[1].lower()]
+            with open(value, 'rb') as fp:
+                tabs.append(dict(title=title, image="data:{0:s};base64,{1:s}".format(media_type, base64.b64encode(fp.read()).decode('ascii'))))
+
+        elif isinstance(value, str) and os.path.isfile(value):
+            logging.warning("Skipping %s, cannot embed %s.", title, value)
+
+        else:
+            logging.debug("Skipping %s", title)
+
+    return tabs
+
+
+def feature_data(strain, locus_tag, pdc_results, stdb_results=None):
+    """ Return the data page of one feature as json serializable dict. """
+
+    data = dict(strain=strain,
+                locus_tag=locus_tag,
+                sections=[dict(title="Data from pseudomonas.com", tabs=tabs_data(pdc_results, index=True))],
+                )
+
+    if stdb_results is not None:
+        data['sections'].append(dict(title="Data from strings-db", tabs=tabs_data(stdb_results, index=False)))
+
+    return data
+
+
+def render_json(data):
+    """ Serialize a data page. """
+
+    return json.dumps(data, cls=JSONEncoder, separators=(',', ':'))
+
+
+def render_html(data, bundle_url=BUNDLE_NAME):
+    """ Render a data page as static html loading the shared grid bundle from bundle_url. """
+
+    # '</' would end the script element.
+    payload = render_json(data).replace("</", "<\\/")
+
+    return HTML_TEMPLATE.format(title=escape("{0:s} {1:s}".format(data['strain'], data['locus_tag'])),
+                                bundle_url=escape(bundle_url, {'"': '&quot;'}),
+                                data=payload,
+                                )
+
+
+def shard_data(data, url_prefix=""):
+    """ Split a data page into a manifest and per tab shards.
+
+    :param url_prefix: Prepended to the shard file names in the manifest.
+    :type  url_prefix: str
+
+    :return: The manifest (the data page with each table and image replaced by {'title', 'shard': url}) and the shards as {file name: tab data}.
+    :rtype: tuple
+
+    """
+
+    shards = {}
+
+    def split(tabs, prefix):
+        manifest_tabs = []
+        for i, tab in enumerate(tabs):
+            name = "{0:s}{1:d}".format(prefix, i)
+            if 'tabs' in tab:
+                manifest_tabs.append(dict(title=tab['title'], tabs=split(tab['tabs'], name + "-")))
+            else:
+                shards[name + ".json.gz"] = tab
+                manifest_tabs.append(dict(title=tab['title'], shard=url_prefix + name + ".json.gz"))
+        return manifest_tabs
+
+    manifest = dict(data)
+    manifest['sections'] = [dict(section, tabs=split(section['tabs'], "{0:d}-".format(i))) for i, section in enumerate(data['sections'])]
+
+    return manifest, shards
+
+
+def page_name(strain, locus_tag):
+    """ Return the page name (<strain>_<locus_tag>) of a feature. """
+
+    return "{0:s}_{1:s}".format(strain, locus_tag)
+
+
+def render_feature(data, bundle_url=BUNDLE_NAME):
+    """ Render the page of one feature with lazily loaded tabs, shards are fetched from <strain>_<locus_tag>/<shard> relative to the page.
+
+    :return: The html page carrying the manifest, the manifest and the gzip compressed json shards by file name.
+    :rtype: tuple
+
+    """
+
+    name = page_name(data['strain'], data['locus_tag'])
+    manifest, shards = shard_data(data, url_prefix=name + "/")
+
+    # Fixed mtime, unchanged data gives identical shards.
+    compressed = {filename: gzip.compress(render_json(tab).encode('utf-8'), mtime=0) for filename, tab in shards.items()}
+
+    return render_html(manifest, bundle_url), manifest, compressed
+
+
+def write_feature(data, outdir, bundle_url=BUNDLE_NAME):
+    """ Write the page of one feature with lazily loaded tabs.
+
+    The page outdir/<strain>_<locus_tag>.html carries only the manifest, each table is written to outdir/<strain>_<locus_tag>/<shard>.json.gz and fetched by the grid bundle when its tab is first opened. The manifest is also written to outdir/<strain>_<locus_tag>/manifest.json .
+
+    :return: The path of the page.
+    :rtype: str
+
+    """
+
+    name = page_name(data['strain'], data['locus_tag'])
+    shard_dir = os.path.join(outdir, name)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    # Shards of an earlier run may be left over if the feature lost tabs.
+    for stale in glob.glob(os.path.join(shard_dir, "*.json.gz")):
+        os.remove(stale)
+
+    page, manifest, shards = render_feature(data, bundle_url)
+
+    for filename, shard in shards.items():
+        with open(os.path.join(shard_dir, filename), 'wb') as fp:
+            fp.write(shard)
+
+    with open(os.path.join(shard_dir, "manifest.json"), 'w') as fp:
+        fp.write(render_json(manifest))
+
+    path = os.path.join(outdir, name + ".html")
+    with open(path, 'w') as fp:
+        fp.write(page)
+
+    return path
+
+
+def write_bundle(outdir):
+    """ Write the shared grid bundle to outdir and return its path. """
+
+    path = os.path.join(outdir, BUNDLE_NAME)
+    with open(path, 'w') as fp:
+        fp.write(GRID_BUNDLE)
+
+    return path
+
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Feature results {title}</title>
+<script src="{bundle_url}" defer></script>
+</head>
+<body>
+<div id="gendb-grid"></div>
+<script type="application/json" id="gendb-data">{data}</script>
+</body>
+</html>
+"""
+
+GRID_BUNDLE = r"""/* Tabs of sortable, filterable tables for the GenDBScraper static pages. */
+(function () {
+  'use strict';
+
+  var style = '.gendb-tabs button{margin:0 2px 0 0}.gendb-tabs button.active{font-weight:bold}' +
+              '.gendb-table{border-collapse:collapse;font:12px sans-serif}.gendb-table td,.gendb-table th{border:1px solid #ccc;padding:2px 4px}' +
+              '.gendb-table th{cursor:pointer;background:#eee}';
+
+  function element(tag, text) {
+    var e = document.createElement(tag);
+    if (text !== undefined && text !== null) { e.textContent = String(text); }
+    return e;
+  }
+
+  function cell(value, link) {
+    var td = element('td');
+    if (value === null) { return td; }
+    if (link !== null && link !== undefined) {
+      var a = element('a', value);
+      a.href = link + value;
+      a.target = '_blank';
+      td.appendChild(a);
+    } else {
+      td.textContent = String(value);
+    }
+    return td;
+  }
+
+  function compare(a, b) {
+    if (a === b) { return 0; }
+    if (a === null) { return 1; }
+    if (b === null) { return -1; }
+    if (typeof a === 'number' && typeof b === 'number') { return a - b; }
+    return String(a).localeCompare(String(b), undefined, {numeric: true});
+  }
+
+  function table(data) {
+    var container = element('div');
+    var filter = element('input');
+    filter.placeholder = 'Filter';
+    var t = element('table');
+    t.className = 'gendb-table';
+    var head = element('tr');
+    var body = element('tbody');
+    var rows = data.rows.slice();
+    var order = {column: -1, sign: 1};
+
+    function fill() {
+      var query = filter.value.toLowerCase();
+      body.textContent = '';
+      rows.forEach(function (row) {
+        if (query && row.join('\u0000').toLowerCase().indexOf(query) < 0) { return; }
+        var tr = element('tr');
+        row.forEach(function (value, i) { tr.appendChild(cell(value, data.columns[i].link)); });
+        body.appendChild(tr);
+      });
+    }
+
+    data.columns.forEach(function (column, i) {
+      var th = element('th', column.field);
+      th.addEventListener('click', function () {
+        order.sign = order.column === i ? -order.sign : 1;
+        order.column = i;
+        rows.sort(function (a, b) { return order.sign * compare(a[i], b[i]); });
+        fill();
+      });
+      head.appendChild(th);
+    });
+
+    filter.addEventListener('input', fill);
+    var thead = element('thead');
+    thead.appendChild(head);
+    t.appendChild(thead);
+    t.appendChild(body);
+    container.appendChild(filter);
+    container.appendChild(t);
+    fill();
+    return container;
+  }
+
+  // Shards are gzip compressed json, already decompressed if the server sent them with Content-Encoding.
+  function load(url) {
+    return fetch(url).then(function (response) {
+      if (!response.ok) { throw new Error(url + ': ' + response.status); }
+      return response.arrayBuffer();
+    }).then(function (buffer) {
+      var bytes = new Uint8Array(buffer);
+      if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+        return new Response(new Blob([buffer]).stream().pipeThrough(new DecompressionStream('gzip'))).text();
+      }
+      return new TextDecoder().decode(buffer);
+    }).then(JSON.parse);
+  }
+
+  function content(tab) {
+    if (tab.shard) {
+      var placeholder = element('div', 'Loading ...');
+      load(tab.shard).then(function (data) {
+        placeholder.replaceWith(content(data));
+      }, function (error) {
+        placeholder.textContent = 'Could not load ' + tab.title + ': ' + error.message;
+      });
+      return placeholder;
+    }
+    if (tab.tabs) { return tabs(tab.tabs); }
+    if (tab.svg) { var d = element('div'); d.innerHTML = tab.svg; return d; }
+    if (tab.image) { var img = element('img'); img.src = tab.image; img.alt = tab.title; return img; }
+    return table(tab);
+  }
+
+  // Tab contents are built when first shown.
+  function tabs(list) {
+    var container = element('div');
+    var bar = element('div');
+    bar.className = 'gendb-tabs';
+    var pane = element('div');
+    var built = [];
+
+    function show(i) {
+      Array.prototype.forEach.call(bar.children, function (b, j) { b.className = i === j ? 'active' : ''; });
+      if (!built[i]) { built[i] = content(list[i]); }
+      pane.textContent = '';
+      pane.appendChild(built[i]);
+    }
+
+    list.forEach(function (tab, i) {
+      var button = element('button', tab.title);
+      button.addEventListener('click', function () { show(i); });
+      bar.appendChild(button);
+    });
+
+    container.appendChild(bar);
+    container.appendChild(pane);
+    if (list.length) { show(0); }
+    return container;
+  }
+
+  function render(root, data) {
+    var s = element('style', style);
+    document.head.appendChild(s);
+    data.sections.forEach(function (section) {
+      root.appendChild(element('h2', section.title));
+      root.appendChild(tabs(section.tabs));
+    });
+  }
+
+  window.GenDBGrid = {render: render};
+
+  document.addEventListener('DOMContentLoaded', function () {
+    var root = document.getElementById('gendb-grid');
+    var source = document.getElementById('gendb-data');
+    if (root && source) { render(root, JSON.parse(source.textContent)); }
+  });
+})();
+"""
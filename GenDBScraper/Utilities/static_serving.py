@@ -0,0 +1,183 @@
+""" :module static_serving: Http logic for serving static and precompressed files, independent of the web server: encoding negotiation, ETags (304), byte ranges (206, 416) and caching headers.
+
+Used by the twisted server in docs/source/include/notebooks/server.py for directories and page archives (see page_store.PageArchive).
+
+:example: variant, encoding = select_variant('page.html', os.path.isfile, accept_encoding)
+:example: status, headers, byte_range = static_response(request_headers, file_etag(variant, encoding), os.path.getsize(variant), 'text/html', encoding)
+
+"""
+
+import mimetypes
+import os
+
+# Seconds browsers may use a cached file without revalidation.
+MAX_AGE = 3600
+
+# Precompressed siblings (encoding, suffix) in order of preference, see compression_utilities.precompress().
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    """ Return the encodings (lower case) in an Accept-Encoding header, without those with q=0.
+
+    :param header: The header value, None if not sent.
+    :type  header: (str | bytes)
+
+    :rtype: set
+
+    """
+
+    if isinstance(header, bytes):
+        header = header.decode('latin-1')
+
+    accepted = set()
+    for item in (header or '').split(','):
+        parts = [p.strip() for p in item.split(';')]
+        weights = [p.split('=', 1)[1] for p in parts[1:] if p.startswith('q=')]
+        try:
+            if not parts[0] or (weights and float(weights[0]) == 0):
+                continue
+        except ValueError:
+            continue
+        accepted.add(parts[0].lower())
+
+    return accepted
+
+
+def select_variant(name, exists, accept_encoding):
+    """ Return the best precompressed sibling of name the client accepts, or name itself.
+
+    :param name: The requested file (path or archive member).
+    :type  name: str
+
+    :param exists: Returns True if the passed sibling name exists, e.g. os.path.isfile or archive.__contains__.
+    :type  exists: callable
+
+    :param accept_encoding: The Accept-Encoding header.
+    :type  accept_encoding: (str | bytes)
+
+    :return: The name to send and its content encoding (None for name itself).
+    :rtype: tuple
+
+    """
+
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, suffix in PRECOMPRESSED:
+        if encoding in accepted and exists(name + suffix):
+            return name + suffix, encoding
+
+    return name, None
+
+
+def file_etag(path, encoding=None):
+    """ Return the ETag of a file from its modification time, size and encoding. """
+
+    stat = os.stat(path)
+
+    return '"{0:x}-{1:x}-{2:s}"'.format(int(stat.st_mtime), stat.st_size, encoding or 'identity')
+
+
+def etag_matches(if_none_match, etag):
+    """ Return True if an If-None-Match header matches etag (weak comparison, '*' matches all). """
+
+    if isinstance(if_none_match, bytes):
+        if_none_match = if_none_match.decode('latin-1')
+
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    if '*' in tags:
+        return True
+
+    strip_weak = lambda tag: tag[2:] if tag.startswith('W/') else tag
+
+    return strip_weak(etag) in [strip_weak(tag) for tag in tags]
+
+
+def byte_range(header, size):
+    """ Return (start, end) of a single range 'bytes=' header, None if not satisfiable (first byte beyond the content). Missing, multiple and malformed ranges, including a last byte before the first, give the whole content (RFC 7233 section 3.1). """
+
+    if isinstance(header, bytes):
+        header = header.decode('latin-1')
+
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return 0, size
+
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        if first:
+            start = int(first)
+            if last and int(last) < start:
+                return 0, size
+            end = min(int(last) + 1, size) if last else size
+        else:
+            # Suffix range, the last bytes.
+            start, end = max(size - int(last), 0), size
+    except ValueError:
+        return 0, size
+
+    if start >= size:
+        return None
+
+    return start, end
+
+
+def guess_content_type(name):
+    """ Return the content type of a file by its name (precompressed suffixes are ignored by mimetypes). """
+
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def static_response(request_headers, etag, size, content_type=None, encoding=None, max_age=MAX_AGE):
+    """ Decide status, headers and byte range of a GET or HEAD response for a static file.
+
+    :param request_headers: Request headers by lower case name ('if-none-match', 'range').
+    :type  request_headers: dict
+
+    :param etag: The ETag of the sent variant.
+    :type  etag: str
+
+    :param size: The size of the sent variant in bytes.
+    :type  size: int
+
+    :param content_type: The Content-Type. Default: Not set.
+    :type  content_type: str
+
+    :param encoding: The Content-Encoding of the sent variant. Default: Not set.
+    :type  encoding: str
+
+    :param max_age: Seconds for Cache-Control.
+    :type  max_age: int
+
+    :return: The status (200, 206, 304 or 416), response headers by name and the (start, end) byte range to send, None if no body is sent.
+    :rtype: tuple
+
+    """
+
+    headers = {'Vary': 'Accept-Encoding',
+               'Cache-Control': 'public, max-age={0:d}'.format(max_age),
+               'Accept-Ranges': 'bytes',
+               'ETag': etag,
+               }
+    if content_type is not None:
+        headers['Content-Type'] = content_type
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+
+    if etag_matches(request_headers.get('if-none-match'), etag):
+        return 304, headers, None
+
+    requested = byte_range(request_headers.get('range'), size)
+    if requested is None:
+        headers['Content-Range'] = 'bytes */{0:d}'.format(size)
+        headers['Content-Length'] = '0'
+        return 416, headers, None
+
+    start, end = requested
+    headers['Content-Length'] = str(end - start)
+    if (start, end) != (0, size):
+        headers['Content-Range'] = 'bytes {0:d}-{1:d}/{2:d}'.format(start, end - 1, size)
+        return 206, headers, requested
+
+    return 200, headers, requested
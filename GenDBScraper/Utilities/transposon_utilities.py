@@ -0,0 +1,222 @@
+""" :module transposon_utilities: Reshaping of the pseudomonas.com transposon insertion tables and a genome wide insertion table. """
+
+from GenDBScraper.Utilities.lazy_import import lazy_import
+
+import logging
+import os
+
+pandas = lazy_import('pandas')
+
+# Columns prepended to each insertion in the genome wide table.
+LOCUS_COLUMN = 'Locus'
+STRAIN_COLUMN = 'Strain'
+LIBRARY_COLUMN = 'Library'
+INDEX_COLUMNS = (STRAIN_COLUMN, LOCUS_COLUMN, LIBRARY_COLUMN)
+
+# Heading prefix of the per library tables ('Transposon Insertions in UCBPP-PA14').
+HEADING_PREFIX = "Transposon Insertions in "
+
+
+def reshape_key_value_table(table):
+    """ Turn a two column key/value table of stacked records into one row per record.
+
+    A new record starts at every occurrence of the first key. Records lacking some keys (ragged groups) get NaN in the missing cells, repeated keys within one record keep their first value.
+
+    :param table: The stacked records, keys in column 0, values in column 1.
+    :type  table: pandas.DataFrame
+
+    :return: One row per record, one column per key in order of first appearance.
+    :rtype: pandas.DataFrame
+
+    """
+
+    if table.empty:
+        return pandas.DataFrame()
+
+    keys = table[0]
+    groups = (keys == keys.iloc[0]).cumsum() - 1
+
+    stacked = pandas.DataFrame({'group': groups.values, 'key': keys.values, 'value': table[1].values})
+    stacked = stacked.drop_duplicates(subset=['group', 'key'])
+
+    records = stacked.pivot(index='group', columns='key', values='value')
+    records = records.reindex(columns=pandas.unique(keys.values))
+    records.columns.name = None
+    records.index.name = None
+
+    return records
+
+
+def library_name(heading):
+    """ Return the library of a transposon table heading ('Transposon Insertions in Orthologs' -> 'Orthologs'). """
+
+    if heading.startswith(HEADING_PREFIX):
+        return heading[len(HEADING_PREFIX):]
+
+    return heading
+
+
+class InsertionTable():
+    """ Genome wide transposon insertion table, one row per insertion with strain, locus and library columns. Features are appended as they are scraped.
+
+    With a path, the rows of each feature are appended to that csv file as they arrive instead of being kept in memory. The header is written with the first rows. A feature bringing columns not in the header extends it, the rows written so far are rewritten once with the new columns empty.
+
+    :example: insertions = InsertionTable(); insertions.add_results(scraper.results); insertions.table
+    :example: insertions = InsertionTable('insertions.csv'); insertions.add_results(scraper.results); insertions.close()
+
+    """
+
+    def __init__(self, path=None):
+        """ InsertionTable constructor.
+
+        :param path: The csv file to append the insertions to (truncated). Default: Keep the insertions in memory.
+        :type  path: str
+
+        """
+
+        self.__path = path
+        self.__columns = None
+        self.__rows = 0
+        self.__chunks = []
+        self.__table = None
+
+        if path is not None:
+            open(path, 'w').close()
+
+    def __len__(self):
+        return self.__rows
+
+    @property
+    def path(self):
+        """ The csv file the insertions are appended to, None if kept in memory. """
+        return self.__path
+
+    @property
+    def table(self):
+        """ All insertions as one DataFrame (read back from the file if written incrementally). """
+
+        if self.__table is None:
+            if self.__path is not None and self.__columns is not None:
+                self.__table = pandas.read_csv(self.__path, dtype=str)
+            elif self.__chunks:
+                self.__table = pandas.concat(self.__chunks, ignore_index=True, sort=False)
+            else:
+                self.__table = pandas.DataFrame(columns=list(INDEX_COLUMNS))
+
+        return self.__table
+
+    def add(self, strain, locus, transposons):
+        """ Append the insertions of one feature.
+
+        :param strain: The strain.
+        :type  strain: str
+
+        :param locus: The locus tag of the feature.
+        :type  locus: str
+
+        :param transposons: The 'Transposon Insertions' panel, per library tables keyed by heading as returned by PseudomonasDotComScraper._get_transposon_insertions().
+        :type  transposons: dict
+
+        :return: The number of added insertions.
+        :rtype: int
+
+        """
+
+        chunks = []
+        for heading, insertions in transposons.items():
+            if insertions is None or len(insertions.index) == 0:
+                continue
+
+            chunk = insertions.reset_index(drop=True)
+            chunk.insert(0, LIBRARY_COLUMN, library_name(heading))
+            chunk.insert(0, LOCUS_COLUMN, locus)
+            chunk.insert(0, STRAIN_COLUMN, strain)
+            chunks.append(chunk)
+
+        if not chunks:
+            return 0
+
+        if self.__path is None:
+            self.__chunks.extend(chunks)
+        else:
+            self.__append(pandas.concat(chunks, ignore_index=True, sort=False))
+
+        added = sum(len(chunk.index) for chunk in chunks)
+        self.__rows += added
+        self.__table = None
+
+        return added
+
+    def add_results(self, results):
+        """ Append the insertions of all features in scraper results ({'strain__feature': {'Transposon Insertions': {...}, ...}}).
+
+        :return: The number of added insertions.
+        :rtype: int
+
+        """
+
+        added = 0
+        for key, panels in results.items():
+            transposons = panels.get('Transposon Insertions')
+            if not isinstance(transposons, dict):
+                logging.debug("No transposon insertions for %s.", key)
+                continue
+
+            strain, _, locus = key.partition("__")
+            added += self.add(strain, locus, transposons)
+
+        return added
+
+    def close(self):
+        """ Finish the csv file, write the header if no insertions were added.
+
+        :return: The number of written rows.
+        :rtype: int
+
+        """
+
+        if self.__path is not None and self.__columns is None:
+            pandas.DataFrame(columns=list(INDEX_COLUMNS)).to_csv(self.__path, index=False)
+
+        return self.__rows
+
+    def to_csv(self, path):
+        """ Write the table to path.
+
+        :return: The number of written rows.
+        :rtype: int
+
+        """
+
+        table = self.table
+        table.to_csv(path, index=False)
+
+        return len(table.index)
+
+    @classmethod
+    def from_csv(cls, path):
+        """ Read a table written with to_csv(). All columns are read as str. """
+
+        insertions = cls()
+        insertions.__chunks.append(pandas.read_csv(path, dtype=str))
+        insertions.__rows = len(insertions.__chunks[0].index)
+
+        return insertions
+
+    def __append(self, chunk):
+        """ Append the rows of one feature to the csv file, in the columns of the header. Extend the header by new columns. """
+
+        header = self.__columns is None
+        if header:
+            self.__columns = list(chunk.columns)
+        else:
+            added = [column for column in chunk.columns if column not in self.__columns]
+            if added:
+                logging.debug("Adding columns %s of the insertions at %s to %s.", ", ".join(map(str, added)), chunk[LOCUS_COLUMN].iloc[0], self.__path)
+                self.__columns += added
+                written = pandas.read_csv(self.__path, dtype=str, keep_default_na=False)
+                written.reindex(columns=self.__columns).to_csv(self.__path + ".tmp", index=False)
+                os.replace(self.__path + ".tmp", self.__path)
+            chunk = chunk.reindex(columns=self.__columns)
+
+        chunk.to_csv(self.__path, mode='a', header=header, index=False)
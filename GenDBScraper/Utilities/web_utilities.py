@@ -1,9 +1,69 @@
 """ :module: hosting various utilities built on top of the requests module. """
 
-from contextlib import closing
+from contextlib import closing, contextmanager
+from urllib.parse import parse_qsl, urlencode
+from GenDBScraper.Utilities import instrumentation
+from GenDBScraper.Utilities.lazy_import import lazy_import
+import base64
+import hashlib
+import io
+import json
 import logging
-from requests import get, post
-from requests.exceptions import RequestException
+import os
+import tempfile
+import threading
+import time
+
+requests = lazy_import('requests')
+
+# Size of chunks (in bytes) to pull from streamed responses.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Shared session, reuses pooled connections across all requests of the process.
+_session = None
+_session_lock = threading.Lock()
+
+# Active cassette for recording and replaying responses (see use_cassette()).
+_cassette = None
+
+# Response headers kept in cassettes. The content is stored decoded, so Content-Encoding and Transfer-Encoding of the original response are left out, Content-Length is computed on replay.
+RECORDED_HEADERS = ('Content-Type', 'Content-Disposition', 'ETag', 'Last-Modified', 'Cache-Control', 'Expires', 'Location')
+
+# URL prefix rewrites (see set_url_rewrites()).
+_url_rewrites = {}
+
+# Seconds a successful probe() is trusted before the site is probed again.
+PROBE_TTL = 300
+
+# Time of the last successful probe by URL (see probe()), and a lock per URL so probes of different sites run concurrently.
+_probes = {}
+_probe_locks = {}
+_probe_lock = threading.Lock()
+
+def get_session():
+    """ Return the process wide requests.Session, create it on first use. Forked processes create their own (see _reset_after_fork()). """
+
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = requests.Session()
+
+    return _session
+
+def _reset_after_fork():
+    """ Drop the session and probe state inherited by a forked child: pooled sockets must not be shared with the parent, and locks may have been held by threads that do not exist in the child. """
+
+    global _session, _session_lock, _probe_locks, _probe_lock
+
+    _session = None
+    _session_lock = threading.Lock()
+    _probe_locks = {}
+    _probe_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 def guarded_get(url):
     """ Get content of passed URL.
@@ -13,20 +73,165 @@ def guarded_get(url):
 
     """
     # Safeguard opening the URL.
-    with closing(get(url, stream=True, timeout=60)) as resp:
+    with closing(_send('GET', url, stream=True, timeout=60)) as resp:
         if is_good_response(resp):
             logging.info("Connected to %s .", url)
-            return resp.content
+            start = time.perf_counter()
+            content = resp.content
+            _report('GET', url, resp, time.perf_counter() - start, len(content))
+            return content
         else:
             raise RuntimeError("ERROR: Could not open "+url+" .")
 
+def guarded_stream(url, chunk_size=DEFAULT_CHUNK_SIZE, max_bytes=None, progress=None):
+    """ Iterate over the content of the passed URL chunk by chunk.
+
+    :param url: The URL to download.
+    :type  url: str
+
+    :param chunk_size: Number of bytes per chunk.
+    :type  chunk_size: int
+
+    :param max_bytes: Abort the download once more than this number of bytes were received (Default: None, no limit).
+    :type  max_bytes: int
+
+    :param progress: Callback called after each chunk as progress(url, received_bytes, total_bytes). total_bytes is None if the server does not send a Content-Length.
+    :type  progress: callable
+
+    :raises RuntimeError: URL could not be opened or the download exceeds max_bytes.
+
+    """
+
+    with closing(_send('GET', url, stream=True, timeout=60)) as resp:
+        if resp.status_code != 200 or not is_good_response(resp):
+            raise RuntimeError("ERROR: Could not open "+url+" .")
+
+        logging.info("Connected to %s .", url)
+
+        total = resp.headers.get('Content-Length')
+        if total is not None:
+            total = int(total)
+            if max_bytes is not None and total > max_bytes:
+                raise RuntimeError("ERROR: Content of {0:s} ({1:d} bytes) exceeds the limit of {2:d} bytes.".format(url, total, max_bytes))
+
+        received = 0
+        download = 0.0
+        chunks = resp.iter_content(chunk_size=chunk_size)
+        while True:
+            # Only time the transfer, not the consumer between chunks.
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            download += time.perf_counter() - start
+            if chunk is None:
+                break
+
+            received += len(chunk)
+            if max_bytes is not None and received > max_bytes:
+                raise RuntimeError("ERROR: Content of {0:s} exceeds the limit of {1:d} bytes.".format(url, max_bytes))
+
+            if progress is not None:
+                progress(url, received, total)
+
+            yield chunk
+
+        _report('GET', url, resp, download, received)
+
+def open_stream(url, encoding=None, **kwargs):
+    """ Open the passed URL as a readonly file-like object that downloads on demand.
+
+    :param url: The URL to open.
+    :type  url: str
+
+    :param encoding: If given, decode the content incrementally with this encoding and return a text stream. Default: None (binary stream).
+    :type  encoding: str
+
+    :param kwargs: Further keyword arguments are forwarded to guarded_stream().
+
+    :return: Buffered binary stream or text stream wrapping the download.
+    :rtype: (io.BufferedReader | io.TextIOWrapper)
+
+    """
+
+    stream = io.BufferedReader(_ChunkStream(guarded_stream(url, **kwargs)), buffer_size=kwargs.get('chunk_size', DEFAULT_CHUNK_SIZE))
+
+    if encoding is not None:
+        return io.TextIOWrapper(stream, encoding=encoding)
+
+    return stream
+
+def probe(url, ttl=PROBE_TTL):
+    """ Check that the site at url is reachable with a HEAD request (GET without reading the body if HEAD is not supported).
+
+    Successful probes are shared by all callers in the process and trusted for ttl seconds, concurrent callers of one URL wait for one probe.
+
+    :param url: The URL to probe.
+    :type  url: str
+
+    :param ttl: Seconds to trust a previous successful probe. Default: PROBE_TTL.
+    :type  ttl: float
+
+    :raises ConnectionError: The site is not reachable or answers with an error status.
+
+    """
+
+    with _probe_lock:
+        lock = _probe_locks.setdefault(url, threading.Lock())
+
+    with lock:
+        last = _probes.get(url)
+        if last is not None and time.monotonic() - last < ttl:
+            return True
+
+        try:
+            try:
+                resp = _send('HEAD', url, timeout=10)
+            except RuntimeError:
+                # Not recorded in the active cassette.
+                resp = None
+
+            if resp is None or resp.status_code in (405, 501):
+                resp = _send('GET', url, stream=True, timeout=10)
+
+            with closing(resp):
+                status = resp.status_code
+
+        except Exception as e:
+            raise ConnectionError("Connecting to {0:s} failed: {1:s}".format(url, str(e)))
+
+        if status >= 400:
+            raise ConnectionError("Connecting to {0:s} failed with status {1:d}.".format(url, status))
+
+        _probes[url] = time.monotonic()
+        logging.info("Connected to %s .", url)
+
+    return True
+
+def reset_probes():
+    """ Forget all probe results, the next probe() per URL goes to the network. """
+
+    with _probe_lock:
+        _probes.clear()
+
+def log_progress(url, received, total):
+    """ Progress callback for guarded_stream() that reports to the debug log. """
+
+    if total:
+        logging.debug("%s: %d of %d bytes (%.0f%%).", url, received, total, 100.0 * received / total)
+    else:
+        logging.debug("%s: %d bytes.", url, received)
+
 def guarded_post(url, data):
     """ Post request to url in a safeguarded way. """
 
     try:
-        resp = post(url, data=data, stream=True)
+        resp = _send('POST', url, data=data, stream=True)
         if is_good_response(resp):
             logging.info("Connected to %s.", url)
+            if instrumentation.enabled():
+                # Read the body here to account the download to this request.
+                start = time.perf_counter()
+                size = len(resp.content)
+                _report('POST', url, resp, time.perf_counter() - start, size)
             return resp
         else:
             raise RuntimeError("ERROR: Could not open "+url+" .")
@@ -34,6 +239,204 @@ def guarded_post(url, data):
         raise
 
 
+def use_cassette(path, mode='replay'):
+    """ Record responses to or replay responses from a cassette directory while the returned context is active.
+
+    :param path: The cassette directory. One file per recorded request, keyed by method, URL and body. Responses keep their status, decoded content and the RECORDED_HEADERS.
+    :type  path: str
+
+    :param mode: 'record' (always send and record), 'replay' (only replay, fail on unrecorded requests) or 'once' (replay if recorded, else send and record).
+    :type  mode: str
+
+    :example: with use_cassette('tests/cassettes/pflu0916', mode='once'): scraper.run_query()
+
+    """
+
+    return _activate(Cassette(path, mode))
+
+def set_cassette(path, mode='replay'):
+    """ Activate a cassette (see use_cassette()) until set_cassette(None) is called. """
+
+    global _cassette
+
+    _cassette = None if path is None else Cassette(path, mode)
+
+    return _cassette
+
+def active_cassette():
+    """ Return the active cassette, None if responses are neither recorded nor replayed. """
+
+    return _cassette
+
+def set_url_rewrites(rewrites):
+    """ Send requests for URLs starting with one of the given prefixes to the mapped prefix instead.
+
+    Cassettes record and look up the original URL. Pass an empty dict to remove all rewrites.
+
+    :param rewrites: Mapping of original URL prefix to replacement prefix.
+    :type  rewrites: dict
+
+    :example: set_url_rewrites({'https://www.pseudomonas.com': 'http://127.0.0.1:8000/https/www.pseudomonas.com'})
+
+    """
+
+    global _url_rewrites
+
+    _url_rewrites = dict(rewrites)
+
+def configure_from_environment():
+    """ Activate a cassette and url rewrites from environment variables.
+
+    GENDBSCRAPER_CASSETTE: Cassette directory.
+    GENDBSCRAPER_CASSETTE_MODE: Cassette mode (default 'replay').
+    GENDBSCRAPER_URL_REWRITES: JSON object of url rewrites.
+
+    """
+
+    if os.environ.get('GENDBSCRAPER_CASSETTE'):
+        set_cassette(os.environ['GENDBSCRAPER_CASSETTE'], os.environ.get('GENDBSCRAPER_CASSETTE_MODE', 'replay'))
+        logging.info("Using cassette %s in %s mode.", _cassette.path, _cassette.mode)
+
+    if os.environ.get('GENDBSCRAPER_URL_REWRITES'):
+        set_url_rewrites(json.loads(os.environ['GENDBSCRAPER_URL_REWRITES']))
+
+def request_key(method, url, data=None):
+    """ Return the key identifying a request in a cassette.
+
+    :param method: The HTTP method.
+    :type  method: str
+
+    :param url: The requested URL.
+    :type  url: str
+
+    :param data: The form data of a POST request, as dict or urlencoded string/bytes.
+    :type  data: (dict | str | bytes)
+
+    """
+
+    return hashlib.sha1("\n".join([method.upper(), url, _canonical_body(data)]).encode('utf-8')).hexdigest()
+
+class Cassette():
+    """ Directory of recorded responses, one json file per request. """
+
+    def __init__(self, path, mode='replay'):
+        """
+        Cassette constructor.
+
+        :param path: The cassette directory (created in record modes).
+        :type  path: str
+
+        :param mode: 'record', 'replay' or 'once'.
+        :type  mode: str
+
+        """
+
+        if mode not in ('record', 'replay', 'once'):
+            raise ValueError("Cassette mode must be 'record', 'replay' or 'once', {} was supplied.".format(mode))
+
+        self.__path = path
+        self.__mode = mode
+
+        # Decoded responses by request key, filled by preload().
+        self.__preloaded = {}
+
+        if mode != 'replay':
+            os.makedirs(path, exist_ok=True)
+
+    @property
+    def path(self):
+        return self.__path
+
+    @property
+    def mode(self):
+        return self.__mode
+
+    def lookup(self, method, url, data=None):
+        """ Return the recorded response for the request or None if not recorded. """
+
+        key = request_key(method, url, data)
+        if key in self.__preloaded:
+            return RecordedResponse(*self.__preloaded[key])
+
+        entry_path = os.path.join(self.__path, key + '.json')
+        if not os.path.isfile(entry_path):
+            return None
+
+        with open(entry_path, 'r') as fp:
+            entry = json.load(fp)
+
+        logging.debug("Replaying %s %s from %s.", method, url, entry_path)
+
+        return RecordedResponse(entry['url'], entry['status_code'], entry['headers'], base64.b64decode(entry['content']))
+
+    def record(self, method, url, data, response):
+        """ Store the response for the request, return it as RecordedResponse. """
+
+        with closing(response):
+            entry = dict(method=method.upper(),
+                         url=url,
+                         body=_canonical_body(data),
+                         status_code=response.status_code,
+                         headers=_recorded_headers(response.headers),
+                         content=base64.b64encode(response.content).decode('ascii'),
+                         )
+
+        # Write atomically, concurrent workers may record the same request.
+        fd, tmp_path = tempfile.mkstemp(dir=self.__path, suffix='.json')
+        with os.fdopen(fd, 'w') as fp:
+            json.dump(entry, fp)
+        os.replace(tmp_path, os.path.join(self.__path, request_key(method, url, data) + '.json'))
+
+        return RecordedResponse(url, entry['status_code'], entry['headers'], base64.b64decode(entry['content']))
+
+    def preload(self):
+        """ Read and decode all recorded responses, later lookups are served from memory without file access or decoding.
+
+        :return: The number of preloaded responses.
+        :rtype: int
+
+        """
+
+        for name in sorted(os.listdir(self.__path)):
+            if name.endswith('.json'):
+                with open(os.path.join(self.__path, name), 'r') as fp:
+                    entry = json.load(fp)
+                self.__preloaded[name[:-len('.json')]] = (entry['url'], entry['status_code'], entry['headers'], base64.b64decode(entry['content']))
+
+        return len(self.__preloaded)
+
+    def entries(self):
+        """ Iterate over all recorded entries (as dicts). """
+
+        for name in sorted(os.listdir(self.__path)):
+            if name.endswith('.json'):
+                with open(os.path.join(self.__path, name), 'r') as fp:
+                    yield json.load(fp)
+
+class RecordedResponse():
+    """ Minimal stand-in for requests.Response serving recorded content. """
+
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = dict(headers)
+        self.headers['Content-Length'] = str(len(content))
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start+chunk_size]
+
+    def close(self):
+        pass
+
 def is_good_response(resp, expected_content_type='text'):
     """ Returns True if the response seems to be HTML, False otherwise.
 
@@ -49,3 +452,111 @@ def is_good_response(resp, expected_content_type='text'):
             )
 
 
+class _ChunkStream(io.RawIOBase):
+    """ Raw readonly stream on top of an iterator of bytes chunks. """
+
+    def __init__(self, chunks):
+        self.__chunks = chunks
+        self.__pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        """ Fill the passed buffer with the next bytes from the chunk iterator. """
+
+        while not self.__pending:
+            try:
+                self.__pending = next(self.__chunks)
+            except StopIteration:
+                return 0
+
+        size = min(len(buffer), len(self.__pending))
+        buffer[:size] = self.__pending[:size]
+        self.__pending = self.__pending[size:]
+
+        return size
+
+    def close(self):
+        """ Close the stream and the underlying download. """
+
+        if hasattr(self.__chunks, 'close'):
+            self.__chunks.close()
+
+        super().close()
+
+@contextmanager
+def _activate(cassette):
+    """ Context manager making the passed cassette the active one. """
+
+    global _cassette
+
+    previous = _cassette
+    _cassette = cassette
+    try:
+        yield cassette
+    finally:
+        _cassette = previous
+
+def _send(method, url, data=None, stream=False, timeout=None):
+    """ Send a request, passing through the active cassette and url rewrites. """
+
+    cassette = _cassette
+
+    if cassette is not None and cassette.mode != 'record':
+        recorded = cassette.lookup(method, url, data)
+        if recorded is not None:
+            return recorded
+        if cassette.mode == 'replay':
+            raise RuntimeError("ERROR: No recorded response for {0:s} {1:s} in cassette {2:s} .".format(method, url, cassette.path))
+
+    target = url
+    for prefix, replacement in _url_rewrites.items():
+        if url.startswith(prefix):
+            target = replacement + url[len(prefix):]
+            break
+
+    start = time.perf_counter()
+    response = get_session().request(method, target, data=data, stream=stream, timeout=timeout)
+    ttfb = time.perf_counter() - start
+
+    if cassette is not None:
+        response = cassette.record(method, url, data, response)
+
+    # Time to response headers (including name resolution and connect), reported with the download time by _report().
+    response._gendbscraper_timing = ttfb
+
+    return response
+
+def _report(method, url, response, download, size):
+    """ Pass the timings of a completed request to the instrumentation sinks. """
+
+    if not instrumentation.enabled():
+        return
+
+    ttfb = getattr(response, '_gendbscraper_timing', 0.0)
+    instrumentation.request(method, url, response.status_code, ttfb, download, size)
+
+def _recorded_headers(headers):
+    """ Return the RECORDED_HEADERS present in headers, Content-Type always. """
+
+    recorded = {'Content-Type': headers.get('Content-Type', '')}
+    recorded.update((name, headers[name]) for name in RECORDED_HEADERS if name in headers)
+
+    return recorded
+
+def _canonical_body(data):
+    """ Return form data as urlencoded string with sorted keys and without None values, as requests would send it. """
+
+    if data is None:
+        return ''
+
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+
+    if isinstance(data, str):
+        items = parse_qsl(data, keep_blank_values=True)
+    else:
+        items = [(str(k), str(v)) for k, v in data.items() if v is not None]
+
+    return urlencode(sorted(items))
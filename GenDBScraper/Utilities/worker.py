@@ -0,0 +1,289 @@
+""" :module worker: Long lived scraper worker keeping connected scrapers, sessions and identifier caches warm, serving feature jobs over stdin/stdout or a unix socket as json lines.
+
+Protocol: One json object per line in, one per line out.
+
+    {"id": 1, "strain": "sbw25", "feature": "pflu0916", "outfile": "/tmp/pflu0916.json"}
+    -> {"id": 1, "status": "ok", "outfile": "/tmp/pflu0916.json", "seconds": 4.2}
+
+Jobs take the optional keys 'sources' (list of 'pdc' and/or 'stdb', default both), 'taxonId', 'renderer' and 'cache_dir' (see StringDBScraper.network_image()). Without 'outfile', the results are returned serialized in the 'results' key.
+Commands: {"command": "ping"}, {"command": "stats"} and {"command": "shutdown"}.
+
+"""
+
+from GenDBScraper.PseudomonasDotComScraper import PseudomonasDotComScraper, pdc_query
+from GenDBScraper.StringDBScraper import StringDBScraper, stringdb_query
+from GenDBScraper.Utilities.json_utilities import JSONEncoder
+from GenDBScraper.Utilities.regex_utilities import PATTERNS
+
+import json
+import logging
+import os
+import socketserver
+import sys
+import threading
+import time
+
+# Default NCBI taxon id for string-db.org queries (P. fluorescens SBW25).
+DEFAULT_TAXON_ID = 216595
+
+
+class ScraperWorker():
+    """ Holds one connected scraper per database and the identifier caches, runs feature jobs on them.
+
+    :example: worker = ScraperWorker(); panels = worker.run_pdc('sbw25', 'pflu0916')
+
+    """
+
+    def __init__(self):
+        """ ScraperWorker constructor. Scrapers are connected on first use. """
+
+        self.__pdc = None
+        self.__stdb = None
+
+        # string-db.org identifiers by (taxonId, query name).
+        self.__string_ids = dict()
+
+        # The scrapers keep per query state, jobs are run one at a time.
+        self.__lock = threading.RLock()
+
+        self.__jobs = 0
+        self.__failed = 0
+
+    @property
+    def pdc(self):
+        """ The connected PseudomonasDotComScraper. """
+
+        with self.__lock:
+            if self.__pdc is None:
+                scraper = PseudomonasDotComScraper()
+                scraper.connect()
+                self.__pdc = scraper
+
+        return self.__pdc
+
+    @property
+    def stdb(self):
+        """ The connected StringDBScraper. """
+
+        with self.__lock:
+            if self.__stdb is None:
+                scraper = StringDBScraper()
+                scraper.connect()
+                self.__stdb = scraper
+
+        return self.__stdb
+
+    def run_pdc(self, strain, feature):
+        """ Run the pseudomonas.com query for one feature and return its panels. """
+
+        with self.__lock:
+            scraper = self.pdc
+            scraper.run_query(pdc_query(strain=strain, feature=feature))
+
+            return scraper.results["{0:s}__{1:s}".format(strain, feature)]
+
+    def string_id(self, feature, taxonId=DEFAULT_TAXON_ID):
+        """ Return the string-db.org identifier of a locus tag, resolve on first request. """
+
+        name = PATTERNS['string_name'].sub(r'\1_', feature)
+        key = (str(taxonId), name)
+
+        with self.__lock:
+            if key not in self.__string_ids:
+                scraper = self.stdb
+                scraper.query = stringdb_query(taxonId=taxonId, features=[name])
+                scraper.update_features()
+                self.__string_ids[key] = scraper.query.features[0]
+
+            return self.__string_ids[key]
+
+    def run_stdb(self, feature, taxonId=DEFAULT_TAXON_ID, renderer='remote', cache_dir=None):
+        """ Run the string-db.org queries for one locus tag and return the results as nb_utilities.run_stdb() does. """
+
+        with self.__lock:
+            scraper = self.stdb
+            scraper.query = stringdb_query(taxonId=taxonId, features=[self.string_id(feature, taxonId)])
+
+            results = dict()
+            results['Network Image'] = scraper.network_image(renderer=renderer, cache_dir=cache_dir)
+            results['Network Interactions'] = scraper.network_interactions()
+            results['Interaction Partners'] = scraper.interaction_partners(required_score=300)
+            results['Functional Enrichments'] = scraper.functional_enrichments()
+            results['Interaction Enrichments'] = scraper.interaction_enrichments()
+
+            return results
+
+    def stats(self):
+        """ Return job counts and cache sizes. """
+
+        return dict(jobs=self.__jobs,
+                    failed=self.__failed,
+                    string_ids=len(self.__string_ids),
+                    pdc_connected=self.__pdc is not None,
+                    stdb_connected=self.__stdb is not None,
+                    )
+
+    def handle(self, message):
+        """ Process one protocol message and return the response. Errors are reported in the response, never raised. """
+
+        response = dict(id=message.get('id'))
+        command = message.get('command', 'run')
+
+        if command == 'ping':
+            response['status'] = 'ok'
+            return response
+
+        if command == 'stats':
+            response.update(status='ok', stats=self.stats())
+            return response
+
+        if command == 'shutdown':
+            response['status'] = 'ok'
+            return response
+
+        if command != 'run':
+            response.update(status='error', error="Unknown command '{0:s}'.".format(str(command)))
+            return response
+
+        start = time.perf_counter()
+        self.__jobs += 1
+        try:
+            results = dict()
+            sources = message.get('sources', ['pdc', 'stdb'])
+            if 'pdc' in sources:
+                results['pdc'] = self.run_pdc(message['strain'], message['feature'])
+            if 'stdb' in sources:
+                results['stdb'] = self.run_stdb(message['feature'],
+                                                taxonId=message.get('taxonId', DEFAULT_TAXON_ID),
+                                                renderer=message.get('renderer', 'remote'),
+                                                cache_dir=message.get('cache_dir'),
+                                                )
+
+            if message.get('outfile') is not None:
+                with open(message['outfile'], 'w') as fp:
+                    json.dump(results, fp, cls=JSONEncoder)
+                response['outfile'] = message['outfile']
+            else:
+                response['results'] = json.loads(json.dumps(results, cls=JSONEncoder))
+
+            response['status'] = 'ok'
+
+        except Exception as e:
+            logging.exception("Job %s failed.", message.get('id'))
+            self.__failed += 1
+            response.update(status='error', error="{0:s}: {1:s}".format(type(e).__name__, str(e)))
+
+        response['seconds'] = time.perf_counter() - start
+
+        return response
+
+
+def serve_stream(worker, infile, outfile):
+    """ Answer json line messages from infile on outfile until shutdown or end of input.
+
+    :return: True if a shutdown command was received.
+
+    """
+
+    for line in infile:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            response = dict(id=None, status='error', error="Invalid json: {0:s}".format(str(e)))
+            message = {}
+        else:
+            response = worker.handle(message)
+
+        outfile.write(json.dumps(response) + "\n")
+        outfile.flush()
+
+        if message.get('command') == 'shutdown':
+            return True
+
+    return False
+
+
+def serve_unix(worker, path):
+    """ Serve the worker on a unix socket at path, one client connection at a time, until a shutdown command is received. """
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            infile = (line.decode('utf-8') for line in self.rfile)
+            outfile = _Utf8Writer(self.wfile)
+            if serve_stream(worker, infile, outfile):
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    with socketserver.UnixStreamServer(path, Handler) as server:
+        logging.info("Worker listening on %s .", path)
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(path)
+
+
+def submit(path, message):
+    """ Send one message to the worker listening on the unix socket at path and return its response. """
+
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        with sock.makefile('rwb') as stream:
+            stream.write((json.dumps(message) + "\n").encode('utf-8'))
+            stream.flush()
+            return json.loads(stream.readline().decode('utf-8'))
+
+
+class _Utf8Writer():
+    """ Text interface to a binary stream for serve_stream(). """
+
+    def __init__(self, stream):
+        self.__stream = stream
+
+    def write(self, text):
+        self.__stream.write(text.encode('utf-8'))
+
+    def flush(self):
+        self.__stream.flush()
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Long lived scraper worker answering json line jobs on stdin/stdout or a unix socket.")
+
+    parser.add_argument("-u",
+                        "--unix-socket",
+                        dest="socket",
+                        default=None,
+                        help="Listen on this unix socket instead of stdin/stdout.",
+                        )
+
+    parser.add_argument("--warm",
+                        dest="warm",
+                        action="store_true",
+                        help="Connect the scrapers before accepting jobs.",
+                        )
+
+    args = parser.parse_args()
+
+    # Keep stdout for the protocol.
+    logging.getLogger().handlers = [logging.StreamHandler(sys.stderr)]
+
+    worker = ScraperWorker()
+    if args.warm:
+        worker.pdc
+        worker.stdb
+
+    if args.socket is not None:
+        serve_unix(worker, args.socket)
+    else:
+        serve_stream(worker, sys.stdin, sys.stdout)
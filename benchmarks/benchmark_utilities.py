@@ -0,0 +1,144 @@
+""" :module benchmark_utilities: Timing, allocation measurement and result storage shared by all benchmarks. """
+
+from datetime import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+# Default directory for benchmark results.
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def measure(func, repeat=5, trace_allocations=True):
+    """ Call func repeatedly and collect wall time and allocation statistics.
+
+    :param func: The function to benchmark, called without arguments.
+    :type  func: callable
+
+    :param repeat: Number of calls.
+    :type  repeat: int
+
+    :param trace_allocations: Whether to trace allocations (adds overhead to the timings of the traced call, which is run in addition to the timed calls).
+    :type  trace_allocations: bool
+
+    :return: Statistics: 'mean', 'median', 'min', 'max' wall time in seconds, 'peak_bytes' (peak traced memory) and 'retained_blocks' (net increase of live memory blocks, not the number of allocations) of one call.
+    :rtype: dict
+
+    """
+
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    stats = dict(repeat=repeat,
+                 mean=statistics.mean(timings),
+                 median=statistics.median(timings),
+                 min=min(timings),
+                 max=max(timings),
+                 )
+
+    if trace_allocations:
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            func()
+            after = tracemalloc.take_snapshot()
+            stats['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        stats['retained_blocks'] = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+
+    return stats
+
+
+def git_commit():
+    """ Return the current git commit hash or None outside a git checkout. """
+
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(name, results, results_dir=RESULTS_DIR):
+    """ Store benchmark results as json, tagged with commit, time and environment.
+
+    :param name: The benchmark name, used as file name prefix.
+    :type  name: str
+
+    :param results: The results to store (json serializable).
+    :type  results: dict
+
+    :return: Path to the written file.
+    :rtype: str
+
+    """
+
+    os.makedirs(results_dir, exist_ok=True)
+
+    commit = git_commit()
+    timestamp = datetime.now().strftime('%Y%m%dT%H%M%S')
+    document = dict(benchmark=name,
+                    commit=commit,
+                    timestamp=timestamp,
+                    python=platform.python_version(),
+                    machine=platform.machine(),
+                    results=results,
+                    )
+
+    path = os.path.join(results_dir, "{0:s}_{1:s}_{2:s}.json".format(name, timestamp, commit or 'nogit'))
+    with open(path, 'w') as fp:
+        json.dump(document, fp, indent=2, sort_keys=True)
+
+    logging.info("Benchmark results written to %s .", path)
+
+    return path
+
+
+def compare_results(baseline_path, current_path, key='median'):
+    """ Compare two result files and return (path in results, baseline, current, ratio) for all matching statistics.
+
+    A ratio > 1 means the current run is slower.
+
+    """
+
+    with open(baseline_path) as fp:
+        baseline = json.load(fp)['results']
+    with open(current_path) as fp:
+        current = json.load(fp)['results']
+
+    rows = []
+    for path, value in _flatten(current):
+        if path[-1] != key:
+            continue
+        reference = dict(_flatten(baseline)).get(path)
+        if reference:
+            rows.append(("/".join(path[:-1]), reference, value, value / reference))
+
+    return rows
+
+
+def print_comparison(rows):
+    """ Print the output of compare_results() as table. """
+
+    print("{0:60s} {1:>12s} {2:>12s} {3:>8s}".format("benchmark", "baseline", "current", "ratio"))
+    for name, reference, value, ratio in rows:
+        print("{0:60s} {1:12.6f} {2:12.6f} {3:8.2f}".format(name, reference, value, ratio))
+
+
+def _flatten(tree, prefix=()):
+    """ Yield (path, value) pairs of all numeric leaves in a nested dict. """
+
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, prefix + (key,))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield prefix + (key,), value
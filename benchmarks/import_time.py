@@ -0,0 +1,95 @@
+""" :module import_time: Benchmark the time to import the GenDBScraper modules in a fresh interpreter.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py -m GenDBScraper.StringDBScraper -r 20 --compare benchmarks/results/import_time_<...>.json
+
+Reports the median wall time of the import and which heavy 3rd party modules were actually loaded by it.
+
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_utilities import write_results, compare_results, print_comparison, RESULTS_DIR
+
+import json
+import statistics
+import subprocess
+
+# Modules to import.
+MODULES = ('GenDBScraper',
+           'GenDBScraper.PseudomonasDotComScraper',
+           'GenDBScraper.StringDBScraper',
+           'GenDBScraper.Utilities.web_utilities',
+           'GenDBScraper.Utilities.nb_utilities',
+           )
+
+# 3rd party modules whose loading is reported.
+HEAVY_MODULES = ('pandas', 'numpy', 'bs4', 'lxml.etree', 'requests', 'doi2bib.crossref', 'pubmed_lookup', 'ipywidgets', 'ipyaggrid', 'Bio.SeqIO', 'IPython')
+
+# Run in the child interpreter: time the import, then list the heavy modules that were executed.
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+from GenDBScraper.Utilities.lazy_import import is_loaded
+print(json.dumps(dict(seconds=elapsed, loaded=[name for name in {heavy!r} if is_loaded(name)])))
+"""
+
+
+def import_time(module, repeat=10):
+    """ Import module in repeat fresh interpreters and return timing statistics and the loaded heavy modules.
+
+    :raises RuntimeError: The import failed.
+
+    """
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get('PYTHONPATH', '')]))
+
+    timings = []
+    for i in range(repeat):
+        process = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)], capture_output=True, env=env, cwd=root)
+        if process.returncode != 0:
+            raise RuntimeError("Importing {0:s} failed: {1:s}".format(module, process.stderr.decode().strip().splitlines()[-1]))
+        result = json.loads(process.stdout.decode().strip().splitlines()[-1])
+        timings.append(result['seconds'])
+
+    return dict(repeat=repeat,
+                median=statistics.median(timings),
+                min=min(timings),
+                max=max(timings),
+                loaded=result['loaded'],
+                )
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Benchmark module import times in fresh interpreters.")
+
+    parser.add_argument("-m", "--modules", dest="modules", nargs="+", default=list(MODULES), help="Modules to import.")
+    parser.add_argument("-r", "--repeat", dest="repeat", type=int, default=10, help="Number of fresh interpreters per module.")
+    parser.add_argument("-o", "--outdir", dest="outdir", default=RESULTS_DIR, help="Where to write the results.")
+    parser.add_argument("--compare", dest="compare", default=None, help="Result file of a previous run to compare against.")
+
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        try:
+            results[module] = import_time(module, args.repeat)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            continue
+        print("{0:50s} {1:8.1f} ms  loads: {2:s}".format(module, results[module]['median'] * 1e3, ", ".join(results[module]['loaded']) or "-"))
+
+    path = write_results('import_time', results, args.outdir)
+    print(path)
+
+    if args.compare is not None:
+        print_comparison(compare_results(args.compare, path))
@@ -0,0 +1,94 @@
+""" :module regex_normalisation: Micro-benchmark of the text normalisation in the parsers, per call compiled regex chains against regex_utilities.
+
+    python benchmarks/regex_normalisation.py -n 100000
+
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_utilities import write_results, compare_results, print_comparison, RESULTS_DIR
+from GenDBScraper.Utilities.regex_utilities import collapse_whitespace, remove_whitespace, underscore_whitespace, remove_tabs
+
+import re
+import timeit
+
+# Representative inputs as found in the pseudomonas.com html.
+TRANSPOSON_HEADING = "\n\t\t\tTransposon Insertions\n\t\t\t  in   PFLU0916 (Tn5 mutant library)\n\t\t"
+CROSS_REFERENCE = "\n\t\t\t  NCBI\tRefseq\n\t\t\t  Protein  "
+INDEX_LABEL = "Gene Name\tand Synonyms"
+TABLE_HTML = "<table>\n\t\t<tr>\t<td>\tPFLU0916\t</td>\t</tr>\n\t</table>" * 20
+
+
+def _previous_transposon_key(key):
+    key = re.compile(r'\n+').sub(" ", key)
+    key = re.compile(r'\t+').sub(" ", key)
+    key = re.compile(r'\s+').sub(" ", key)
+    key = re.compile(r'^\s').sub("", key)
+    return re.compile(r'\s$').sub("", key)
+
+def _previous_cross_reference(text):
+    return re.compile('[\t\s]').sub('', text)
+
+def _previous_index_label(text):
+    return re.compile('[\t\s]').sub("_", text)
+
+def _previous_table_html(text):
+    return re.compile('[\t]').sub("", text)
+
+
+# (name, input, previous implementation, current implementation)
+CASES = (('transposon_key', TRANSPOSON_HEADING, _previous_transposon_key, collapse_whitespace),
+         ('cross_reference', CROSS_REFERENCE, _previous_cross_reference, remove_whitespace),
+         ('index_label', INDEX_LABEL, _previous_index_label, underscore_whitespace),
+         ('table_html', TABLE_HTML, _previous_table_html, remove_tabs),
+         )
+
+
+def benchmark(number):
+    """ Time number calls of the previous and current implementation per case, check that they agree.
+
+    :return: Per case seconds per call ('previous', 'current') and 'speedup'.
+    :rtype: dict
+
+    """
+
+    results = {}
+    for name, text, previous, current in CASES:
+        if previous(text) != current(text):
+            raise AssertionError("Implementations disagree for {0:s}.".format(name))
+
+        previous_time = min(timeit.repeat(lambda: previous(text), number=number, repeat=3)) / number
+        current_time = min(timeit.repeat(lambda: current(text), number=number, repeat=3)) / number
+        results[name] = dict(previous=dict(median=previous_time),
+                             current=dict(median=current_time),
+                             speedup=previous_time / current_time,
+                             )
+
+    return results
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Benchmark text normalisation.")
+
+    parser.add_argument("-n", "--number", dest="number", type=int, default=100000, help="Calls per measurement.")
+    parser.add_argument("-o", "--outdir", dest="outdir", default=RESULTS_DIR, help="Where to write the results.")
+    parser.add_argument("--compare", dest="compare", default=None, help="Result file of a previous run to compare against.")
+
+    args = parser.parse_args()
+
+    results = benchmark(args.number)
+    for name, result in results.items():
+        print("{0:20s} {1:10.3f} us {2:10.3f} us {3:8.1f}x".format(name, result['previous']['median'] * 1e6, result['current']['median'] * 1e6, result['speedup']))
+
+    path = write_results('regex_normalisation', results, args.outdir)
+    print(path)
+
+    if args.compare is not None:
+        print_comparison(compare_results(args.compare, path))
@@ -0,0 +1,182 @@
+""" :module run_benchmarks: Benchmark the scraper extractors and end-to-end throughput on recorded responses.
+
+Record the responses once (online), then benchmark offline against the cassette:
+
+    python benchmarks/run_benchmarks.py --cassette benchmarks/cassettes/sbw25 --mode once -f pflu0916 pflu0917
+    python benchmarks/run_benchmarks.py --cassette benchmarks/cassettes/sbw25 -f pflu0916 pflu0917 --jobs 4
+
+Results are written to benchmarks/results/ as json, compare two runs with --compare.
+
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_utilities import measure, write_results, compare_results, print_comparison, RESULTS_DIR
+from GenDBScraper.PseudomonasDotComScraper import PseudomonasDotComScraper, pdc_query
+from GenDBScraper.StringDBScraper import StringDBScraper, stringdb_query
+from GenDBScraper.Utilities import web_utilities
+from GenDBScraper.Utilities.regex_utilities import PATTERNS
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import logging
+import time
+
+# pseudomonas.com extractors, called with the feature url.
+PDC_EXTRACTORS = ('_get_overview',
+                  '_get_sequences',
+                  '_get_functions_pathways_go',
+                  '_get_operons',
+                  '_get_transposon_insertions',
+                  '_get_updates',
+                  '_get_orthologs',
+                  )
+
+# string-db.org methods, called without arguments on a resolved query.
+STDB_METHODS = ('resolve_id',
+                'network_interactions',
+                'interaction_partners',
+                'functional_enrichments',
+                'interaction_enrichments',
+                )
+
+
+def benchmark_extractors(strain, features, repeat, extractors=PDC_EXTRACTORS):
+    """ Time each pseudomonas.com extractor per feature. """
+
+    scraper = PseudomonasDotComScraper(query=pdc_query(strain=strain, feature=features[0]))
+    scraper.connect()
+
+    results = {}
+    for feature in features:
+        feature_url = scraper._get_feature_url(pdc_query(strain=strain, feature=feature))
+        results[feature] = {}
+        for extractor in extractors:
+            logging.info("Benchmarking %s for %s.", extractor, feature)
+            results[feature][extractor] = measure(lambda: getattr(scraper, extractor)(feature_url), repeat=repeat)
+
+    return results
+
+
+def benchmark_stringdb(taxonId, features, repeat, methods=STDB_METHODS):
+    """ Time each string-db.org method per feature. """
+
+    results = {}
+    for feature in features:
+        scraper = StringDBScraper(query=stringdb_query(taxonId=taxonId, features=[_stdb_name(feature)]))
+        scraper.connect()
+        scraper.update_features()
+
+        results[feature] = {}
+        for method in methods:
+            logging.info("Benchmarking %s for %s.", method, feature)
+            results[feature][method] = measure(getattr(scraper, method), repeat=repeat)
+
+    return results
+
+
+def benchmark_end_to_end(strain, features, jobs, executor='thread'):
+    """ Run complete queries serially and concurrently, return features per second for both. Worker processes are started (and load the cassette) before the clock starts. """
+
+    results = {}
+
+    start = time.perf_counter()
+    for feature in features:
+        _run_feature(strain, feature)
+    elapsed = time.perf_counter() - start
+    results['serial'] = dict(seconds=elapsed, features_per_second=len(features) / elapsed)
+
+    if jobs > 1:
+        executor_class = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+        cassette = web_utilities.active_cassette()
+        kwargs = {} if executor == 'thread' else dict(initializer=_init_worker, initargs=(cassette.path if cassette else None, cassette.mode if cassette else None))
+
+        with executor_class(max_workers=jobs, **kwargs) as pool:
+            list(pool.map(_noop, range(jobs)))
+
+            start = time.perf_counter()
+            list(pool.map(_run_feature, [strain]*len(features), features))
+            elapsed = time.perf_counter() - start
+        results['concurrent'] = dict(jobs=jobs, executor=executor, seconds=elapsed, features_per_second=len(features) / elapsed)
+
+    return results
+
+
+def _run_feature(strain, feature):
+    """ Run the complete query for one feature, as the batch generator does. """
+
+    scraper = PseudomonasDotComScraper(query=pdc_query(strain=strain, feature=feature))
+    scraper.connect()
+    scraper.run_query()
+
+    return scraper.results
+
+
+def _init_worker(cassette, mode):
+    """ Activate (and preload) the cassette in a worker process. """
+
+    if cassette is not None:
+        _preload(web_utilities.set_cassette(cassette, mode))
+
+
+def _preload(cassette):
+    """ Read and decode the recorded responses up front, so timings cover the parsing only. """
+
+    if cassette.mode != 'record':
+        logging.info("Preloaded %d responses from %s.", cassette.preload(), cassette.path)
+
+
+def _noop(i):
+    """ Task to start the worker processes before timing. """
+
+    return i
+
+
+def _stdb_name(feature):
+    """ Convert a locus tag to the string-db.org naming convention (pflu0916 -> pflu_0916). """
+
+    return PATTERNS['string_name'].sub(r'\1_', feature)
+
+
+if __name__ == "__main__":
+
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Benchmark scraper parsing and throughput on recorded responses.")
+
+    parser.add_argument("-c", "--cassette", dest="cassette", default=None, help="Cassette directory to replay (and record) responses.")
+    parser.add_argument("-m", "--mode", dest="mode", default="replay", choices=["replay", "once", "record"], help="Cassette mode.")
+    parser.add_argument("-s", "--strain", dest="strain", default="sbw25", help="The strain to query.")
+    parser.add_argument("-t", "--taxonId", dest="taxonId", default="216595", help="The NCBI taxon id for string-db.org.")
+    parser.add_argument("-f", "--features", dest="features", nargs="+", default=["pflu0916"], help="Features to benchmark.")
+    parser.add_argument("-r", "--repeat", dest="repeat", type=int, default=5, help="Number of repetitions per extractor.")
+    parser.add_argument("-j", "--jobs", dest="jobs", type=int, default=4, help="Number of concurrent workers for the end-to-end benchmark.")
+    parser.add_argument("-e", "--executor", dest="executor", default="thread", choices=["thread", "process"], help="Concurrency model for the end-to-end benchmark.")
+    parser.add_argument("--skip", dest="skip", nargs="*", default=[], choices=["extractors", "stringdb", "end-to-end"], help="Benchmark groups to skip.")
+    parser.add_argument("-o", "--outdir", dest="outdir", default=RESULTS_DIR, help="Where to write the results.")
+    parser.add_argument("--compare", dest="compare", default=None, help="Result file of a previous run to compare against.")
+
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.cassette is not None:
+        _preload(web_utilities.set_cassette(args.cassette, args.mode))
+
+    results = dict(config=dict(strain=args.strain, taxonId=args.taxonId, features=args.features, repeat=args.repeat, jobs=args.jobs, executor=args.executor, cassette=args.cassette))
+
+    if "extractors" not in args.skip:
+        results['extractors'] = benchmark_extractors(args.strain, args.features, args.repeat)
+    if "stringdb" not in args.skip:
+        results['stringdb'] = benchmark_stringdb(args.taxonId, args.features, args.repeat)
+    if "end-to-end" not in args.skip:
+        results['end_to_end'] = benchmark_end_to_end(args.strain, args.features, args.jobs, args.executor)
+
+    path = write_results('scrapers', results, args.outdir)
+    print(path)
+
+    if args.compare is not None:
+        print_comparison(compare_results(args.compare, path))
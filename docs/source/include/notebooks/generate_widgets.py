@@ -2,6 +2,8 @@ import json
 from ipywidgets.embed import embed_data
 import os, sys
 import GenDBScraper.Utilities.nb_utilities as nbu
+from GenDBScraper.Utilities import static_renderer
+from GenDBScraper.Utilities.compression_utilities import precompress
 
 out_path = '/var/www/sbw25'
 
@@ -10,6 +12,15 @@ if __name__ == "__main__":
     strain = sys.argv[1]
     locus_tag = sys.argv[2]
 
+    # 'widgets' (default) embeds the notebook widget state, 'static' writes a page for the shared grid bundle, tab data in shards loaded on demand.
+    renderer = sys.argv[3] if len(sys.argv) > 3 else 'widgets'
+
+    if renderer == 'static':
+        data = static_renderer.feature_data(strain, locus_tag, nbu.run_pdc(strain, locus_tag), nbu.run_stdb(locus_tag))
+        precompress(static_renderer.write_bundle(out_path))
+        precompress(static_renderer.write_feature(data, out_path))
+        sys.exit(0)
+
     # Get data from pseudomonas.com and corresponding grid
     pdc_grid = nbu.get_grids(nbu.run_pdc(strain, locus_tag))
 
@@ -29,5 +40,9 @@ if __name__ == "__main__":
                                                                     widget_views=widget_views,
                                                                     okm = nbu.feature_okm_js(locus_tag),
                                                                     ) 
-    with open(os.path.join(out_path,'{}_{}.html'.format(strain, locus_tag)), 'w') as fp:
-        fp.write(rendered_template)
\ No newline at end of file
+    path = os.path.join(out_path,'{}_{}.html'.format(strain, locus_tag))
+    with open(path, 'w') as fp:
+        fp.write(rendered_template)
+
+    # .gz/.br siblings for server.py
+    precompress(path)
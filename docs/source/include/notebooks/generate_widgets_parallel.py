@@ -4,11 +4,15 @@ import os, sys
 import logging
 import json
 import GenDBScraper.Utilities.nb_utilities as nbu
+from GenDBScraper.Utilities import profiling, static_renderer
+from GenDBScraper.Utilities.compression_utilities import precompress
+from GenDBScraper.Utilities.page_store import LAYOUTS, page_dir, page_path, relative_url, pack_directory
+from functools import partial
 from multiprocessing import Pool
 
 OUT_PATH = '/var/www/sbw25'
 
-def process_tag(tag):
+def process_tag(tag, renderer='widgets', layout='flat'):
     strain = "sbw25"
     locus_tag = r'pflu{0:04d}'.format(tag)
 
@@ -16,6 +20,24 @@ def process_tag(tag):
 
     # Get data from pseudomonas.com and corresponding grid
     try:
+        if renderer == 'static':
+            # Page with the tab manifest, tables in per tab shards loaded on demand.
+            data = static_renderer.feature_data(strain, locus_tag, nbu.run_pdc(strain, locus_tag), nbu.run_stdb(locus_tag))
+            outdir = page_dir(OUT_PATH, strain, locus_tag, layout)
+            os.makedirs(outdir, exist_ok=True)
+            bundle_url = relative_url(OUT_PATH, static_renderer.BUNDLE_NAME, strain, locus_tag, layout)
+            precompress(static_renderer.write_feature(data, outdir, bundle_url))
+            return 0
+
+        if renderer == 'json':
+            data = static_renderer.feature_data(strain, locus_tag, nbu.run_pdc(strain, locus_tag), nbu.run_stdb(locus_tag))
+            path = page_path(OUT_PATH, strain, locus_tag, layout, suffix='.json')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as fp:
+                fp.write(static_renderer.render_json(data))
+            precompress(path)
+            return 0
+
         pdc_grid = nbu.get_grids(nbu.run_pdc(strain, locus_tag))
 
         # Get data from strings-db and the corresponding grid
@@ -34,8 +56,13 @@ def process_tag(tag):
                                                                         widget_views=widget_views,
                                                                         okm = nbu.feature_okm_js(locus_tag),
                                                                         )
-        with open(os.path.join(OUT_PATH,'{}_{}.html'.format(strain, locus_tag)), 'w') as fp:
+        path = page_path(OUT_PATH, strain, locus_tag, layout)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fp:
             fp.write(rendered_template)
+
+        # .gz/.br siblings for server.py
+        precompress(path)
         return 0
 
     except:
@@ -43,12 +70,36 @@ def process_tag(tag):
 
 if __name__ == "__main__":
 
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser()
+    parser.add_argument("--profile", dest="profile", default=None, help="Profile every worker and write the merged profile, folded stacks and summary to this directory.")
+    parser.add_argument("--profile-top", dest="profile_top", type=int, default=profiling.DEFAULT_TOP, help="Number of functions in the profile summary.")
+    parser.add_argument("--renderer", dest="renderer", choices=['widgets', 'static', 'json'], default='widgets', help="Embed the notebook widgets, write static html pages with lazily loaded tabs for the shared grid bundle or write the bare json data.")
+    parser.add_argument("--layout", dest="layout", choices=LAYOUTS, default='flat', help="Write all pages into one directory or into <strain>/<locus tag prefix>/ subdirectories.")
+    parser.add_argument("--pack", dest="pack", default=None, help="Also pack all pages into this archive, served by server.py.")
+    args = parser.parse_args()
+
     #tags = range(1,6102)
     tags = range(3957, 6102)
 
     nproc = 20
 
-    pool = Pool(nproc)
+    # Connect each worker process once, scrapers and caches are reused for all its tags.
+    pool = Pool(nproc, initializer=nbu.get_worker)
+
+    task = partial(process_tag, renderer=args.renderer, layout=args.layout)
+    if args.renderer == 'static':
+        precompress(static_renderer.write_bundle(OUT_PATH))
+
+    if args.profile is None:
+        print(pool.map(task, tags))
+    else:
+        # Per call dumps go to a fresh subdirectory (removed after merging), the merged report to the profile directory.
+        with profiling.dump_directory(args.profile) as dumps:
+            print(pool.map(profiling.ProfiledTask(task, dumps), tags))
+            profiling.write_report(profiling.merge_profiles(dumps), args.profile, args.profile_top)
 
-    print(pool.map(process_tag, tags))
+    if args.pack is not None:
+        logging.info("Packed %d files into %s .", pack_directory(OUT_PATH, args.pack), args.pack)
 
@@ -22,15 +22,23 @@ USAGE:
 
     sudo python twisted-web-ssl.py     # serve the current folder
     sudo python twisted-web-ssl.py /home
+    sudo python twisted-web-ssl.py /var/www/sbw25.pack     # serve a page archive (see GenDBScraper.Utilities.page_store)
+
+Files with precompressed siblings (page.html.br, page.html.gz, see GenDBScraper.Utilities.compression_utilities) are served
+compressed to clients accepting the encoding. Responses carry ETag and Cache-Control headers, range requests are supported.
 """
 import os
 import sys
+from urllib.parse import unquote
+
+from GenDBScraper.Utilities.page_store import PageArchive
+from GenDBScraper.Utilities.static_serving import MAX_AGE, file_etag, guess_content_type, select_variant, static_response
 
 from twisted.web.static import File
-from zope.interface import implements
+from zope.interface import implementer
 from twisted.python import log
 from twisted.internet import reactor, ssl
-from twisted.web import server, resource, guard
+from twisted.web import http, server, resource, guard
 from twisted.cred.portal import IRealm, Portal
 from twisted.cred.checkers import InMemoryUsernamePasswordDatabaseDontUse
 from twisted.python.log import startLogging
@@ -43,16 +51,94 @@ sslContext = ssl.DefaultOpenSSLContextFactory(
     'cert.pem'
 )
 
+class PrecompressedFile(File):
+    """ Static file serving a precompressed sibling if the client accepts its encoding, with ETag, Cache-Control and range support (see GenDBScraper.Utilities.static_serving). Directories are handled by File. """
+
+    def render_GET(self, request):
+        if not self.isfile():
+            return File.render_GET(self, request)
+
+        variant, encoding = select_variant(self.path, os.path.isfile, request.getHeader(b'accept-encoding'))
+        response = static_response(_request_headers(request), file_etag(variant, encoding), os.path.getsize(variant), guess_content_type(self.path), encoding, MAX_AGE)
+
+        return _render(request, response, lambda start, end: _read(variant, start, end))
+
+    render_HEAD = render_GET
+
+
+class ArchiveResource(resource.Resource):
+    """ Serves the files of a page archive from its memory map, with the same encoding negotiation, headers and range support as PrecompressedFile. """
+
+    isLeaf = True
+
+    def __init__(self, archive):
+        resource.Resource.__init__(self)
+        self.archive = archive
+
+    def render_GET(self, request):
+        name = unquote(request.path.decode('utf-8')).lstrip('/')
+        if name == '' or name.endswith('/'):
+            name += 'index.html'
+
+        if name not in self.archive:
+            request.setResponseCode(http.NOT_FOUND)
+            return b'Not found.'
+
+        variant, encoding = select_variant(name, self.archive.__contains__, request.getHeader(b'accept-encoding'))
+        data = self.archive[variant]
+        etag = '"{0:08x}-{1:s}"'.format(self.archive.crc32(variant), encoding or 'identity')
+        response = static_response(_request_headers(request), etag, len(data), guess_content_type(name), encoding, MAX_AGE)
+
+        return _render(request, response, lambda start, end: bytes(data[start:end]))
+
+    render_HEAD = render_GET
+
+
+def _request_headers(request):
+    """ The request headers static_response() looks at. """
+
+    return {'if-none-match': request.getHeader(b'if-none-match'), 'range': request.getHeader(b'range')}
+
+
+def _render(request, response, read):
+    """ Apply status and headers of a static_response() and return the body read with read(start, end). """
+
+    status, headers, byte_range = response
+
+    request.setResponseCode(status)
+    for name, value in headers.items():
+        request.setHeader(name.encode('ascii'), value.encode('ascii'))
+
+    if byte_range is None or request.method == b'HEAD':
+        return b''
+
+    return read(*byte_range)
+
+
+def _read(path, start, end):
+    """ Read bytes start to end of a file. """
+
+    with open(path, 'rb') as fp:
+        fp.seek(start)
+        return fp.read(end - start)
+
+
+@implementer(IRealm)
 class SimpleRealm(object):
-    implements(IRealm)
 
     def __init__(self, path):
         self.path = path
 
+        # One resource shared by all sessions, archives are mapped once.
+        if os.path.isfile(path):
+            self.resource = ArchiveResource(PageArchive(path))
+        else:
+            self.resource = PrecompressedFile(path)
+
     def requestAvatar(self, avatarId, mind, *interfaces):
 
         if resource.IResource in interfaces:
-            return resource.IResource, File(self.path), lambda: None
+            return resource.IResource, self.resource, lambda: None
 
         raise NotImplementedError()
 
@@ -0,0 +1,134 @@
+""" :module AnnotationIndexTest: Test module for the annotation_index module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.annotation_index import AnnotationIndex, feature_annotations, xref_kind
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+import json
+import os
+import pandas
+import tempfile
+import unittest
+
+
+def _panels(go_terms=(), interpro=(), xrefs=()):
+    """ Return pseudomonas.com results of one feature with function and cross-reference tables as written to result files. """
+
+    go = pandas.DataFrame({'Accession': [a for a, t in go_terms], 'GO Term': [t for a, t in go_terms]})
+    ipr = pandas.DataFrame({'Interpro Accession': [a for a, t in interpro], 'Interpro Short Name': [t for a, t in interpro]})
+    refs = pandas.DataFrame({'type': [t for t, i in xrefs], 'id': [i for t, i in xrefs], 'url': [None] * len(xrefs)})
+
+    return {'Overview': {'Cross-References': refs.to_json()},
+            'Function/Pathways/GO': {'Gene Ontology': go.to_json(),
+                                     'Functional Predictions from Interpro': ipr,
+                                     },
+            }
+
+
+RESULTS = {'sbw25__pflu0916': _panels([('GO:0052621', 'diguanylate cyclase activity'), ('GO:0006810', 'transport')],
+                                      [('IPR000160', 'GGDEF_dom')],
+                                      [('RefSeq', 'YP_002870447.1'), ('UniProtKB Accession', 'C3K5I3')]),
+           'sbw25__pflu0917': _panels([('GO:0006810', 'transport'), ('GO:0006810', 'transport')],
+                                      xrefs=[('RefSeq', 'YP_002870448.1')]),
+           'pf01__pfl_0001': _panels([('go:0006810', 'transport')]),
+           }
+
+
+class AnnotationIndexTest(unittest.TestCase):
+    """ :class: Test class for the annotation_index module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_feature_annotations (self):
+        """ Test extracting the annotations of a feature. """
+
+        self.assertEqual(xref_kind(' UniProtKB Accession'), 'uniprotkb_accession')
+
+        annotations = feature_annotations(RESULTS['sbw25__pflu0916'])
+        self.assertEqual(annotations, [('go', 'GO:0052621', 'diguanylate cyclase activity'),
+                                       ('go', 'GO:0006810', 'transport'),
+                                       ('interpro', 'IPR000160', 'GGDEF_dom'),
+                                       ('refseq', 'YP_002870447.1', None),
+                                       ('uniprotkb_accession', 'C3K5I3', None),
+                                       ])
+
+        # Duplicates are dropped.
+        self.assertEqual(feature_annotations(RESULTS['sbw25__pflu0917']), [('go', 'GO:0006810', 'transport'), ('refseq', 'YP_002870448.1', None)])
+        self.assertEqual(feature_annotations({}), [])
+
+        # Older, ungrouped result files with the cross-reference type as index.
+        with open(os.path.join('test_files', 'sbw25.pflu0916.json')) as fp:
+            annotations = feature_annotations(json.load(fp))
+        self.assertIn(('go', 'GO:0007165', 'signal transduction'), annotations)
+        self.assertIn(('interpro', 'IPR033479', 'Double Cache domain 1'), annotations)
+        self.assertIn(('uniprotkb_acc', 'C3KBK5', None), annotations)
+
+    def test_lookup (self):
+        """ Test looking up features by accession. """
+
+        with AnnotationIndex() as index:
+            self.assertEqual(index.add_results(RESULTS), 3)
+            self.assertEqual(len(index), 3)
+
+            self.assertEqual(index.loci('GO:0006810'), [('pf01', 'pfl_0001'), ('sbw25', 'pflu0916'), ('sbw25', 'pflu0917')])
+            self.assertEqual(index.loci('go:0006810', kind='go', strain='sbw25'), [('sbw25', 'pflu0916'), ('sbw25', 'pflu0917')])
+            self.assertEqual(index.loci('ipr000160', kind='interpro'), [('sbw25', 'pflu0916')])
+            self.assertEqual(index.loci('YP_002870448.1'), [('sbw25', 'pflu0917')])
+            self.assertEqual(index.loci('C3K5I3', kind='refseq'), [])
+
+            self.assertEqual(index.counts('go').values.tolist(), [['GO:0006810', 3], ['GO:0052621', 1]])
+
+    def test_update (self):
+        """ Test that adding a feature again replaces its annotations. """
+
+        with AnnotationIndex() as index:
+            index.add_results(RESULTS)
+            index.add('sbw25', 'pflu0916', [('go', 'GO:0003677', 'DNA binding')])
+
+            self.assertEqual(index.annotations('sbw25', 'pflu0916'), [('go', 'GO:0003677', 'DNA binding')])
+            self.assertEqual(index.loci('GO:0006810'), [('pf01', 'pfl_0001'), ('sbw25', 'pflu0917')])
+            self.assertEqual(index.loci('IPR000160'), [])
+
+    def test_persistence_and_export (self):
+        """ Test reopening the database and exporting the index. """
+
+        directory = tempfile.mkdtemp()
+        self._test_files.append(directory)
+        path = os.path.join(directory, 'annotations.sqlite')
+
+        with AnnotationIndex(path) as index:
+            index.add_results(RESULTS)
+
+        with AnnotationIndex(path) as index:
+            self.assertEqual(len(index), 3)
+
+            table = index.export(kind='refseq', path=os.path.join(directory, 'refseq.csv'))
+            self.assertEqual(list(table.columns), ['accession', 'kind', 'strain', 'locus_tag', 'label'])
+            self.assertEqual(table['locus_tag'].tolist(), ['pflu0916', 'pflu0917'])
+            self.assertEqual(len(index.export()), 8)
+
+        self.assertEqual(pandas.read_csv(os.path.join(directory, 'refseq.csv'))['accession'].tolist(), ['YP_002870447.1', 'YP_002870448.1'])
@@ -0,0 +1,157 @@
+""" :module BulkImportTest: Test module for the bulk_import module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.bulk_import import BulkImporter, fill_gaps, read_feature_table, read_gff
+from GenDBScraper.Utilities.annotation_index import feature_annotations
+from GenDBScraper.Utilities.search_index import feature_terms
+from GenDBScraper.PseudomonasDotComScraper import PseudomonasDotComScraper
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+import json
+import os
+import pandas
+import tempfile
+import unittest
+
+
+class RecordingScraper():
+    """ Stands in for a connected PseudomonasDotComScraper, records the panels requested per query. """
+
+    def __init__(self):
+        self.requests = []
+
+    def run_panels(self, query, titles):
+        self.requests.append((query.strain, query.feature, sorted(titles)))
+        return {title: pandas.DataFrame() for title in titles}
+
+
+class BulkImportTest(unittest.TestCase):
+    """ :class: Test class for the bulk_import module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+        self._importer = BulkImporter('sbw25', organism='Pseudomonas fluorescens SBW25')
+        self._importer.read_features(os.path.join('test_files', 'sbw25_bulk.gff'))
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_read_gff (self):
+        """ Test merging the gene and CDS rows of a GFF file. """
+
+        features = read_gff(os.path.join('test_files', 'sbw25_bulk.gff'))
+
+        self.assertEqual(features['locus_tag'].tolist(), ['PFLU0916', 'PFLU0917', 'PFLU_t01'])
+        self.assertEqual(features['type'].tolist(), ['CDS', 'CDS', 'tRNA'])
+        self.assertEqual(features['name'].tolist()[1], 'wspR')
+        self.assertTrue(pandas.isna(features['name'][0]))
+        self.assertEqual(features['product'][1], 'diguanylate cyclase; response regulator')
+        self.assertEqual(features['start'][0], 1015719)
+        self.assertEqual(features['xrefs'][0], [('RefSeq', 'YP_002870578.1'), ('Entrez', '7816631'), ('GI', '229588459')])
+
+    def test_read_feature_table (self):
+        """ Test reading a feature table with pseudomonas.com headers. """
+
+        features = read_feature_table(os.path.join('test_files', 'sbw25_bulk_features.csv'))
+
+        self.assertEqual(features['locus_tag'].tolist(), ['PFLU0916', 'PFLU0917'])
+        self.assertEqual(features['replicon'].tolist(), ['chromosome', 'chromosome'])
+        self.assertEqual(features['name'][1], 'wspR')
+        self.assertEqual(features['end'][1], 1019055)
+
+    def test_panels (self):
+        """ Test the panel layout of imported features. """
+
+        self.assertEqual(self._importer.read_go(os.path.join('test_files', 'sbw25_bulk_go.tsv')), 2)
+        self.assertEqual(self._importer.read_sequences(os.path.join('test_files', 'sbw25_bulk.faa')), 2)
+        self.assertEqual(self._importer.panels, ['Overview', 'Sequences', 'Function/Pathways/GO'])
+
+        results = self._importer.results()
+        self.assertEqual(list(results), ['sbw25__pflu0916', 'sbw25__pflu0917', 'sbw25__pflu_t01'])
+
+        panels = results['sbw25__pflu0917']
+        overview = panels['Overview']['Gene Feature Overview']
+        self.assertEqual(overview[1].tolist()[:4], ['Pseudomonas fluorescens SBW25', 'PFLU0917', 'wspR', 'NC_012660.1'])
+        self.assertEqual(overview[1][4], '1018030  - 1019055 (+ strand)')
+
+        self.assertEqual(panels['Sequences'][1][0], '>PGD115738|PFLU0917 wspR [Pseudomonas fluorescens SBW25]\nMTTQDPA')
+
+        go = panels['Function/Pathways/GO']['Gene Ontology']
+        self.assertEqual(go['Accession'].tolist(), ['GO:0052621'])
+        self.assertEqual(list(go.columns), ['Ontology', 'Accession', 'Term', 'GO Evidence', 'Reference'])
+        self.assertEqual(go['Ontology'][0], 'Molecular Function')
+        self.assertEqual(go['Reference'][0], '15522076')
+
+        # Features without annotations or sequences get empty tables.
+        self.assertTrue(results['sbw25__pflu_t01']['Function/Pathways/GO']['Gene Ontology'].empty)
+        self.assertTrue(results['sbw25__pflu_t01']['Sequences'].empty)
+
+        # The indexes read imported results.
+        self.assertIn(('name', 'wspR'), feature_terms(panels))
+        self.assertIn(('refseq', 'YP_002870579.1', None), feature_annotations(panels))
+
+    def test_read_sequences_first (self):
+        """ Test that sequences need the features. """
+
+        importer = BulkImporter('sbw25')
+        self.assertRaises(RuntimeError, importer.read_sequences, os.path.join('test_files', 'sbw25_bulk.faa'))
+        self.assertRaises(ValueError, self._importer.read_sequences, os.path.join('test_files', 'sbw25_bulk.gff'))
+
+    def test_normalize (self):
+        """ Test converting panels to compact dtypes on request. """
+
+        importer = BulkImporter('sbw25', normalize=True)
+        importer.read_features(os.path.join('test_files', 'sbw25_bulk.gff'))
+
+        self.assertEqual(str(importer.feature_panels('PFLU0916')['Overview']['Gene Feature Overview'][0].dtype), 'category')
+        self.assertNotEqual(str(self._importer.feature_panels('PFLU0916')['Overview']['Gene Feature Overview'][0].dtype), 'category')
+
+    def test_fill_gaps (self):
+        """ Test scraping only missing panels. """
+
+        results = self._importer.results()
+        results['sbw25__pflu0917']['Operons'] = {}
+
+        scraper = RecordingScraper()
+        count = fill_gaps(results, scraper, ['Overview', 'Operons'], features=['sbw25__pflu0916', 'sbw25__pflu0917', 'sbw25__pflu0001'])
+
+        self.assertEqual(count, 2)
+        self.assertEqual(scraper.requests[0], ('sbw25', 'pflu0916', ['Operons']))
+        self.assertEqual(scraper.requests[1][:2], ('sbw25', 'pflu0001'))
+        self.assertEqual(len(scraper.requests[1][2]), 8)
+        self.assertIn('Operons', results['sbw25__pflu0916'])
+        self.assertIn('Updates', results['sbw25__pflu0001'])
+
+    def test_to_json (self):
+        """ Test writing imported results like scraped ones. """
+
+        path = os.path.join(tempfile.mkdtemp(), 'sbw25.json')
+        self._test_files.append(os.path.dirname(path))
+
+        PseudomonasDotComScraper().to_json(self._importer.results(), path)
+
+        with open(path) as fp:
+            results = json.load(fp)
+        self.assertEqual(len(results), 3)
+        self.assertIn(('product', 'putative methyl-accepting chemotaxis protein'), feature_terms(results['sbw25__pflu0916']))
@@ -0,0 +1,112 @@
+""" :module CompressionUtilitiesTest: Test module for the compression_utilities module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.compression_utilities import compress, precompress, precompress_tree, brotli_available
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+
+class CompressionUtilitiesTest(unittest.TestCase):
+    """ :class: Test class for the compression_utilities module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+        self._outdir = tempfile.mkdtemp()
+        self._test_files.append(self._outdir)
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def write(self, name, content):
+        path = os.path.join(self._outdir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fp:
+            fp.write(content)
+        return path
+
+    def test_compress (self):
+        """ Test that gzip output is reproducible. """
+
+        data = b"<table><tr><td>PFLU0916</td></tr></table>" * 100
+
+        self.assertEqual(gzip.decompress(compress(data, 'gzip')), data)
+        self.assertEqual(compress(data, 'gzip'), compress(data, 'gzip'))
+        self.assertRaises(ValueError, compress, data, 'deflate')
+
+    def test_precompress (self):
+        """ Test writing, keeping and removing siblings. """
+
+        page = self.write('sbw25_pflu0916.html', "<table><tr><td>PFLU0916</td></tr></table>\n" * 100)
+
+        siblings = precompress(page, suffixes=('.gz',))
+        self.assertEqual(siblings, [page + '.gz'])
+        with gzip.open(page + '.gz', 'rt') as fp, open(page) as original:
+            self.assertEqual(fp.read(), original.read())
+
+        # Up to date siblings are kept.
+        mtime = os.stat(page + '.gz').st_mtime
+        precompress(page, suffixes=('.gz',))
+        self.assertEqual(os.stat(page + '.gz').st_mtime, mtime)
+
+        # Files too small to gain are not compressed, stale siblings are removed.
+        with open(page, 'w') as fp:
+            fp.write("<p/>")
+        os.utime(page, (mtime + 10, mtime + 10))
+        self.assertEqual(precompress(page, suffixes=('.gz',)), [])
+        self.assertFalse(os.path.exists(page + '.gz'))
+
+    @unittest.skipUnless(brotli_available(), "brotli not installed")
+    def test_precompress_brotli (self):
+        """ Test writing brotli siblings. """
+
+        import brotli
+
+        page = self.write('sbw25_pflu0916.html', "<table><tr><td>PFLU0916</td></tr></table>\n" * 100)
+
+        self.assertEqual(precompress(page), [page + '.gz', page + '.br'])
+        with open(page + '.br', 'rb') as fp, open(page, 'rb') as original:
+            self.assertEqual(brotli.decompress(fp.read()), original.read())
+
+    def test_precompress_tree (self):
+        """ Test precompressing a directory of pages. """
+
+        content = "<table><tr><td>PFLU0916</td></tr></table>\n" * 100
+        self.write('sbw25_pflu0001.html', content)
+        self.write('sbw25_pflu0001/manifest.json', '{"tabs": []}' * 100)
+        self.write('sbw25_pflu0001/0-0.json.gz', content)
+        self.write('notes.txt', content)
+
+        self.assertEqual(precompress_tree(self._outdir), 2)
+        self.assertTrue(os.path.isfile(os.path.join(self._outdir, 'sbw25_pflu0001.html.gz')))
+        self.assertTrue(os.path.isfile(os.path.join(self._outdir, 'sbw25_pflu0001', 'manifest.json.gz')))
+        self.assertFalse(os.path.exists(os.path.join(self._outdir, 'sbw25_pflu0001', '0-0.json.gz.gz')))
+        self.assertFalse(os.path.exists(os.path.join(self._outdir, 'notes.txt.gz')))
+
+
+if __name__ == '__main__':
+    unittest.main()
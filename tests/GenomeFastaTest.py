@@ -0,0 +1,179 @@
+""" :module GenomeFastaTest: Test module for the genome_fasta module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.genome_fasta import GenomeFasta, SequenceService, build_index, read_index, reverse_complement, translate
+from GenDBScraper.Utilities.bulk_import import BulkImporter
+from GenDBScraper.Utilities.sequence_utilities import DOWNSTREAM_TAG, GENE_TAG, PROTEIN_TAG, UPSTREAM_TAG, sequence_record
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+import os
+import pandas
+import random
+import tempfile
+import unittest
+
+# A CDS on the forward strand at 101-130 and one with alternative start codon on the reverse strand at 181-201.
+FORWARD_CDS = "ATGGCTAAAGAAGATCTGCGTTTCGGCTAA"
+REVERSE_CDS = "GTGAAACCCGGGTTTAAATGA"
+
+
+def _genome():
+    """ Return the chromosome and plasmid sequences. """
+
+    rng = random.Random(1)
+    bases = lambda n: "".join(rng.choice("ACGT") for i in range(n))
+
+    chromosome = bases(100) + FORWARD_CDS + bases(50) + reverse_complement(REVERSE_CDS) + bases(99)
+    plasmid = bases(150)
+
+    return chromosome, plasmid
+
+
+def _features():
+    return pandas.DataFrame({'locus_tag': ['TEST0001', 'TEST0002', 'TEST_t01'],
+                             'replicon': ['chromosome', 'chromosome', 'plasmid'],
+                             'start': [101, 181, 1],
+                             'end': [130, 201, 20],
+                             'strand': ['+', '-', '+'],
+                             'type': ['CDS', 'CDS', 'tRNA'],
+                             })
+
+
+class GenomeFastaTest(unittest.TestCase):
+    """ :class: Test class for the genome_fasta module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+        directory = tempfile.mkdtemp()
+        self._test_files.append(directory)
+
+        # Chromosome wrapped at 60, plasmid at 70 bases per line.
+        self._chromosome, self._plasmid = _genome()
+        self._path = os.path.join(directory, 'genome.fna')
+        with open(self._path, 'w') as fp:
+            fp.write(">NC_TEST.1 Test chromosome\n")
+            fp.write("".join(self._chromosome[i:i+60].lower() + "\n" for i in range(0, len(self._chromosome), 60)))
+            fp.write(">pTEST plasmid\n")
+            fp.write("".join(self._plasmid[i:i+70] + "\n" for i in range(0, len(self._plasmid), 70)))
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_build_index (self):
+        """ Test the faidx index. """
+
+        entries = build_index(self._path)
+
+        header = len(">NC_TEST.1 Test chromosome\n")
+        chromosome_bytes = len(self._chromosome) + 5
+        self.assertEqual([tuple(e) for e in entries], [('NC_TEST.1', 300, header, 60, 61),
+                                                      ('pTEST', 150, header + chromosome_bytes + len(">pTEST plasmid\n"), 70, 71)])
+        self.assertEqual(read_index(self._path + '.fai'), entries)
+
+        # Records with lines of different length can not be indexed.
+        with open(self._path, 'a') as fp:
+            fp.write(">broken\nACGT\nACGTACGT\n")
+        self.assertRaises(ValueError, build_index, self._path)
+
+    def test_fetch (self):
+        """ Test slicing records across lines. """
+
+        with GenomeFasta(self._path) as genome:
+            self.assertEqual(genome.names, ['NC_TEST.1', 'pTEST'])
+            self.assertEqual(genome.length('pTEST'), 150)
+
+            rng = random.Random(2)
+            for i in range(200):
+                start = rng.randint(1, 300)
+                end = rng.randint(start, 300)
+                self.assertEqual(genome.fetch('NC_TEST.1', start, end), self._chromosome[start-1:end])
+
+            self.assertEqual(genome.fetch('pTEST', 60, 80), self._plasmid[59:80])
+            self.assertEqual(genome.fetch('NC_TEST.1', 181, 201, '-'), REVERSE_CDS)
+
+            # Clipped to the record.
+            self.assertEqual(genome.fetch('pTEST', -10, 5), self._plasmid[:5])
+            self.assertEqual(genome.fetch('pTEST', 140, 200), self._plasmid[139:])
+            self.assertEqual(genome.fetch('pTEST', 200, 210), '')
+
+        # The index is reused.
+        self.assertTrue(os.path.isfile(self._path + '.fai'))
+        with GenomeFasta(self._path) as genome:
+            self.assertEqual(genome.fetch('pTEST', 1, 10), self._plasmid[:10])
+
+    def test_translate (self):
+        """ Test translation with the bacterial code. """
+
+        self.assertEqual(translate(FORWARD_CDS), 'MAKEDLRFG')
+        self.assertEqual(translate(REVERSE_CDS), 'MKPGFK')
+
+        # Incomplete CDSs are translated up to the first stop.
+        self.assertEqual(translate(FORWARD_CDS[:-4]), 'MAKEDLRF')
+        self.assertEqual(reverse_complement('AACGTn'), 'nACGTT')
+
+    def test_panel (self):
+        """ Test the 'Sequences' panel cut from the genome. """
+
+        with GenomeFasta(self._path) as genome:
+            service = SequenceService(genome, _features(), flank=40, replicons={'chromosome': 'NC_TEST.1', 'plasmid': 'pTEST'})
+
+            sequences = service.sequences('test0001')
+            self.assertEqual(sequences[UPSTREAM_TAG], self._chromosome[60:100])
+            self.assertEqual(sequences[GENE_TAG], FORWARD_CDS)
+            self.assertEqual(sequences[DOWNSTREAM_TAG], self._chromosome[130:170])
+            self.assertEqual(sequences[PROTEIN_TAG], 'MAKEDLRFG')
+
+            sequences = service.sequences('TEST0002')
+            self.assertEqual(sequences[UPSTREAM_TAG], reverse_complement(self._chromosome[201:241]))
+            self.assertEqual(sequences[DOWNSTREAM_TAG], reverse_complement(self._chromosome[140:180]))
+            self.assertEqual(sequences[PROTEIN_TAG], 'MKPGFK')
+
+            # No protein for RNA genes.
+            self.assertEqual(list(service.sequences('TEST_t01')), [UPSTREAM_TAG, GENE_TAG, DOWNSTREAM_TAG])
+            self.assertEqual(service.sequences('TEST_t01')[UPSTREAM_TAG], '')
+
+            panel = service.panel('TEST0001')
+            self.assertEqual(panel[0].tolist(), [UPSTREAM_TAG, GENE_TAG, DOWNSTREAM_TAG, PROTEIN_TAG])
+            self.assertEqual(panel[1][1], ">TEST0001 gene sequence length 30\n" + FORWARD_CDS)
+            self.assertEqual(str(sequence_record(panel).seq), 'MAKEDLRFG')
+
+            self.assertRaises(KeyError, service.sequences, 'TEST9999')
+
+            # Replicons must map to records of multi record genomes.
+            self.assertRaises(KeyError, SequenceService(genome, _features()).sequences, 'TEST0001')
+
+    def test_bulk_import (self):
+        """ Test sequences of bulk imported features cut from the genome. """
+
+        features = os.path.join(self._test_files[0], 'features.csv')
+        _features().rename(columns={'locus_tag': 'Locus Tag', 'replicon': 'Sequence', 'type': 'Feature Type'}).replace({'chromosome': 'NC_TEST.1', 'plasmid': 'pTEST'}).to_csv(features, index=False)
+
+        importer = BulkImporter('test')
+        importer.read_features(features)
+        self.assertEqual(importer.read_genome(self._path, flank=40), 2)
+        self.assertEqual(importer.panels, ['Overview', 'Sequences'])
+
+        panel = importer.results()['test__test0002']['Sequences']
+        self.assertEqual(str(sequence_record(panel).seq), 'MKPGFK')
+        self.assertEqual(str(sequence_record(panel, GENE_TAG).seq), REVERSE_CDS)
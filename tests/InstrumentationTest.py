@@ -0,0 +1,138 @@
+""" :module InstrumentationTest: Test module for the instrumentation module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities import instrumentation
+from GenDBScraper.Utilities import web_utilities
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+from TestUtilities.TestUtilities import serve_payloads
+
+# 3rd party imports
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+
+
+class InstrumentationTest(unittest.TestCase):
+    """ :class: Test class for the instrumentation module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+        cls._server, cls._base_url = serve_payloads({
+            '/page': ('text/html', b'<html><body>' + b'x' * 100000 + b'</body></html>'),
+            })
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        cls._server.shutdown()
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+        self._events = []
+        instrumentation.add_sink(self._events.append)
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        instrumentation.remove_sink(self._events.append)
+        _remove_test_files(self._test_files)
+
+    def test_request_event (self):
+        """ Test that a request reports timings and bytes. """
+
+        content = web_utilities.guarded_get(self._base_url+'/page')
+
+        event = self._events[-1]
+        self.assertEqual(event['type'], 'request')
+        self.assertEqual(event['method'], 'GET')
+        self.assertEqual(event['status'], 200)
+        self.assertEqual(event['bytes'], len(content))
+        self.assertGreater(event['ttfb'], 0.0)
+        self.assertGreaterEqual(event['download'], 0.0)
+        self.assertIsNone(event['panel'])
+
+    def test_panel_event (self):
+        """ Test that requests and dataframe construction are accounted to the enclosing panel and feature. """
+
+        with instrumentation.feature('sbw25__pflu0916'):
+            with instrumentation.panel('Overview'):
+                b''.join(web_utilities.guarded_stream(self._base_url+'/page', chunk_size=1024))
+                with instrumentation.dataframe():
+                    pass
+
+        request, panel = self._events
+        self.assertEqual(request['panel'], 'Overview')
+        self.assertEqual(request['feature'], 'sbw25__pflu0916')
+        self.assertEqual(panel['type'], 'panel')
+        self.assertEqual(panel['feature'], 'sbw25__pflu0916')
+        self.assertEqual(panel['requests'], 1)
+        self.assertEqual(panel['bytes'], request['bytes'])
+        self.assertAlmostEqual(panel['network'], request['ttfb'] + request['download'])
+        self.assertAlmostEqual(panel['parse'], max(panel['total'] - panel['network'], 0.0))
+
+    def test_failing_sink (self):
+        """ Test that a failing sink does not break the scraper nor other sinks. """
+
+        def broken(event):
+            raise ValueError()
+
+        instrumentation.add_sink(broken)
+        try:
+            with self.assertLogs(level='ERROR'):
+                web_utilities.guarded_get(self._base_url+'/page')
+        finally:
+            instrumentation.remove_sink(broken)
+
+        self.assertEqual(len(self._events), 1)
+
+    def test_json_lines_sink (self):
+        """ Test writing events as json lines. """
+
+        path = tempfile.mktemp(suffix='.jsonl')
+        self._test_files.append(path)
+
+        sink = instrumentation.add_sink(instrumentation.JSONLinesSink(path))
+        try:
+            web_utilities.guarded_get(self._base_url+'/page')
+            web_utilities.guarded_get(self._base_url+'/page')
+        finally:
+            instrumentation.remove_sink(sink)
+            sink.close()
+
+        with open(path) as fp:
+            events = [json.loads(line) for line in fp]
+
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0]['url'], self._base_url+'/page')
+
+    @unittest.skipUnless(importlib.util.find_spec('prometheus_client'), "prometheus_client not installed.")
+    def test_prometheus_sink (self):
+        """ Test exporting in the prometheus text format. """
+
+        sink = instrumentation.add_sink(instrumentation.PrometheusSink())
+        try:
+            with instrumentation.panel('Overview'):
+                web_utilities.guarded_get(self._base_url+'/page')
+        finally:
+            instrumentation.remove_sink(sink)
+
+        text = sink.text()
+        self.assertIn('gendbscraper_request_seconds_count{host="127.0.0.1",phase="ttfb"} 1.0', text)
+        self.assertIn('gendbscraper_panel_seconds_count{panel="Overview",phase="parse"} 1.0', text)
+
+if __name__ == "__main__":
+    unittest.main()
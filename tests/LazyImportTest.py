@@ -0,0 +1,81 @@
+""" :module LazyImportTest: Test module for the lazy_import module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.lazy_import import lazy_import, is_loaded
+
+# 3rd party imports
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+
+class LazyImportTest(unittest.TestCase):
+    """ :class: Test class for the lazy_import module. """
+
+    def test_lazy_import (self):
+        """ Test that the module is executed on first attribute access only. """
+
+        sys.modules.pop('tabnanny', None)
+
+        tabnanny = lazy_import('tabnanny')
+        self.assertFalse(is_loaded('tabnanny'))
+        self.assertIs(lazy_import('tabnanny'), tabnanny)
+
+        self.assertTrue(callable(tabnanny.check))
+        self.assertTrue(is_loaded('tabnanny'))
+
+    def test_lazy_import_submodule (self):
+        """ Test that submodules are bound to their parent. """
+
+        sys.modules.pop('email.quoprimime', None)
+
+        quoprimime = lazy_import('email.quoprimime')
+        import email
+        self.assertIs(email.quoprimime, quoprimime)
+        self.assertEqual(quoprimime.header_length(b'a'), 1)
+
+    def test_missing_module (self):
+        """ Test that missing modules raise at import time. """
+
+        with self.assertRaises(ImportError):
+            lazy_import('no_such_module_gendbscraper')
+
+        self.assertFalse(is_loaded('no_such_module_gendbscraper'))
+
+    def test_lazy_import_threads (self):
+        """ Test that threads touching a lazy module at once all see the executed module. """
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        with open(os.path.join(tmpdir, 'gendbscraper_slow_module.py'), 'w') as fh:
+            fh.write("import time\ntime.sleep(0.2)\nvalue = 42\n")
+
+        sys.path.insert(0, tmpdir)
+        self.addCleanup(sys.path.remove, tmpdir)
+        self.addCleanup(sys.modules.pop, 'gendbscraper_slow_module', None)
+
+        slow = lazy_import('gendbscraper_slow_module')
+
+        barrier = threading.Barrier(4)
+        results = []
+        def read():
+            barrier.wait()
+            try:
+                results.append(slow.value)
+            except AttributeError as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=read) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [42]*4)
+        self.assertTrue(is_loaded('gendbscraper_slow_module'))
+
+if __name__ == "__main__":
+    unittest.main()
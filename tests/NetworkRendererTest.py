@@ -0,0 +1,98 @@
+""" :module NetworkRendererTest: Test module for the network_renderer module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.network_renderer import render_network_svg, network_hash, cached_network_image, store_image
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+from NetworkStoreTest import interactions_table
+
+# 3rd party imports
+from xml.etree import ElementTree
+import os
+import tempfile
+import unittest
+
+
+class NetworkRendererTest(unittest.TestCase):
+    """ :class: Test class for the network_renderer module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_render_network_svg (self):
+        """ Test that a valid svg with all nodes and edges is rendered. """
+
+        svg = render_network_svg(interactions_table())
+
+        root = ElementTree.fromstring(svg)
+        namespace = '{http://www.w3.org/2000/svg}'
+        self.assertEqual(root.tag, namespace+'svg')
+        self.assertEqual(len(root.findall('.//'+namespace+'circle')), 4)
+        self.assertEqual(len(root.findall('.//'+namespace+'line')), 4)
+        self.assertIn('>PFLU_0001</text>', svg)
+
+    def test_render_deterministic (self):
+        """ Test that row order and edge direction do not change the image. """
+
+        interactions = interactions_table()
+        shuffled = interactions.sample(frac=1.0, random_state=3).reset_index(drop=True)
+        shuffled[['stringId_A', 'stringId_B']] = shuffled[['stringId_B', 'stringId_A']].values
+
+        self.assertEqual(render_network_svg(interactions), render_network_svg(shuffled))
+        self.assertEqual(network_hash(interactions), network_hash(shuffled))
+        self.assertNotEqual(network_hash(interactions), network_hash(interactions, min_score=0.8))
+
+    def test_cached_network_image (self):
+        """ Test that identical networks share one image file. """
+
+        cache_dir = tempfile.mkdtemp(prefix='network_images_')
+        self._test_files.append(cache_dir)
+
+        interactions = interactions_table()
+        path = cached_network_image(interactions, cache_dir=cache_dir)
+        self.assertTrue(os.path.isfile(path))
+        self.assertEqual(os.path.splitext(path)[1], '.svg')
+
+        self.assertEqual(cached_network_image(interactions.iloc[::-1], cache_dir=cache_dir), path)
+        self.assertEqual(os.listdir(cache_dir), [os.path.basename(path)])
+
+        # Other render options give another image.
+        resized = cached_network_image(interactions, cache_dir=cache_dir, width=300, height=300)
+        self.assertNotEqual(resized, path)
+        with open(resized) as fp:
+            self.assertIn('width="300"', fp.read())
+
+    def test_store_image (self):
+        """ Test content addressed storage of downloaded images. """
+
+        cache_dir = tempfile.mkdtemp(prefix='network_images_')
+        self._test_files.append(cache_dir)
+
+        path = store_image(b'\x89PNG', '.png', cache_dir=cache_dir)
+        self.assertEqual(store_image(b'\x89PNG', '.png', cache_dir=cache_dir), path)
+        self.assertNotEqual(store_image(b'\x89PNG2', '.png', cache_dir=cache_dir), path)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+if __name__ == "__main__":
+    unittest.main()
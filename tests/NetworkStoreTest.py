@@ -0,0 +1,184 @@
+""" :module NetworkStoreTest: Test module for the network_store module."""
+
+# Import class to be tested.
+from GenDBScraper.StringDBScraper import stringdb_query
+from GenDBScraper.Utilities.network_store import NetworkStore, CHANNELS, DEFAULT_PARTNER_LIMIT
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+import numpy
+import pandas
+import tempfile
+import unittest
+
+
+def interactions_table():
+    """ Construct a small interactions table in the layout of StringDBScraper.network_interactions(). """
+
+    edges = [('216595.PFLU_0001', '216595.PFLU_0002', 0.9),
+             ('216595.PFLU_0001', '216595.PFLU_0003', 0.5),
+             ('216595.PFLU_0002', '216595.PFLU_0003', 0.7),
+             ('216595.PFLU_0003', '216595.PFLU_0004', 0.95),
+             # Duplicate in reverse direction.
+             ('216595.PFLU_0002', '216595.PFLU_0001', 0.9),
+             ]
+
+    df = pandas.DataFrame(edges, columns=['stringId_A', 'stringId_B', 'score'])
+    df['ncbiTaxonId'] = 216595
+    for channel in CHANNELS[1:]:
+        df[channel] = 0.1
+
+    return df
+
+
+class PartnersScraper():
+    """ Stand-in for the StringDBScraper, answers interaction_partners() from interactions_table(). """
+
+    def __init__(self):
+        self.query = stringdb_query(taxonId='216595', features=['pflu_0001'])
+        self.requests = []
+        self.limits = []
+
+    def interaction_partners(self, required_score=None, limit=None):
+        self.requests.append(list(self.query.features))
+        self.limits.append(limit)
+        table = interactions_table()
+        # Partners are reported from the side of the query feature.
+        flipped = table.rename(columns={'stringId_A': 'stringId_B', 'stringId_B': 'stringId_A'})
+        table = pandas.concat([table, flipped], ignore_index=True)
+        queried = ['216595.' + feature.upper() for feature in self.query.features]
+
+        return table[table['stringId_A'].isin(queried)].reset_index(drop=True)
+
+
+class NetworkStoreTest(unittest.TestCase):
+    """ :class: Test class for the NetworkStore """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_build (self):
+        """ Test building the CSR arrays. """
+
+        store = NetworkStore()
+        store.add_interactions(interactions_table())
+        store.build()
+
+        self.assertEqual(store.taxonId, '216595')
+        self.assertEqual(len(store.nodes), 4)
+        self.assertEqual(store.number_of_edges, 4)
+        self.assertEqual(store.degree('216595.PFLU_0003'), 3)
+        self.assertEqual(store.degree('216595.PFLU_9999'), 0)
+
+    def test_neighbours (self):
+        """ Test neighbour queries. """
+
+        store = NetworkStore()
+        store.add_interactions(interactions_table())
+        store.build()
+
+        neighbours = store.neighbours('216595.PFLU_0003')
+        self.assertEqual(neighbours['stringId_B'].tolist(), ['216595.PFLU_0004', '216595.PFLU_0002', '216595.PFLU_0001'])
+        self.assertEqual(neighbours['stringId_A'].unique().tolist(), ['216595.PFLU_0003'])
+        self.assertEqual(list(neighbours.columns), ['stringId_A', 'stringId_B', 'ncbiTaxonId'] + list(CHANNELS))
+
+        neighbours = store.neighbours('216595.PFLU_0003', min_score=0.6)
+        self.assertEqual(len(neighbours.index), 2)
+
+        self.assertTrue(store.neighbours('216595.PFLU_9999').empty)
+
+    def test_subnetwork (self):
+        """ Test subnetwork queries. """
+
+        store = NetworkStore()
+        store.add_interactions(interactions_table())
+        store.build()
+
+        subnetwork = store.subnetwork(['216595.PFLU_0001', '216595.PFLU_0002', '216595.PFLU_0003'])
+        self.assertEqual(len(subnetwork.index), 3)
+        numpy.testing.assert_allclose(sorted(subnetwork['score']), [0.5, 0.7, 0.9], rtol=1e-6)
+
+        subnetwork = store.subnetwork(['216595.PFLU_0001', '216595.PFLU_0002', '216595.PFLU_0003'], min_score=0.8)
+        self.assertEqual(len(subnetwork.index), 1)
+
+    def test_incremental_build (self):
+        """ Test adding interactions to a built store. """
+
+        store = NetworkStore()
+        store.add_interactions(interactions_table())
+        store.build()
+
+        store.add_interactions(pandas.DataFrame({'stringId_A': ['216595.PFLU_0005'], 'stringId_B': ['216595.PFLU_0001'], 'score': [0.4]}))
+        store.build()
+
+        self.assertEqual(store.number_of_edges, 5)
+        self.assertEqual(store.degree('216595.PFLU_0001'), 3)
+        self.assertTrue(numpy.isnan(store.neighbours('216595.PFLU_0005')['nscore'].iloc[0]))
+
+    def test_from_scraper (self):
+        """ Test fetching interaction partners in batches. """
+
+        scraper = PartnersScraper()
+        store = NetworkStore.from_scraper(scraper, ['pflu_0001', 'pflu_0002', 'pflu_0003', 'pflu_0004'], batch_size=2)
+
+        self.assertEqual(scraper.requests, [['pflu_0001', 'pflu_0002'], ['pflu_0003', 'pflu_0004']])
+        self.assertEqual(scraper.query.features, ['pflu_0001'])
+
+        # Edges between the batches are kept, each pair once.
+        self.assertEqual(store.taxonId, '216595')
+        self.assertEqual(store.number_of_edges, 4)
+        self.assertEqual(store.degree('216595.PFLU_0003'), 3)
+
+    def test_from_scraper_limit (self):
+        """ Test that an explicit partner limit is passed to every request. """
+
+        scraper = PartnersScraper()
+        NetworkStore.from_scraper(scraper, ['pflu_0001', 'pflu_0002', 'pflu_0003'], batch_size=2)
+        self.assertEqual(scraper.limits, [DEFAULT_PARTNER_LIMIT, DEFAULT_PARTNER_LIMIT])
+
+        scraper = PartnersScraper()
+        NetworkStore.from_scraper(scraper, ['pflu_0001'], limit=50)
+        self.assertEqual(scraper.limits, [50])
+
+        with self.assertRaises(ValueError):
+            NetworkStore.from_scraper(scraper, ['pflu_0001'], limit=None)
+
+    def test_save_load (self):
+        """ Test writing and memory-mapped reading of a store. """
+
+        store = NetworkStore()
+        store.add_interactions(interactions_table())
+        path = tempfile.mkdtemp(prefix='network_store_')
+        self._test_files.append(path)
+        store.save(path)
+
+        loaded = NetworkStore.load(path)
+
+        self.assertEqual(loaded.nodes, store.nodes)
+        self.assertEqual(loaded.taxonId, '216595')
+        pandas.testing.assert_frame_equal(loaded.neighbours('216595.PFLU_0001'), store.neighbours('216595.PFLU_0001'))
+
+if __name__ == "__main__":
+    unittest.main()
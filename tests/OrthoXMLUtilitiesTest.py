@@ -0,0 +1,125 @@
+""" :module OrthoXMLUtilitiesTest: Test module for the orthoxml_utilities module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.orthoxml_utilities import read_orthoxml
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+from io import BytesIO
+import pandas
+import unittest
+
+ORTHOXML = b"""<?xml version="1.0" encoding="utf-8"?>
+<orthoXML xmlns="http://orthoXML.org/2011/" version="0.3" origin="pseudoluge" originVersion="1">
+  <species name="Pseudomonas fluorescens SBW25" NCBITaxId="216595">
+    <database name="pseudomonas.com" version="18.1">
+      <genes>
+        <gene id="1" protId="YP_002870643.1" geneId="PFLU0916"/>
+        <gene id="2" protId="YP_002870644.1" geneId="PFLU0917"/>
+      </genes>
+    </database>
+  </species>
+  <species name="Pseudomonas aeruginosa UCBPP-PA14" NCBITaxId="208963">
+    <database name="pseudomonas.com" version="18.1">
+      <genes>
+        <gene id="3" protId="YP_793558.1" geneId="PA14_67210"/>
+      </genes>
+    </database>
+  </species>
+  <scores>
+    <scoreDef id="bit" desc="BLAST bit score"/>
+  </scores>
+  <groups>
+    <orthologGroup id="10">
+      <score id="bit" value="512.5"/>
+      <geneRef id="1"/>
+      <paralogGroup>
+        <geneRef id="2"/>
+        <geneRef id="3"/>
+      </paralogGroup>
+    </orthologGroup>
+    <orthologGroup id="11">
+      <score id="bit" value="128"/>
+      <geneRef id="2"><score id="bit" value="1"/></geneRef>
+      <geneRef id="3"/>
+    </orthologGroup>
+  </groups>
+</orthoXML>
+"""
+
+
+class OrthoXMLUtilitiesTest(unittest.TestCase):
+    """ :class: Test class for the orthoxml_utilities module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_read_orthoxml (self):
+        """ Test parsing an OrthoXML document into tables. """
+
+        tables = read_orthoxml(BytesIO(ORTHOXML))
+
+        self.assertEqual(sorted(tables.keys()), ['Genes', 'Groups', 'Species'])
+        for table in tables.values():
+            self.assertIsInstance(table, pandas.DataFrame)
+
+        species = tables['Species']
+        self.assertEqual(len(species.index), 2)
+        self.assertEqual(species.loc[1, 'NCBITaxId'], 208963)
+        self.assertEqual(species.loc[0, 'database_version'], '18.1')
+
+        genes = tables['Genes']
+        self.assertEqual(genes['gene'].tolist(), [1, 2, 3])
+        self.assertEqual(genes.loc[2, 'geneId'], 'PA14_67210')
+        self.assertEqual(genes.loc[2, 'species'], 'Pseudomonas aeruginosa UCBPP-PA14')
+
+        groups = tables['Groups']
+        self.assertEqual(list(groups.columns), ['group', 'group_type', 'depth', 'gene', 'bit'])
+        self.assertEqual(groups['group'].tolist(), [10, 10, 10, 11, 11])
+        self.assertEqual(groups['group_type'].tolist(), ['orthologGroup', 'paralogGroup', 'paralogGroup', 'orthologGroup', 'orthologGroup'])
+        self.assertEqual(groups['depth'].tolist(), [1, 2, 2, 1, 1])
+        # Gene level scores do not override group scores.
+        self.assertEqual(groups['bit'].tolist(), [512.5, 512.5, 512.5, 128, 128])
+
+    def test_read_orthoxml_dtypes (self):
+        """ Test that the tables use compact dtypes. """
+
+        tables = read_orthoxml(BytesIO(ORTHOXML))
+
+        self.assertEqual(tables['Genes']['species'].dtype, 'category')
+        self.assertEqual(tables['Genes']['gene'].dtype, 'uint8')
+        self.assertEqual(tables['Groups']['group_type'].dtype, 'category')
+        self.assertEqual(tables['Groups']['bit'].dtype, 'float32')
+
+    def test_read_orthoxml_empty_groups (self):
+        """ Test parsing a document without groups. """
+
+        tables = read_orthoxml(BytesIO(b'<orthoXML xmlns="http://orthoXML.org/2011/"><groups/></orthoXML>'))
+
+        self.assertTrue(tables['Groups'].empty)
+        self.assertTrue(tables['Genes'].empty)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,244 @@
+""" :module PageServerTest: Test module for the page_server module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.page_server import PageCache, PageService, PageServer, read_features, render_data, DEFAULT_FAILURE_TTL
+from GenDBScraper.Utilities.static_renderer import feature_data, BUNDLE_NAME
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import gzip
+import json
+import os
+import pandas
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+
+class Clock():
+    """ Manually advanced clock. """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingRenderer():
+    """ Renders a one table data page, counts calls and optionally blocks until released. """
+
+    def __init__(self, blocking=False):
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        if not blocking:
+            self.release.set()
+
+    def __call__(self, strain, locus_tag):
+        with self.lock:
+            self.calls += 1
+        self.release.wait(10)
+        if locus_tag == 'missing':
+            raise ValueError("No such feature.")
+        return feature_data(strain, locus_tag, {'Gene Ontology': pandas.DataFrame({'Accession': ['GO:0003677']})})
+
+
+class PageServerTest(unittest.TestCase):
+    """ :class: Test class for the page_server module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_cache_lru (self):
+        """ Test eviction of the least recently used entry. """
+
+        cache = PageCache(maxsize=2, ttl=None)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_cache_ttl (self):
+        """ Test expiry of old entries. """
+
+        clock = Clock()
+        cache = PageCache(maxsize=2, ttl=60, clock=clock)
+        cache.put('a', 1)
+
+        clock.now = 60
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.age('a'), 60)
+
+        clock.now = 61
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats(), dict(pages=0, hits=1, misses=1))
+
+    def test_service (self):
+        """ Test rendering on first request and re-rendering after the time to live. """
+
+        clock = Clock()
+        renderer = CountingRenderer()
+        service = PageService(render=renderer, ttl=3600, clock=clock)
+
+        page = service.get('sbw25', 'pflu0916')
+        self.assertIn(b'sbw25_pflu0916/0-0.json.gz', page.page)
+        self.assertEqual(list(page.shards.keys()), ['0-0.json.gz'])
+
+        self.assertIs(service.get('sbw25', 'pflu0916'), page)
+        self.assertEqual(renderer.calls, 1)
+
+        clock.now = 3601
+        self.assertIsNot(service.get('sbw25', 'pflu0916'), page)
+        self.assertEqual(renderer.calls, 2)
+
+        # Failures are raised and cached for failure_ttl.
+        self.assertRaises(ValueError, service.get, 'sbw25', 'missing')
+        self.assertRaises(ValueError, service.get, 'sbw25', 'missing')
+        self.assertEqual(service.stats()['failed'], 1)
+        self.assertEqual(renderer.calls, 3)
+
+        clock.now += DEFAULT_FAILURE_TTL + 1
+        self.assertRaises(ValueError, service.get, 'sbw25', 'missing')
+        self.assertEqual(service.stats()['failed'], 2)
+
+        # Without failure_ttl every request renders.
+        service = PageService(render=renderer, failure_ttl=0, clock=clock)
+        self.assertRaises(ValueError, service.get, 'sbw25', 'missing')
+        self.assertRaises(ValueError, service.get, 'sbw25', 'missing')
+        self.assertEqual(service.stats()['failed'], 2)
+
+    def test_service_coalescing (self):
+        """ Test that concurrent requests for the same page render it once. """
+
+        renderer = CountingRenderer(blocking=True)
+        service = PageService(render=renderer)
+
+        pages = []
+        threads = [threading.Thread(target=lambda: pages.append(service.get('sbw25', 'pflu0916'))) for i in range(8)]
+        for thread in threads:
+            thread.start()
+
+        # All threads wait for the one rendering.
+        while service.stats()['pending'] == 0:
+            pass
+        renderer.release.set()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(renderer.calls, 1)
+        self.assertEqual(len(pages), 8)
+        self.assertTrue(all(page is pages[0] for page in pages))
+
+    def test_render_data_parallel (self):
+        """ Test that the default renderer renders different features on separate workers. """
+
+        # Both renderings must be inside run_pdc() at the same time to pass the barrier.
+        barrier = threading.Barrier(2, timeout=10)
+        class FakeWorker():
+            def run_pdc(self, strain, locus_tag):
+                barrier.wait()
+                return {'Gene Ontology': pandas.DataFrame({'Accession': ['GO:0003677']})}
+            def run_stdb(self, locus_tag):
+                return {}
+
+        with mock.patch('GenDBScraper.Utilities.worker.ScraperWorker', FakeWorker):
+            service = PageService(render=render_data)
+            executor = service.prewarm([('sbw25', 'pflu0001'), ('sbw25', 'pflu0002')], jobs=2)
+            executor.shutdown(wait=True)
+
+        self.assertEqual(service.stats()['pages'], 2)
+
+    def test_prewarm (self):
+        """ Test rendering pages in the background. """
+
+        renderer = CountingRenderer()
+        service = PageService(render=renderer)
+
+        executor = service.prewarm([('sbw25', 'pflu0001'), ('sbw25', 'pflu0002'), ('sbw25', 'missing')], jobs=2)
+        executor.shutdown(wait=True)
+
+        self.assertEqual(service.stats()['pages'], 2)
+        service.get('sbw25', 'pflu0002')
+        self.assertEqual(renderer.calls, 3)
+
+    def test_server (self):
+        """ Test serving pages, shards and the bundle over http. """
+
+        server = PageServer(PageService(render=CountingRenderer(), ttl=3600)).start()
+        try:
+            with urlopen(server.url + '/sbw25_pflu0916.html') as response:
+                self.assertEqual(response.headers['Content-Type'], 'text/html; charset=utf-8')
+                self.assertTrue(3590 <= int(response.headers['Cache-Control'].split('=')[1]) <= 3600)
+                self.assertIn(b'gendb-data', response.read())
+
+            request = Request(server.url + '/sbw25_pflu0916/0-0.json.gz', headers={'Accept-Encoding': 'gzip'})
+            with urlopen(request) as response:
+                self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+                shard = json.loads(gzip.decompress(response.read()))
+            self.assertEqual(shard['rows'], [[0, 'GO:0003677']])
+
+            with urlopen(server.url + '/sbw25_pflu0916/0-0.json.gz') as response:
+                self.assertEqual(json.loads(response.read()), shard)
+
+            request = Request(server.url + '/sbw25_pflu0916/0-0.json.gz', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+            with urlopen(request) as response:
+                self.assertIsNone(response.headers['Content-Encoding'])
+                self.assertEqual(json.loads(response.read()), shard)
+
+            with urlopen(server.url + '/' + BUNDLE_NAME) as response:
+                self.assertIn(b'GenDBGrid', response.read())
+
+            for path, status in (('/sbw25_missing.html', 502), ('/sbw25_pflu0916/9-9.json.gz', 404), ('/index.php', 404)):
+                with self.assertRaises(HTTPError) as context:
+                    urlopen(server.url + path)
+                self.assertEqual(context.exception.code, status)
+
+            with urlopen(server.url + '/stats') as response:
+                self.assertEqual(json.loads(response.read())['renders'], 2)
+        finally:
+            server.stop()
+
+    def test_read_features (self):
+        """ Test reading the prewarm list. """
+
+        path = os.path.join(tempfile.mkdtemp(), 'popular.txt')
+        self._test_files.append(os.path.dirname(path))
+        with open(path, 'w') as fp:
+            fp.write("# Most visited\nsbw25 pflu0916\n\nUCBPP-PA14_PA14_00010\n")
+
+        self.assertEqual(read_features(path), [('sbw25', 'pflu0916'), ('UCBPP-PA14', 'PA14_00010')])
+
+
+if __name__ == '__main__':
+    unittest.main()
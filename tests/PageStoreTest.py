@@ -0,0 +1,125 @@
+""" :module PageStoreTest: Test module for the page_store module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.page_store import page_dir, page_path, relative_url, ArchiveWriter, PageArchive, pack_directory
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+import os
+import tempfile
+import unittest
+
+
+class PageStoreTest(unittest.TestCase):
+    """ :class: Test class for the page_store module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+        self._outdir = tempfile.mkdtemp()
+        self._test_files.append(self._outdir)
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_layouts (self):
+        """ Test the page paths of the flat and sharded layouts. """
+
+        self.assertEqual(page_path('/www', 'sbw25', 'pflu0916'), '/www/sbw25_pflu0916.html')
+        self.assertEqual(page_path('/www', 'sbw25', 'pflu0916', 'sharded'), '/www/sbw25/pflu09/sbw25_pflu0916.html')
+        self.assertEqual(page_path('/www', 'UCBPP-PA14', 'PA14_00010', 'sharded', suffix='.json'), '/www/UCBPP-PA14/PA14_000/UCBPP-PA14_PA14_00010.json')
+        self.assertEqual(page_dir('/www', 'sbw25', 'pflu0916', 'sharded', bucket_digits=3), '/www/sbw25/pflu0')
+        self.assertRaises(ValueError, page_dir, '/www', 'sbw25', 'pflu0916', 'nested')
+
+        self.assertEqual(relative_url('/www', 'gendb-grid.js', 'sbw25', 'pflu0916'), 'gendb-grid.js')
+        self.assertEqual(relative_url('/www', 'gendb-grid.js', 'sbw25', 'pflu0916', 'sharded'), '../../gendb-grid.js')
+
+    def test_archive (self):
+        """ Test writing and reading an archive. """
+
+        path = os.path.join(self._outdir, 'pages.pack')
+        with ArchiveWriter(path) as archive:
+            archive.add('sbw25_pflu0916.html', b'<html>pflu0916</html>')
+            archive.add('sbw25_pflu0916/0-0.json.gz', b'\x1f\x8b')
+            archive.add('empty.html', b'')
+            self.assertRaises(ValueError, archive.add, 'empty.html', b'')
+
+        archive = PageArchive(path)
+        try:
+            self.assertEqual(len(archive), 3)
+            self.assertEqual(sorted(archive), ['empty.html', 'sbw25_pflu0916.html', 'sbw25_pflu0916/0-0.json.gz'])
+            self.assertEqual(bytes(archive['sbw25_pflu0916.html']), b'<html>pflu0916</html>')
+            self.assertEqual(bytes(archive['empty.html']), b'')
+            self.assertIsNone(archive.get('sbw25_pflu0001.html'))
+            self.assertRaises(KeyError, archive.__getitem__, 'sbw25_pflu0001.html')
+            self.assertEqual(archive.verify(), [])
+        finally:
+            archive.close()
+
+    def test_archive_invalid (self):
+        """ Test that other and truncated files are rejected and failed writes leave nothing behind. """
+
+        path = os.path.join(self._outdir, 'pages.pack')
+        with open(path, 'wb') as fp:
+            fp.write(b'<html></html>' * 10)
+        self.assertRaises(ValueError, PageArchive, path)
+
+        with ArchiveWriter(path) as archive:
+            archive.add('sbw25_pflu0916.html', b'<html>pflu0916</html>')
+        with open(path, 'rb') as fp:
+            content = fp.read()
+        with open(path, 'wb') as fp:
+            fp.write(content[:-4])
+        self.assertRaises(ValueError, PageArchive, path)
+
+        broken = os.path.join(self._outdir, 'broken.pack')
+        with self.assertRaises(RuntimeError):
+            with ArchiveWriter(broken) as archive:
+                archive.add('sbw25_pflu0916.html', b'<html>pflu0916</html>')
+                raise RuntimeError()
+        self.assertFalse(os.path.exists(broken))
+        self.assertFalse(os.path.exists(broken + '.tmp'))
+
+    def test_pack_directory (self):
+        """ Test packing a sharded page directory. """
+
+        for locus_tag in ('pflu0001', 'pflu0916'):
+            path = page_path(self._outdir, 'sbw25', locus_tag, 'sharded')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as fp:
+                fp.write('<html>{0:s}</html>'.format(locus_tag))
+
+        path = os.path.join(self._outdir, 'sbw25.pack')
+        self.assertEqual(pack_directory(self._outdir, path), 2)
+
+        # Packing again skips the archive itself.
+        self.assertEqual(pack_directory(self._outdir, path), 2)
+
+        archive = PageArchive(path)
+        try:
+            self.assertEqual(sorted(archive), ['sbw25/pflu00/sbw25_pflu0001.html', 'sbw25/pflu09/sbw25_pflu0916.html'])
+            self.assertEqual(bytes(archive['sbw25/pflu09/sbw25_pflu0916.html']), b'<html>pflu0916</html>')
+        finally:
+            archive.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
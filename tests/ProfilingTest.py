@@ -0,0 +1,118 @@
+""" :module ProfilingTest: Test module for the profiling module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities import profiling
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+from multiprocessing import Pool
+import os
+import tempfile
+import unittest
+
+
+def _fibonacci(n):
+    return n if n < 2 else _fibonacci(n-1) + _fibonacci(n-2)
+
+def _work(n):
+    return sum(_fibonacci(i) for i in range(n))
+
+
+class ProfilingTest(unittest.TestCase):
+    """ :class: Test class for the profiling module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_profile_call (self):
+        """ Test profiling a call in the current process. """
+
+        result, stats = profiling.profile_call(_work, 15)
+
+        self.assertEqual(result, _work(15))
+        self.assertIn('_fibonacci', [func[2] for func in stats.stats])
+
+    def test_pool_merge (self):
+        """ Test that profiles of all pool workers are merged. """
+
+        profile_dir = tempfile.mkdtemp(prefix='profiles_')
+        self._test_files.append(profile_dir)
+
+        with Pool(2) as pool:
+            results = pool.map(profiling.ProfiledTask(_work, profile_dir), [10, 12, 14])
+
+        self.assertEqual(results, [_work(10), _work(12), _work(14)])
+        self.assertEqual(len(os.listdir(profile_dir)), 3)
+
+        stats = profiling.merge_profiles(profile_dir)
+        work = [value for func, value in stats.stats.items() if func[2] == '_work'][0]
+        self.assertEqual(work[1], 3)
+
+    def test_write_report (self):
+        """ Test the merged profile, folded stacks and summary. """
+
+        outdir = tempfile.mkdtemp(prefix='profile_report_')
+        self._test_files.append(outdir)
+
+        result, stats = profiling.profile_call(_work, 15)
+        paths = profiling.write_report(stats, outdir, top=5)
+
+        with open(paths['folded']) as fp:
+            lines = fp.read().splitlines()
+        stacks = [line.rsplit(' ', 1)[0].split(';') for line in lines]
+        self.assertIn(True, [stack[0].startswith('_work') and stack[-1].startswith('_fibonacci') for stack in stacks])
+        self.assertTrue(all(int(line.rsplit(' ', 1)[1]) > 0 for line in lines))
+
+        with open(paths['summary']) as fp:
+            self.assertIn('_fibonacci', fp.read())
+
+        self.assertTrue(os.path.isfile(paths['profile']))
+
+    def test_dump_directory (self):
+        """ Test that every run dumps into a fresh directory. """
+
+        parent = tempfile.mkdtemp(prefix='profiles_')
+        self._test_files.append(parent)
+
+        with profiling.dump_directory(parent) as first:
+            profiling.ProfiledTask(_work, first)(10)
+            self.assertEqual(len(os.listdir(first)), 1)
+
+        with profiling.dump_directory(parent) as second:
+            self.assertEqual(os.listdir(second), [])
+
+        self.assertEqual(os.listdir(parent), [])
+
+    def test_merge_nothing (self):
+        """ Test that merging an empty directory raises. """
+
+        profile_dir = tempfile.mkdtemp(prefix='profiles_')
+        self._test_files.append(profile_dir)
+
+        with self.assertRaises(ValueError):
+            profiling.merge_profiles(profile_dir)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,18 +6,30 @@ from GenDBScraper.Utilities.web_utilities import guarded_get
 from GenDBScraper.PseudomonasDotComScraper import pdc_query,\
                                                   _dict_to_pdc_query,\
                                                   _pandas_references,\
-                                                  _get_bib_from_doi
+                                                  _get_bib_from_doi,\
+                                                  _cli_features,\
+                                                  _run_from_cli,\
+                                                  _profile_cli,\
+                                                  EXIT_CONNECTION,\
+                                                  EXIT_OK,\
+                                                  EXIT_OUTPUT
+from GenDBScraper.Utilities import web_utilities
 
 # Utilities
 from TestUtilities.TestUtilities import _remove_test_files
+from TestUtilities.TestUtilities import start_cassette, stop_cassette
 from TestUtilities.TestUtilities import check_keys
 # 3rd party imports
+from argparse import Namespace
 from bs4 import BeautifulSoup
 import os
+import tempfile
 import pandas
 import numpy
 import re
+import time
 import unittest
+from unittest import mock
 from io import StringIO
 from Bio import SeqIO
 
@@ -61,10 +73,14 @@ class PseudomonasDotComScraperTest(unittest.TestCase):
         # Setup a list of test files.
         cls._static_test_files = []
 
+        # Replay the recorded responses of the sites.
+        cls._cassette = start_cassette('PseudomonasDotComScraperTest')
+
     @classmethod
     def tearDownClass(cls):
         """ Tear down the test class. """
 
+        stop_cassette(cls._cassette)
         _remove_test_files(cls._static_test_files)
 
     def setUp (self):
@@ -696,6 +712,87 @@ class PseudomonasDotComScraperTest(unittest.TestCase):
             self.assertIn(xk, present_keys)
             self.assertIsInstance(query_results[xk], pandas.DataFrame)
 
+    def test_cli_features (self):
+        """ Test expansion of feature lists, ranges and files. """
+
+        self.assertEqual(_cli_features(['PFLU0001-PFLU0003', 'pflu0916', 'PFLU0002']), ['PFLU0001', 'PFLU0002', 'PFLU0003', 'pflu0916'])
+        self.assertEqual(len(_cli_features(['PFLU0001-PFLU6101'])), 6101)
+
+        fd, path = tempfile.mkstemp(suffix='.txt')
+        self._test_files.append(path)
+        with os.fdopen(fd, 'w') as fp:
+            fp.write("pflu0916 # fusA\n\npflu0917-pflu0918\n")
+
+        self.assertEqual(_cli_features([], [path]), ['pflu0916', 'pflu0917', 'pflu0918'])
+
+        with self.assertRaises(ValueError):
+            _cli_features(['PFLU0001-PA14_0002'])
+
+    def test_cli_connection_failure (self):
+        """ Test the exit code if pseudomonas.com is not reachable. """
+
+        args = Namespace(feature=['pflu0916'], feature_file=None, strain=['sbw25'], organism=None, outfile=None, outdir=None, skip_existing=False, jobs=1, executor='thread')
+
+        web_utilities.set_url_rewrites({'https://www.pseudomonas.com': 'http://127.0.0.1:9'})
+        web_utilities.reset_probes()
+        try:
+            self.assertEqual(_run_from_cli(args), EXIT_CONNECTION)
+        finally:
+            web_utilities.set_url_rewrites({})
+
+    def test_cli_profile (self):
+        """ Test that the queries run in the pool workers are profiled. """
+
+        outdir = tempfile.mkdtemp(prefix='cli_')
+        self._test_files.append(outdir)
+        profile = os.path.join(outdir, 'profile')
+
+        class FakeScraper():
+            def run_query(self, query):
+                self.results = {query.feature: {'feature': query.feature}}
+
+        args = Namespace(feature=['pflu0916', 'pflu0917'], feature_file=None, strain=['sbw25'], organism=None, outfile=None, outdir=outdir, skip_existing=False, jobs=2, executor='thread', profile=profile, profile_top=5)
+
+        with mock.patch('GenDBScraper.PseudomonasDotComScraper._cli_scraper', FakeScraper):
+            self.assertEqual(_profile_cli(args), EXIT_OK)
+
+        # Threads are profiled one at a time.
+        self.assertEqual(args.jobs, 1)
+
+        # Only the report remains, the dumps of the workers are merged.
+        self.assertEqual(sorted(os.listdir(profile)), ['profile.folded', 'profile.prof', 'summary.txt'])
+        with open(os.path.join(profile, 'profile.folded')) as fp:
+            self.assertIn('_cli_run_one', fp.read())
+
+    def test_cli_output_failure (self):
+        """ Test that queued queries are cancelled and output files closed if writing fails. """
+
+        outdir = tempfile.mkdtemp(prefix='cli_')
+        self._test_files.append(outdir)
+
+        # Later queries are slow, writing the first one fails meanwhile.
+        queried = []
+        class FakeScraper():
+            def run_query(self, query):
+                if queried:
+                    time.sleep(0.5)
+                queried.append(query.feature)
+                self.results = {query.feature: {}}
+
+        features = ['pflu{0:04d}'.format(i) for i in range(1, 21)]
+        args = Namespace(feature=features, feature_file=None, strain=['sbw25'], organism=None, outfile=None, outdir=None, skip_existing=False, jobs=1, executor='thread', fasta=os.path.join(outdir, 'sequences.fasta'), fasta_tag='Amino Acid Sequence', insertions=os.path.join(outdir, 'insertions.csv'))
+
+        with mock.patch('GenDBScraper.PseudomonasDotComScraper._cli_scraper', FakeScraper), \
+             mock.patch('GenDBScraper.PseudomonasDotComScraper.write_fasta', side_effect=IOError("No space left on device")):
+            self.assertEqual(_run_from_cli(args), EXIT_OUTPUT)
+
+        # Only the query running at the time completed.
+        self.assertLessEqual(len(queried), 2)
+
+        # The insertion table was closed, it has its header.
+        with open(args.insertions) as fp:
+            self.assertEqual(fp.readline().strip(), 'Strain,Locus,Library')
+
 if __name__ == "__main__":
 
     unittest.main()
@@ -0,0 +1,89 @@
+""" :module RegexUtilitiesTest: Test module for the regex_utilities module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.regex_utilities import PATTERNS, register_pattern, pattern, collapse_whitespace, remove_whitespace, underscore_whitespace, remove_tabs
+
+# 3rd party imports
+import re
+import unittest
+
+# Strings with mixed, leading, trailing and repeated whitespace.
+TRICKY_STRINGS = ["\n\t\t\tTransposon Insertions\n\t\t\t  in   PFLU0916\n\t\t",
+                  "Cross-References",
+                  "  NCBI\tRefseq\r\n Protein\x0b\x0c",
+                  "\t",
+                  "",
+                  " a ",
+                  "Gene Name\tand Synonyms",
+                  ]
+
+
+def reference_transposon_key(key):
+    """ The chain of substitutions previously applied to the transposon table headings. """
+
+    key = re.compile(r'\n+').sub(" ", key)
+    key = re.compile(r'\t+').sub(" ", key)
+    key = re.compile(r'\s+').sub(" ", key)
+    key = re.compile(r'^\s').sub("", key)
+    return re.compile(r'\s$').sub("", key)
+
+
+class RegexUtilitiesTest(unittest.TestCase):
+    """ :class: Test class for the regex_utilities module. """
+
+    def test_collapse_whitespace (self):
+        """ Test that collapsing whitespace matches the previous substitution chain. """
+
+        for text in TRICKY_STRINGS:
+            self.assertEqual(collapse_whitespace(text), reference_transposon_key(text))
+
+    def test_remove_whitespace (self):
+        """ Test removal of all whitespace. """
+
+        for text in TRICKY_STRINGS:
+            self.assertEqual(remove_whitespace(text), re.sub('[\t\\s]', '', text))
+
+    def test_underscore_whitespace (self):
+        """ Test replacement of each whitespace character by '_'. """
+
+        for text in TRICKY_STRINGS:
+            self.assertEqual(underscore_whitespace(text), re.sub('[\t\\s]', '_', text))
+
+    def test_remove_tabs (self):
+        """ Test removal of tabs. """
+
+        for text in TRICKY_STRINGS:
+            self.assertEqual(remove_tabs(text), re.sub('[\t]', '', text))
+
+    def test_pattern (self):
+        """ Test that run time patterns are compiled once. """
+
+        self.assertIs(pattern(r'PFLU0916'), pattern(r'PFLU0916'))
+        self.assertIsNot(pattern(r'PFLU0916'), pattern(r'PFLU0916', re.IGNORECASE))
+
+    def test_register_pattern (self):
+        """ Test registration of a named pattern. """
+
+        compiled = register_pattern('test_pattern', r'^pubmed', re.IGNORECASE)
+        try:
+            self.assertIs(PATTERNS['test_pattern'], compiled)
+            self.assertTrue(compiled.match('PubMed ID'))
+        finally:
+            del PATTERNS['test_pattern']
+
+    def test_string_name (self):
+        """ Test the locus tag to string-db.org name pattern. """
+
+        self.assertEqual(PATTERNS['string_name'].sub(r'\1_', 'pflu0916'), 'pflu_0916')
+
+    def test_column_patterns (self):
+        """ Test that the grid column patterns are part of the registry itself. """
+
+        self.assertTrue(PATTERNS['column_unnamed_7'].match('unnamed: 7'))
+        self.assertTrue(PATTERNS['column_gi_strain'].match('GI (Strain 2)'))
+        self.assertFalse(PATTERNS['column_gi'].match('GI (Strain 2)'))
+        self.assertTrue(PATTERNS['title_transposon'].match('transposon insertions in sbw25'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+""" :module SchemaUtilitiesTest: Test module for the schema_utilities module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities import schema_utilities
+from GenDBScraper.Utilities.schema_utilities import compact_frame, normalize_panels, register_schema
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+from io import StringIO
+import json
+import os
+import pandas
+import unittest
+
+
+class SchemaUtilitiesTest(unittest.TestCase):
+    """ :class: Test class for the schema_utilities module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_compact_frame (self):
+        """ Test conversion of all column kinds. """
+
+        df = pandas.DataFrame({'gi': ['15598983', '15598984', None],
+                               'refseq': ['NP_1.1', 'NP_2.1', 'NP_3.1'],
+                               'length': ['120', '88', '1024'],
+                               'evalue': ['1e-10', '0.5', 'n/a'],
+                               'pvalue': ['1e-300', '0.5', '1e-60'],
+                               'strain': ['SBW25', 'SBW25', 'SBW25'],
+                               'free': ['a', 'b', 'c'],
+                               })
+
+        with self.assertLogs(level='WARNING') as logs:
+            compact_frame(df, {'gi': 'id', 'refseq': 'id', 'length': 'integer', 'evalue': 'float', 'pvalue': 'double'})
+        self.assertIn("1 values of column evalue are not numeric", logs.output[0])
+
+        # Missing ids cannot be stored as unsigned integers.
+        self.assertEqual(df['gi'].dtype, 'category')
+        self.assertEqual(df['refseq'].dtype, 'category')
+        self.assertEqual(df['length'].dtype, 'int16')
+        self.assertEqual(df['evalue'].dtype, 'float32')
+        self.assertTrue(pandas.isna(df.loc[2, 'evalue']))
+
+        # Doubles keep values below the float32 range.
+        self.assertEqual(df['pvalue'].dtype, 'float64')
+        self.assertEqual(df.loc[0, 'pvalue'], 1e-300)
+
+        # Unlisted columns: repeated strings become categorical, unique ones are left alone.
+        self.assertEqual(df['strain'].dtype, 'category')
+        self.assertNotEqual(df['free'].dtype, 'category')
+
+    def test_compact_frame_numeric_id (self):
+        """ Test that numeric ids are downcast to unsigned integers. """
+
+        df = compact_frame(pandas.DataFrame({'GI': [15598983, 15598984]}), {'GI': 'id'})
+
+        self.assertEqual(df['GI'].dtype, 'uint32')
+
+    def test_normalize_panels (self):
+        """ Test schema lookup by panel title in nested panels. """
+
+        panels = {'Function/Pathways/GO': {'Functional Predictions from Interpro': pandas.DataFrame({'Amino Acid Start': ['1', '20'], 'E-value': ['1e-5', '2e-3']})},
+                  'Transposon Insertions': {'Transposon Insertions in SBW25': pandas.DataFrame({'Reference': ['24103422', '24103422']})},
+                  'Motifs': pandas.DataFrame(),
+                  }
+
+        normalize_panels(panels)
+
+        interpro = panels['Function/Pathways/GO']['Functional Predictions from Interpro']
+        self.assertEqual(interpro['Amino Acid Start'].dtype, 'int8')
+        self.assertEqual(interpro['E-value'].dtype, 'float64')
+
+        transposons = panels['Transposon Insertions']['Transposon Insertions in SBW25']
+        self.assertEqual(transposons['Reference'].dtype, 'uint32')
+
+        self.assertTrue(panels['Motifs'].empty)
+
+    def test_schemas_match_scraped_tables (self):
+        """ Test that the schema columns are those of scraped tables. """
+
+        with open(os.path.join('test_files', 'sbw25.pflu0916.json')) as fp:
+            results = json.load(fp)
+
+        panels = {'Function/Pathways/GO': {title: pandas.read_json(StringIO(results[title])) for title in ('Gene Ontology', 'Functional Predictions from Interpro')}}
+        columns = {title: list(table.columns) for title, table in panels['Function/Pathways/GO'].items()}
+
+        normalize_panels(panels)
+
+        for title, table in panels['Function/Pathways/GO'].items():
+            schema = schema_utilities.PANEL_SCHEMAS[title]
+            self.assertEqual([column for column in schema if column not in columns[title]], [])
+            self.assertEqual(list(table.columns), columns[title])
+
+        interpro = panels['Function/Pathways/GO']['Functional Predictions from Interpro']
+        self.assertEqual(interpro['Amino Acid Start'].dtype, 'int16')
+        self.assertEqual(interpro['E-value'].dtype, 'float64')
+        self.assertAlmostEqual(interpro['E-value'][3], 8.2e-53, delta=1e-60)
+        self.assertEqual(panels['Function/Pathways/GO']['Gene Ontology']['Term'].dtype, 'category')
+
+    def test_register_schema (self):
+        """ Test registering a panel schema. """
+
+        with self.assertRaises(ValueError):
+            register_schema('Test Panel', {'column': 'complex'})
+
+        with self.assertRaises(TypeError):
+            register_schema('Test Panel', ['column'])
+
+        register_schema('Test Panel', {'column': 'integer'})
+        self.assertEqual(schema_utilities.PANEL_SCHEMAS['Test Panel'], {'column': 'integer'})
+        del schema_utilities.PANEL_SCHEMAS['Test Panel']
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+""" :module SearchIndexTest: Test module for the search_index module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.search_index import SearchIndex, feature_terms, tokenize, shard_file, lookup_static
+from GenDBScraper.Utilities.page_server import PageServer, PageService
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+from urllib.request import urlopen
+import json
+import os
+import pandas
+import tempfile
+import unittest
+
+
+def _panels(locus_tag, name, product, go_terms=(), interpro=()):
+    """ Return pseudomonas.com results of one feature as written to result files (tables as json strings). """
+
+    overview = pandas.DataFrame([['Strain', 'Pseudomonas fluorescens SBW25'], ['Locus Tag', locus_tag.upper()], ['Name', name]])
+    go = pandas.DataFrame({'Accession': [a for a, t in go_terms], 'GO Term': [t for a, t in go_terms]})
+    ipr = pandas.DataFrame({'Interpro Accession': [a for a, t in interpro], 'Interpro Short Name': [t for a, t in interpro]})
+
+    return {'Overview': {'Gene Feature Overview': overview.to_json(),
+                         'Product': pandas.DataFrame([['Feature Type', 'CDS'], ['Product Name', product]]).to_json(),
+                         },
+            'Function/Pathways/GO': {'Gene Ontology': go.to_json(),
+                                     'Functional Predictions from Interpro': ipr,
+                                     },
+            }
+
+
+RESULTS = {'sbw25__pflu0916': _panels('pflu0916', 'wspR', 'diguanylate cyclase', [('GO:0052621', 'diguanylate cyclase activity')], [('IPR000160', 'GGDEF_dom')]),
+           'sbw25__pflu0917': _panels('pflu0917', None, 'DNA-binding response regulator', [('GO:0003677', 'DNA binding')]),
+           'sbw25__pflu0918': _panels('pflu0918', 'dnaA', 'chromosomal replication initiator protein', [('GO:0003677', 'DNA binding')]),
+           }
+
+
+class SearchIndexTest(unittest.TestCase):
+    """ :class: Test class for the search_index module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+        self._index = SearchIndex()
+        self._index.add_results(RESULTS)
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_tokenize (self):
+        """ Test splitting text into search tokens. """
+
+        self.assertEqual(tokenize('DNA-binding response regulator'), ['dna', 'binding', 'response', 'regulator'])
+        self.assertEqual(tokenize('GO:0003677'), ['go', '0003677', 'go:0003677'])
+        self.assertEqual(tokenize(' '), [])
+
+    def test_feature_terms (self):
+        """ Test extracting the indexed terms of a feature. """
+
+        terms = feature_terms(RESULTS['sbw25__pflu0916'], {'Interaction Partners': pandas.DataFrame({'preferredName_A': ['wspR']})})
+
+        self.assertIn(('name', 'PFLU0916'), terms)
+        self.assertIn(('name', 'wspR'), terms)
+        self.assertNotIn(('name', 'Pseudomonas fluorescens SBW25'), terms)
+        self.assertIn(('product', 'diguanylate cyclase'), terms)
+        self.assertIn(('go', 'GO:0052621'), terms)
+        self.assertIn(('interpro', 'GGDEF_dom'), terms)
+        self.assertIn(('string', 'wspR'), terms)
+
+        # Older, ungrouped result files with keys in the index.
+        with open(os.path.join('test_files', 'sbw25.pflu0916.json')) as fp:
+            terms = feature_terms(json.load(fp))
+        self.assertIn(('name', 'PFLU0916'), terms)
+        self.assertIn(('product', 'putative methyl-accepting chemotaxis protein'), terms)
+        self.assertIn(('go', 'signal transduction'), terms)
+        self.assertIn(('interpro', 'IPR033479'), terms)
+        self.assertIn(('xref', 'C3KBK5'), terms)
+
+    def test_search (self):
+        """ Test prefix search over all fields. """
+
+        matches = self._index.search('dna bind')
+        self.assertEqual([m['locus_tag'] for m in matches], ['pflu0917', 'pflu0918'])
+        self.assertEqual(matches[1]['name'], 'dnaA')
+        self.assertEqual(matches[0]['fields'], ['product', 'go'])
+        self.assertEqual(matches[1]['fields'], ['name', 'go'])
+
+        # Exact matches rank first.
+        self.assertEqual([m['locus_tag'] for m in self._index.search('wsp')], ['pflu0916'])
+        self.assertEqual([m['locus_tag'] for m in self._index.search('GO:0003677')], ['pflu0917', 'pflu0918'])
+        self.assertEqual([m['locus_tag'] for m in self._index.search('pflu091', limit=2)], ['pflu0916', 'pflu0917'])
+        self.assertEqual(self._index.search('ggdef')[0]['fields'], ['interpro'])
+
+        self.assertEqual(self._index.search('dna cyclase'), [])
+        self.assertEqual(self._index.search(''), [])
+
+    def test_update (self):
+        """ Test replacing and removing features. """
+
+        self._index.add('sbw25', 'pflu0917', [('name', 'gacA')])
+        self.assertEqual([m['locus_tag'] for m in self._index.search('dna binding')], ['pflu0918'])
+        self.assertEqual(self._index.search('gaca')[0]['locus_tag'], 'pflu0917')
+
+        self.assertTrue(self._index.remove('sbw25', 'pflu0918'))
+        self.assertFalse(self._index.remove('sbw25', 'pflu0918'))
+        self.assertEqual(self._index.search('dna'), [])
+        self.assertEqual(len(self._index), 2)
+
+    def test_save_load (self):
+        """ Test the round trip through a file. """
+
+        self._index.remove('sbw25', 'pflu0917')
+
+        path = os.path.join(tempfile.mkdtemp(), 'index.json.gz')
+        self._test_files.append(os.path.dirname(path))
+        self._index.save(path)
+
+        index = SearchIndex.load(path)
+        self.assertEqual(len(index), 2)
+        for query in ('dna', 'diguanylate', 'ipr0001', 'pflu'):
+            self.assertEqual(index.search(query), self._index.search(query))
+
+    def test_write_static (self):
+        """ Test the static sharded index. """
+
+        outdir = tempfile.mkdtemp()
+        self._test_files.append(outdir)
+
+        count = self._index.write_static(outdir)
+
+        with open(os.path.join(outdir, 'manifest.json')) as fp:
+            manifest = json.load(fp)
+        self.assertEqual(len(manifest['shards']), count)
+        self.assertIn('dn', manifest['shards'])
+
+        with open(os.path.join(outdir, manifest['shards']['dn'])) as fp:
+            shard = json.load(fp)
+        with open(os.path.join(outdir, 'documents.json')) as fp:
+            documents = json.load(fp)
+        self.assertEqual(sorted(documents[doc]['locus_tag'] for doc, mask in shard['dnaa']), ['pflu0918'])
+        self.assertEqual(sorted(shard.keys()), ['dna', 'dnaa'])
+
+        self.assertEqual(sorted(lookup_static(outdir, 'dna')), ['dna', 'dnaa'])
+        self.assertEqual(sorted(lookup_static(outdir, 'd')), sorted(token for token in self._index.expand('d')))
+
+    def test_write_static_separators (self):
+        """ Test that tokens with path separators stay in the static index directory. """
+
+        index = SearchIndex()
+        index.add('sbw25', 'pflu0001', [('xref', 'n/a'), ('xref', '../x.y')])
+
+        outdir = tempfile.mkdtemp()
+        self._test_files.append(outdir)
+        index.write_static(outdir, prefix_length=3)
+
+        self.assertEqual(shard_file('n/a'), '6e2f61.json')
+        self.assertTrue(all(os.sep not in name for name in os.listdir(outdir)))
+        self.assertEqual(list(lookup_static(outdir, 'n/a')), ['n/a'])
+        self.assertEqual(list(lookup_static(outdir, '../')), ['../x.y'])
+
+    def test_server (self):
+        """ Test the /search endpoint of the page server. """
+
+        server = PageServer(PageService(render=None), index=self._index).start()
+        try:
+            with urlopen(server.url + '/search?q=dna%20bind&limit=1') as response:
+                self.assertEqual(response.headers['Content-Type'], 'application/json')
+                results = json.loads(response.read())
+        finally:
+            server.stop()
+
+        self.assertEqual(results['query'], 'dna bind')
+        self.assertEqual([m['locus_tag'] for m in results['results']], ['pflu0917'])
@@ -0,0 +1,129 @@
+""" :module SequenceUtilitiesTest: Test module for the sequence_utilities module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.sequence_utilities import clean_sequences, sequence_record, iter_records, load_sequences, write_fasta, PROTEIN_TAG, GENE_TAG
+from GenDBScraper.PseudomonasDotComScraper import _serialize
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+from Bio import SeqIO
+from io import StringIO
+import os
+import pandas
+import re
+import tempfile
+import unittest
+
+
+def raw_sequences_table(locus_tag='PA14_67211', length=12):
+    """ Construct a 'Sequences' table as read from the pseudomonas.com html. """
+
+    dna = ("ATGCGAATCTCT" * length)
+    protein = ("MRISIGLFIFLL" * length)
+
+    return pandas.DataFrame({0: ["DNA Sequence Upstream of Gene", "DNA Sequence for Gene", "DNA Sequence Downstream of Gene", "Amino Acid Sequence", "Comment"],
+                             1: [">{0:s} upstream sequence length 121 {1:s} BLAST this sequence".format(locus_tag, dna[:121]),
+                                 ">{0:s} gene sequence length {1:d} {2:s}".format(locus_tag, len(dna), dna),
+                                 ">{0:s} downstream sequence length 121 {1:s}BLAST".format(locus_tag, dna[:121]),
+                                 ">{0:s} protein sequence length {1:d} {2:s} BLAST this protein".format(locus_tag, len(protein), protein),
+                                 "Not a sequence BLAST",
+                                 ]},
+                            index=range(1, 6))
+
+
+def reference_cleanup(df):
+    """ The per row cleanup previously done in PseudomonasDotComScraper._get_sequences. """
+
+    blast_pattern = re.compile(r"BLAST.+$")
+    space_pattern = re.compile(r"[A-Z]\s[A-Z]")
+    separator_pattern = re.compile(r"([a-z,1-9])\s([A-Z]+)\s*$")
+
+    tags = [idx for idx in df[0] if re.match(r"^DNA.+$", idx)] + ["Amino Acid Sequence"]
+    for tag in tags:
+        seq = df.loc[df[0]==tag, 1].values[0]
+        seq = blast_pattern.sub("", seq)
+        seq = space_pattern.sub("", seq)
+        seq = separator_pattern.sub(r'\1\n\2', seq)
+        df.loc[df[0]==tag, 1] = seq
+
+    return df
+
+
+class SequenceUtilitiesTest(unittest.TestCase):
+    """ :class: Test class for the sequence_utilities module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_clean_sequences (self):
+        """ Test that the vectorised cleanup matches the per row cleanup. """
+
+        cleaned = clean_sequences(raw_sequences_table())
+
+        pandas.testing.assert_frame_equal(cleaned, reference_cleanup(raw_sequences_table()))
+        self.assertEqual(cleaned.loc[5, 1], "Not a sequence BLAST")
+
+        record = SeqIO.read(StringIO(cleaned.loc[cleaned[0] == GENE_TAG, 1].values[0]), 'fasta')
+        self.assertEqual(str(record.seq), "ATGCGAATCTCT" * 12)
+
+    def test_sequence_record (self):
+        """ Test conversion of a panel cell to a SeqRecord. """
+
+        panel = clean_sequences(raw_sequences_table())
+
+        record = sequence_record(panel)
+        self.assertEqual(record.id, 'PA14_67211')
+        self.assertEqual(str(record.seq), "MRISIGLFIFLL" * 12)
+
+        self.assertIsNone(sequence_record(panel, tag='Nonexisting'))
+
+    def test_write_fasta (self):
+        """ Test streaming many features to one FASTA file, from results and from result files. """
+
+        results = {"sbw25__pflu{0:04d}".format(i): {'Sequences': clean_sequences(raw_sequences_table("PFLU{0:04d}".format(i)))} for i in range(1, 4)}
+        results["sbw25__pflu0004"] = {'Sequences': pandas.DataFrame({0: ["Comment"], 1: ["none"]})}
+
+        path = tempfile.mktemp(suffix='.faa')
+        self._test_files.append(path)
+
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(write_fasta(results, path), 3)
+
+        records = list(SeqIO.parse(path, 'fasta'))
+        self.assertEqual([r.id for r in records], ['PFLU0001', 'PFLU0002', 'PFLU0003'])
+
+        # From json result files, one per feature.
+        paths = []
+        for key in sorted(results)[:3]:
+            paths.append(tempfile.mktemp(suffix='.json'))
+            _serialize(paths[-1], {key: results[key]})
+        self._test_files.extend(paths)
+
+        stream = StringIO()
+        self.assertEqual(write_fasta(load_sequences(paths), stream, tag=GENE_TAG), 3)
+        self.assertEqual([str(r.seq) for r in SeqIO.parse(StringIO(stream.getvalue()), 'fasta')], ["ATGCGAATCTCT" * 12] * 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+""" :module StaticRendererTest: Test module for the static_renderer module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.static_renderer import cell_link, link_renderer, table_data, tabs_data, feature_data, render_json, render_html, shard_data, write_feature, write_bundle, BUNDLE_NAME, PUBMED_URL
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+import gzip
+import json
+import numpy
+import os
+import pandas
+import re
+import tempfile
+import unittest
+
+
+def pdc_results():
+    """ Construct pseudomonas.com like results with links, missing values and sub tabs. """
+
+    return {'Gene Ontology': pandas.DataFrame({'Accession': ['GO:0003677', 'GO:0006355'],
+                                               'Evidence Ontology (ECO) Code': ['ECO:0000256', None],
+                                               'Score': [1.5, numpy.nan],
+                                               }),
+            'Transposon Insertions': {'Transposon Insertions in SBW25': pandas.DataFrame({'Mutant ID': ['PW9532'], 'Reference': ['24103422']}),
+                                      'Transposon Insertions in Orthologs': pandas.DataFrame(),
+                                      },
+            'Ortholog xml': pandas.DataFrame({'a': [1]}),
+            'Comment': None,
+            }
+
+
+class StaticRendererTest(unittest.TestCase):
+    """ :class: Test class for the static_renderer module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_cell_link (self):
+        """ Test the cell link rules. """
+
+        self.assertEqual(cell_link('Ortholog group', 'GI'), "http://www.ncbi.nlm.nih.gov/protein/")
+        self.assertEqual(cell_link('Cross-References', 'url'), "")
+        self.assertEqual(cell_link('Gene Ontology', 'Evidence Ontology (ECO) Code'), "http://www.ebi.ac.uk/ontology-lookup/?termId=")
+        self.assertEqual(cell_link('Transposon Insertions in SBW25', 'Reference'), PUBMED_URL)
+        self.assertEqual(cell_link('References', 'PUBMED_ID'), PUBMED_URL)
+        self.assertIsNone(cell_link('References', 'GI'))
+        self.assertIsNone(cell_link('Gene Ontology', 'Score'))
+
+    def test_link_renderer (self):
+        """ Test that the grid cell renderer is unchanged. """
+
+        self.assertEqual(link_renderer(PUBMED_URL), """function(params) { return '<a href=http://ncbi.nlm.nih.gov/pubmed/'+params.value+' target=_blank>'+params.value+'</a>'; }""")
+
+    def test_table_data (self):
+        """ Test conversion of one table. """
+
+        table = table_data('Gene Ontology', pdc_results()['Gene Ontology'])
+
+        self.assertEqual([c['field'] for c in table['columns']], ['', 'Accession', 'Evidence Ontology (ECO) Code', 'Score'])
+        self.assertEqual(table['columns'][1]['link'], "http://www.ebi.ac.uk/QuickGO/GTerm?id=")
+        self.assertIsNone(table['columns'][3]['link'])
+        self.assertEqual(table['rows'], [[0, 'GO:0003677', 'ECO:0000256', 1.5], [1, 'GO:0006355', None, None]])
+
+    def test_tabs_data (self):
+        """ Test that skipped, empty and missing panels are left out and nested panels become sub tabs. """
+
+        svg = os.path.join(tempfile.mkdtemp(), 'network.svg')
+        self._test_files.append(os.path.dirname(svg))
+        with open(svg, 'w') as fp:
+            fp.write('<svg></svg>')
+
+        tabs = tabs_data(dict(pdc_results(), **{'Network Image': svg}))
+
+        self.assertEqual([t['title'] for t in tabs], ['Gene Ontology', 'Transposon Insertions', 'Network Image'])
+        self.assertEqual([t['title'] for t in tabs[1]['tabs']], ['Transposon Insertions in SBW25'])
+        self.assertEqual(tabs[1]['tabs'][0]['columns'][2]['link'], PUBMED_URL)
+        self.assertEqual(tabs[2]['svg'], '<svg></svg>')
+
+    def test_tabs_data_png (self):
+        """ Test that png images (string-db.org downloads) are embedded as data URI. """
+
+        png = os.path.join(tempfile.mkdtemp(), 'network.png')
+        self._test_files.append(os.path.dirname(png))
+        with open(png, 'wb') as fp:
+            fp.write(b'\x89PNG')
+
+        tabs = tabs_data({'Network Image': png})
+
+        self.assertEqual(tabs, [{'title': 'Network Image', 'image': 'data:image/png;base64,iVBORw=='}])
+
+    def test_render (self):
+        """ Test rendering of the html and json pages. """
+
+        results = pdc_results()
+        results['Gene Ontology'].loc[0, 'Accession'] = '</script><script>alert(1)</script>'
+        data = feature_data('sbw25', 'pflu0916', results, {'Interaction Partners': pandas.DataFrame({'a': [1]})})
+
+        self.assertEqual(json.loads(render_json(data)), data)
+        self.assertEqual([s['title'] for s in data['sections']], ["Data from pseudomonas.com", "Data from strings-db"])
+
+        html = render_html(data, bundle_url='/static/' + BUNDLE_NAME)
+        self.assertIn('<script src="/static/gendb-grid.js" defer></script>', html)
+        self.assertEqual(len(re.findall('</script>', html)), 2)
+
+        payload = re.search(r'<script type="application/json" id="gendb-data">(.*)</script>', html).group(1)
+        self.assertEqual(json.loads(payload), data)
+
+    def test_shard_data (self):
+        """ Test splitting a data page into manifest and shards. """
+
+        data = feature_data('sbw25', 'pflu0916', pdc_results(), {'Interaction Partners': pandas.DataFrame({'a': [1]})})
+
+        manifest, shards = shard_data(data, url_prefix='sbw25_pflu0916/')
+
+        self.assertEqual(sorted(shards.keys()), ['0-0.json.gz', '0-1-0.json.gz', '1-0.json.gz'])
+        self.assertEqual(manifest['sections'][0]['tabs'][0], dict(title='Gene Ontology', shard='sbw25_pflu0916/0-0.json.gz'))
+        self.assertEqual(manifest['sections'][0]['tabs'][1]['tabs'][0]['shard'], 'sbw25_pflu0916/0-1-0.json.gz')
+        self.assertEqual(shards['0-1-0.json.gz'], data['sections'][0]['tabs'][1]['tabs'][0])
+        self.assertNotIn('rows', render_json(manifest))
+
+        # The data page is unchanged.
+        self.assertIn('rows', data['sections'][0]['tabs'][0])
+
+    def test_write_feature (self):
+        """ Test writing a page with lazily loaded tabs. """
+
+        outdir = tempfile.mkdtemp()
+        self._test_files.append(outdir)
+
+        # Left over from an earlier run.
+        os.makedirs(os.path.join(outdir, 'sbw25_pflu0916'))
+        with open(os.path.join(outdir, 'sbw25_pflu0916', '9-9.json.gz'), 'wb') as fp:
+            fp.write(b'')
+
+        data = feature_data('sbw25', 'pflu0916', pdc_results())
+        path = write_feature(data, outdir)
+
+        self.assertEqual(path, os.path.join(outdir, 'sbw25_pflu0916.html'))
+        self.assertEqual(sorted(os.listdir(os.path.join(outdir, 'sbw25_pflu0916'))), ['0-0.json.gz', '0-1-0.json.gz', 'manifest.json'])
+
+        with open(os.path.join(outdir, 'sbw25_pflu0916', 'manifest.json')) as fp:
+            manifest = json.load(fp)
+        with open(path) as fp:
+            self.assertIn(render_json(manifest), fp.read())
+
+        with gzip.open(os.path.join(outdir, manifest['sections'][0]['tabs'][0]['shard'])) as fp:
+            self.assertEqual(json.load(fp), data['sections'][0]['tabs'][0])
+
+        # Unchanged data gives identical shards.
+        with open(os.path.join(outdir, 'sbw25_pflu0916', '0-0.json.gz'), 'rb') as fp:
+            first = fp.read()
+        write_feature(data, outdir)
+        with open(os.path.join(outdir, 'sbw25_pflu0916', '0-0.json.gz'), 'rb') as fp:
+            self.assertEqual(fp.read(), first)
+
+    def test_write_bundle (self):
+        """ Test writing the shared grid bundle. """
+
+        outdir = tempfile.mkdtemp()
+        self._test_files.append(outdir)
+
+        path = write_bundle(outdir)
+
+        self.assertEqual(os.path.basename(path), BUNDLE_NAME)
+        with open(path) as fp:
+            self.assertIn('GenDBGrid', fp.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+""" :module StaticServingTest: Test module for the static_serving module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.static_serving import accepted_encodings, select_variant, file_etag, etag_matches, byte_range, guess_content_type, static_response
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+import os
+import tempfile
+import unittest
+
+
+class StaticServingTest(unittest.TestCase):
+    """ :class: Test class for the static_serving module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+        self._outdir = tempfile.mkdtemp()
+        self._test_files.append(self._outdir)
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def write(self, name, content=b'<html></html>'):
+        path = os.path.join(self._outdir, name)
+        with open(path, 'wb') as fp:
+            fp.write(content)
+        return path
+
+    def test_accepted_encodings (self):
+        """ Test parsing of Accept-Encoding headers. """
+
+        self.assertEqual(accepted_encodings(b'gzip, deflate, br'), {'gzip', 'deflate', 'br'})
+        self.assertEqual(accepted_encodings('GZIP;q=0.5, br;q=0'), {'gzip'})
+        self.assertEqual(accepted_encodings('br;q=x, identity'), {'identity'})
+        self.assertEqual(accepted_encodings(None), set())
+
+    def test_select_variant (self):
+        """ Test that brotli is preferred over gzip, and only variants the client accepts and that exist are chosen. """
+
+        page = self.write('page.html')
+        self.write('page.html.gz')
+
+        self.assertEqual(select_variant(page, os.path.isfile, b'gzip, br'), (page + '.gz', 'gzip'))
+
+        self.write('page.html.br')
+        self.assertEqual(select_variant(page, os.path.isfile, b'gzip, br'), (page + '.br', 'br'))
+        self.assertEqual(select_variant(page, os.path.isfile, b'gzip'), (page + '.gz', 'gzip'))
+        self.assertEqual(select_variant(page, os.path.isfile, b'br;q=0, gzip'), (page + '.gz', 'gzip'))
+        self.assertEqual(select_variant(page, os.path.isfile, None), (page, None))
+
+        # Archive members.
+        members = {'index.html', 'index.html.gz'}
+        self.assertEqual(select_variant('index.html', members.__contains__, 'br, gzip'), ('index.html.gz', 'gzip'))
+
+    def test_etag (self):
+        """ Test that variants have different ETags and If-None-Match is compared weakly. """
+
+        page = self.write('page.html')
+        self.write('page.html.gz')
+
+        etag = file_etag(page)
+        self.assertNotEqual(file_etag(page + '.gz', 'gzip'), etag)
+        self.assertTrue(etag.endswith('-identity"'))
+
+        self.assertTrue(etag_matches(etag.encode('ascii'), etag))
+        self.assertTrue(etag_matches('"other", W/' + etag, etag))
+        self.assertTrue(etag_matches('*', etag))
+        self.assertFalse(etag_matches('"other"', etag))
+        self.assertFalse(etag_matches(None, etag))
+
+    def test_byte_range (self):
+        """ Test parsing of single byte ranges. """
+
+        self.assertEqual(byte_range(b'bytes=0-9', 100), (0, 10))
+        self.assertEqual(byte_range('bytes=90-', 100), (90, 100))
+        self.assertEqual(byte_range('bytes=-10', 100), (90, 100))
+        self.assertEqual(byte_range('bytes=90-200', 100), (90, 100))
+        self.assertIsNone(byte_range('bytes=100-', 100))
+
+        # Missing, multiple and malformed ranges give the whole content.
+        self.assertEqual(byte_range(None, 100), (0, 100))
+        self.assertEqual(byte_range('bytes=0-1,5-6', 100), (0, 100))
+        self.assertEqual(byte_range('bytes=a-b', 100), (0, 100))
+        self.assertEqual(byte_range('bytes=20-10', 100), (0, 100))
+        self.assertEqual(byte_range('items=0-1', 100), (0, 100))
+
+    def test_static_response (self):
+        """ Test status, headers and body range of responses. """
+
+        status, headers, body = static_response({}, '"abc-gzip"', 100, guess_content_type('page.html'), 'gzip')
+        self.assertEqual(status, 200)
+        self.assertEqual(body, (0, 100))
+        self.assertEqual(headers['Content-Type'], 'text/html')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Content-Length'], '100')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(headers['ETag'], '"abc-gzip"')
+        self.assertEqual(headers['Cache-Control'], 'public, max-age=3600')
+
+        # Revalidation.
+        status, headers, body = static_response({'if-none-match': b'"abc-gzip"'}, '"abc-gzip"', 100)
+        self.assertEqual(status, 304)
+        self.assertIsNone(body)
+        self.assertEqual(headers['ETag'], '"abc-gzip"')
+
+        # Another variant does not revalidate.
+        self.assertEqual(static_response({'if-none-match': '"abc-br"'}, '"abc-gzip"', 100)[0], 200)
+
+        # Partial content.
+        status, headers, body = static_response({'range': 'bytes=10-19'}, '"abc"', 100)
+        self.assertEqual(status, 206)
+        self.assertEqual(body, (10, 20))
+        self.assertEqual(headers['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(headers['Content-Length'], '10')
+
+        # Unsatisfiable range.
+        status, headers, body = static_response({'range': b'bytes=200-'}, '"abc"', 100)
+        self.assertEqual(status, 416)
+        self.assertIsNone(body)
+        self.assertEqual(headers['Content-Range'], 'bytes */100')
+
+        # A range covering everything is a complete response.
+        self.assertEqual(static_response({'range': 'bytes=0-'}, '"abc"', 100)[0], 200)
+
+    def test_guess_content_type (self):
+        """ Test content types by file name. """
+
+        self.assertIn(guess_content_type('gendb-grid.js'), ('application/javascript', 'text/javascript'))
+        self.assertEqual(guess_content_type('pflu0916'), 'application/octet-stream')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,7 @@ from GenDBScraper.Utilities import web_utilities
 
 # Utilities
 from TestUtilities.TestUtilities import _remove_test_files
+from TestUtilities.TestUtilities import start_cassette, stop_cassette
 from TestUtilities.TestUtilities import check_keys
 
 # Alias for generic tests.
@@ -31,10 +32,14 @@ class StringDBScraperTest(unittest.TestCase):
         # Setup a list of test files.
         cls._static_test_files = []
 
+        # Replay the recorded responses of the sites.
+        cls._cassette = start_cassette('StringDBScraperTest')
+
     @classmethod
     def tearDownClass(cls):
         """ Tear down the test class. """
 
+        stop_cassette(cls._cassette)
         _remove_test_files(cls._static_test_files)
 
     def setUp (self):
@@ -29,3 +29,68 @@ def check_keys(test_class, expected_keys, dictionary):
         test_class.assertIn(xk, present_keys)
 
 
+
+def serve_payloads(payloads):
+    """ Serve the given payloads from a local http server running in a background thread.
+
+    :param payloads: Mapping of url path to (content_type, body) tuples. POST requests are answered like GET requests.
+    :type  payloads: dict
+
+    :return: The running server and its base url. Call server.shutdown() when done.
+
+    """
+
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in payloads:
+                self.send_error(404)
+                return
+            content_type, body = payloads[self.path]
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, "http://127.0.0.1:{0:d}".format(server.server_address[1])
+
+# Record or replay http traffic if configured (GENDBSCRAPER_CASSETTE, GENDBSCRAPER_CASSETTE_MODE).
+from GenDBScraper.Utilities import web_utilities
+web_utilities.configure_from_environment()
+
+# Recorded responses of the live sites, one cassette per test class.
+CASSETTE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_files', 'cassettes')
+
+def start_cassette(name):
+    """ Replay the responses recorded in test_files/cassettes/<name> for the tests of a class, call stop_cassette() when done.
+
+    GENDBSCRAPER_TEST_MODE selects the mode: 'replay' (default, unrecorded requests fail), 'once' (record missing responses from the live sites), 'record' (record all responses anew) or 'live' (no cassette). A cassette configured by GENDBSCRAPER_CASSETTE takes precedence.
+
+    :return: The started cassette, None if none was started.
+
+    """
+
+    mode = os.environ.get('GENDBSCRAPER_TEST_MODE', 'replay')
+    if mode == 'live' or web_utilities.active_cassette() is not None:
+        return None
+
+    return web_utilities.set_cassette(os.path.join(CASSETTE_DIR, name), mode)
+
+def stop_cassette(cassette):
+    """ Stop a cassette returned by start_cassette(). """
+
+    if cassette is not None and web_utilities.active_cassette() is cassette:
+        web_utilities.set_cassette(None)
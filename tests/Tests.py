@@ -6,6 +6,27 @@ import os, sys
 # Import suites to run.
 from PseudomonasDotComScraperTest import PseudomonasDotComScraperTest
 from StringDBScraperTest import StringDBScraperTest
+from WebUtilitiesTest import WebUtilitiesTest
+from OrthoXMLUtilitiesTest import OrthoXMLUtilitiesTest
+from SchemaUtilitiesTest import SchemaUtilitiesTest
+from NetworkStoreTest import NetworkStoreTest
+from NetworkRendererTest import NetworkRendererTest
+from InstrumentationTest import InstrumentationTest
+from ProfilingTest import ProfilingTest
+from LazyImportTest import LazyImportTest
+from WorkerTest import WorkerTest
+from SequenceUtilitiesTest import SequenceUtilitiesTest
+from RegexUtilitiesTest import RegexUtilitiesTest
+from TransposonUtilitiesTest import TransposonUtilitiesTest
+from StaticRendererTest import StaticRendererTest
+from PageServerTest import PageServerTest
+from CompressionUtilitiesTest import CompressionUtilitiesTest
+from StaticServingTest import StaticServingTest
+from PageStoreTest import PageStoreTest
+from SearchIndexTest import SearchIndexTest
+from AnnotationIndexTest import AnnotationIndexTest
+from BulkImportTest import BulkImportTest
+from GenomeFastaTest import GenomeFastaTest
 
 # Are we running on CI server?
 is_travisCI = ("TRAVIS_BUILD_DIR" in list(os.environ.keys())) and (os.environ["TRAVIS_BUILD_DIR"] != "")
@@ -16,6 +37,27 @@ def suite():
     suites = [
                unittest.makeSuite(PseudomonasDotComScraperTest, 'test'),
                unittest.makeSuite(StringDBScraperTest, 'test'),
+               unittest.makeSuite(WebUtilitiesTest, 'test'),
+               unittest.makeSuite(OrthoXMLUtilitiesTest, 'test'),
+               unittest.makeSuite(SchemaUtilitiesTest, 'test'),
+               unittest.makeSuite(NetworkStoreTest, 'test'),
+               unittest.makeSuite(NetworkRendererTest, 'test'),
+               unittest.makeSuite(InstrumentationTest, 'test'),
+               unittest.makeSuite(ProfilingTest, 'test'),
+               unittest.makeSuite(LazyImportTest, 'test'),
+               unittest.makeSuite(WorkerTest, 'test'),
+               unittest.makeSuite(SequenceUtilitiesTest, 'test'),
+               unittest.makeSuite(RegexUtilitiesTest, 'test'),
+               unittest.makeSuite(TransposonUtilitiesTest, 'test'),
+               unittest.makeSuite(StaticRendererTest, 'test'),
+               unittest.makeSuite(PageServerTest, 'test'),
+               unittest.makeSuite(CompressionUtilitiesTest, 'test'),
+               unittest.makeSuite(StaticServingTest, 'test'),
+               unittest.makeSuite(PageStoreTest, 'test'),
+               unittest.makeSuite(SearchIndexTest, 'test'),
+               unittest.makeSuite(AnnotationIndexTest, 'test'),
+               unittest.makeSuite(BulkImportTest, 'test'),
+               unittest.makeSuite(GenomeFastaTest, 'test'),
              ]
 
     return unittest.TestSuite(suites)
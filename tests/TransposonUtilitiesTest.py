@@ -0,0 +1,175 @@
+""" :module TransposonUtilitiesTest: Test module for the transposon_utilities module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.transposon_utilities import reshape_key_value_table, library_name, InsertionTable
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+from collections import OrderedDict
+import numpy
+import os
+import pandas
+import tempfile
+import unittest
+
+KEYS = ['Mutant ID', 'Genomic Position', 'Reference']
+
+
+def stacked_table(number_of_insertions):
+    """ Construct a key/value table as read from the pseudomonas.com transposons tab. """
+
+    keys = []
+    values = []
+    for i in range(number_of_insertions):
+        keys += KEYS
+        values += ['UWGC: PW{0:d}'.format(9500 + i), str(5722847 + 100 * i), '24103422']
+
+    return pandas.DataFrame({0: keys, 1: values})
+
+
+def reference_reshape(table):
+    """ The slicing previously done in PseudomonasDotComScraper._get_transposon_insertions. """
+
+    number_of_indices = len(table.index)
+    table.index = range(number_of_indices)
+
+    number_of_unique_indices = len(set(table.loc[:,0]))
+    tables = [table.iloc[i*number_of_unique_indices:(i+1)*number_of_unique_indices] for i in range(number_of_indices//number_of_unique_indices)]
+    list_of_dicts = []
+    for table in tables:
+        list_of_dicts.append(OrderedDict(zip(table.loc[:,0], table.loc[:,1])))
+
+    return pandas.DataFrame(list_of_dicts)
+
+
+class TransposonUtilitiesTest(unittest.TestCase):
+    """ :class: Test class for the transposon_utilities module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_reshape (self):
+        """ Test that the vectorised reshape matches the previous slicing for regular tables. """
+
+        reshaped = reshape_key_value_table(stacked_table(300))
+
+        pandas.testing.assert_frame_equal(reshaped, reference_reshape(stacked_table(300)), check_index_type=False)
+        self.assertEqual(list(reshaped.columns), KEYS)
+        self.assertEqual(reshaped.loc[0, 'Genomic Position'], '5722847')
+        self.assertEqual(reshaped.loc[299, 'Mutant ID'], 'UWGC: PW9799')
+
+    def test_reshape_ragged (self):
+        """ Test that records lacking keys are kept and padded. """
+
+        table = stacked_table(3)
+        # Second insertion has no 'Genomic Position'.
+        table = table.drop(index=4).reset_index(drop=True)
+
+        reshaped = reshape_key_value_table(table)
+
+        self.assertEqual(len(reshaped.index), 3)
+        self.assertTrue(numpy.isnan(reshaped.loc[1, 'Genomic Position']))
+        self.assertEqual(reshaped.loc[1, 'Reference'], '24103422')
+        self.assertEqual(reshaped.loc[2, 'Genomic Position'], '5723047')
+
+    def test_reshape_empty (self):
+        """ Test reshaping an empty table. """
+
+        self.assertTrue(reshape_key_value_table(pandas.DataFrame(columns=[0, 1])).empty)
+
+    def test_library_name (self):
+        """ Test extraction of the library from the table heading. """
+
+        self.assertEqual(library_name('Transposon Insertions in UCBPP-PA14'), 'UCBPP-PA14')
+        self.assertEqual(library_name('Other'), 'Other')
+
+    def test_insertion_table (self):
+        """ Test incremental construction and round trip of the genome wide table. """
+
+        insertions = InsertionTable()
+        self.assertEqual(len(insertions.table.index), 0)
+
+        results = {'UCBPP-PA14__PA14_00010': {'Transposon Insertions': {'Transposon Insertions in UCBPP-PA14': reshape_key_value_table(stacked_table(2)),
+                                                                         'Transposon Insertions in Orthologs': reshape_key_value_table(stacked_table(3)),
+                                                                         }}}
+        self.assertEqual(insertions.add_results(results), 5)
+        self.assertEqual(insertions.add('UCBPP-PA14', 'PA14_00020', {'Transposon Insertions in UCBPP-PA14': None}), 0)
+        self.assertEqual(insertions.add('UCBPP-PA14', 'PA14_00030', {'Transposon Insertions in UCBPP-PA14': reshape_key_value_table(stacked_table(1))}), 1)
+
+        table = insertions.table
+        self.assertEqual(len(insertions), 6)
+        self.assertEqual(list(table.columns), ['Strain', 'Locus', 'Library'] + KEYS)
+        self.assertEqual(list(table['Library']), ['UCBPP-PA14'] * 2 + ['Orthologs'] * 3 + ['UCBPP-PA14'])
+        self.assertEqual(table.loc[5, 'Locus'], 'PA14_00030')
+
+        path = os.path.join(tempfile.mkdtemp(), 'insertions.csv')
+        self._test_files.append(os.path.dirname(path))
+        self.assertEqual(insertions.to_csv(path), 6)
+
+        pandas.testing.assert_frame_equal(InsertionTable.from_csv(path).table, table)
+
+    def test_insertion_table_file (self):
+        """ Test appending the insertions of each feature to the csv file as they arrive. """
+
+        path = os.path.join(tempfile.mkdtemp(), 'insertions.csv')
+        self._test_files.append(os.path.dirname(path))
+
+        insertions = InsertionTable(path)
+        self.assertEqual(insertions.add('UCBPP-PA14', 'PA14_00010', {'Transposon Insertions in UCBPP-PA14': reshape_key_value_table(stacked_table(2))}), 2)
+
+        # Header and rows of the first feature are on disk right away.
+        with open(path) as fp:
+            lines = fp.read().splitlines()
+        self.assertEqual(lines[0].split(','), ['Strain', 'Locus', 'Library'] + KEYS)
+        self.assertEqual(len(lines), 3)
+
+        # Later features are appended without header, extra columns extend it.
+        extra = reshape_key_value_table(stacked_table(3))
+        extra['Extra'] = 'x'
+        self.assertEqual(insertions.add('UCBPP-PA14', 'PA14_00020', {'Transposon Insertions in Orthologs': extra}), 3)
+        self.assertEqual(insertions.add('UCBPP-PA14', 'PA14_00030', {'Transposon Insertions in UCBPP-PA14': reshape_key_value_table(stacked_table(1))}), 1)
+        self.assertEqual(insertions.close(), 6)
+
+        table = insertions.table
+        self.assertEqual(len(insertions), 6)
+        self.assertEqual(list(table.columns), ['Strain', 'Locus', 'Library'] + KEYS + ['Extra'])
+        self.assertEqual(list(table['Locus']), ['PA14_00010'] * 2 + ['PA14_00020'] * 3 + ['PA14_00030'])
+        self.assertEqual(list(table['Extra'].fillna('')), [''] * 2 + ['x'] * 3 + [''])
+
+    def test_insertion_table_file_empty (self):
+        """ Test that a file without insertions gets the header. """
+
+        path = os.path.join(tempfile.mkdtemp(), 'insertions.csv')
+        self._test_files.append(os.path.dirname(path))
+
+        insertions = InsertionTable(path)
+        self.assertEqual(insertions.close(), 0)
+
+        with open(path) as fp:
+            self.assertEqual(fp.read().splitlines(), ['Strain,Locus,Library'])
+
+
+if __name__ == '__main__':
+    unittest.main()
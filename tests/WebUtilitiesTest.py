@@ -0,0 +1,246 @@
+""" :module WebUtilitiesTest: Test module for the web_utilities module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities import web_utilities
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+from TestUtilities.TestUtilities import serve_payloads
+
+# 3rd party imports
+import os
+import pandas
+import tempfile
+import unittest
+import xmltodict
+
+
+class WebUtilitiesTest(unittest.TestCase):
+    """ :class: Test class for the web_utilities module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+        # Serve some test payloads locally.
+        table = "\n".join(["Locus Tag\tGI"] + ["PFLU{0:04d}\t{1:d}".format(i, 1000+i) for i in range(5000)])+"\n"
+        xml = "<orthoXML><species name='SBW25'><gene id='1'/><gene id='2'/></species></orthoXML>"
+        cls._server, cls._base_url = serve_payloads({
+            '/table': ('text/tab-separated-values', table.encode('utf-8')),
+            '/xml': ('text/xml', xml.encode('utf-8')),
+            '/api/json/network': ('application/json', b'[{"stringId_A": "A", "stringId_B": "B"}]'),
+            })
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        cls._server.shutdown()
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_guarded_stream (self):
+        """ Test that streaming yields the complete content in chunks. """
+
+        chunks = list(web_utilities.guarded_stream(self._base_url+'/table', chunk_size=1024))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), web_utilities.guarded_get(self._base_url+'/table'))
+
+    def test_guarded_stream_max_bytes (self):
+        """ Test that exceeding the byte cap raises. """
+
+        with self.assertRaises(RuntimeError):
+            list(web_utilities.guarded_stream(self._base_url+'/table', max_bytes=1024))
+
+    def test_guarded_stream_progress (self):
+        """ Test the progress callback. """
+
+        reports = []
+        for chunk in web_utilities.guarded_stream(self._base_url+'/table', chunk_size=1024, progress=lambda *args: reports.append(args)):
+            pass
+
+        url, received, total = reports[-1]
+        self.assertEqual(url, self._base_url+'/table')
+        self.assertEqual(received, total)
+        self.assertEqual(len(reports), (total + 1023) // 1024)
+
+    def test_open_stream_csv (self):
+        """ Test chunked csv reading from an incrementally decoded stream. """
+
+        with web_utilities.open_stream(self._base_url+'/table', encoding='utf-8', chunk_size=1024) as stream:
+            df = pandas.concat(pandas.read_csv(stream, sep='\t', chunksize=1000), ignore_index=True)
+
+        self.assertEqual(len(df.index), 5000)
+        self.assertEqual(list(df.columns), ['Locus Tag', 'GI'])
+        self.assertEqual(df.loc[4999, 'Locus Tag'], 'PFLU4999')
+
+    def test_stream_xml (self):
+        """ Test feeding a streamed download to the xml parser. """
+
+        xml_dict = xmltodict.parse(web_utilities.guarded_stream(self._base_url+'/xml', chunk_size=8))
+
+        self.assertEqual(len(xml_dict['orthoXML']['species']['gene']), 2)
+
+    def test_guarded_stream_missing (self):
+        """ Test that a missing resource raises. """
+
+        with self.assertRaises(RuntimeError):
+            list(web_utilities.guarded_stream(self._base_url+'/missing'))
+
+    def test_cassette_record_replay (self):
+        """ Test recording responses and replaying them without the server. """
+
+        cassette = tempfile.mkdtemp(prefix='cassette_')
+        self._test_files.append(cassette)
+
+        self.assertIsNone(web_utilities.active_cassette())
+        with web_utilities.use_cassette(cassette, mode='record') as active:
+            self.assertIs(web_utilities.active_cassette(), active)
+            content = web_utilities.guarded_get(self._base_url+'/table')
+            response = web_utilities.guarded_post(self._base_url+'/api/json/network', data={'species': '216595', 'identifiers': 'pflu0916', 'limit': None})
+
+        self.assertIsNone(web_utilities.active_cassette())
+        self.assertEqual(len(os.listdir(cassette)), 2)
+
+        # Replay mode never sends requests, unrecorded ones fail.
+        with web_utilities.use_cassette(cassette, mode='replay'):
+            self.assertEqual(web_utilities.guarded_get(self._base_url+'/table'), content)
+            self.assertEqual(b''.join(web_utilities.guarded_stream(self._base_url+'/table', chunk_size=1000)), content)
+            # Form data order does not matter.
+            replayed = web_utilities.guarded_post(self._base_url+'/api/json/network', data={'identifiers': 'pflu0916', 'species': '216595'})
+            self.assertEqual(replayed.json(), response.json())
+
+            with self.assertRaises(RuntimeError):
+                web_utilities.guarded_get(self._base_url+'/xml')
+
+    def test_cassette_preload (self):
+        """ Test replaying preloaded responses without reading the cassette files. """
+
+        cassette = tempfile.mkdtemp(prefix='cassette_')
+        self._test_files.append(cassette)
+
+        with web_utilities.use_cassette(cassette, mode='record'):
+            content = web_utilities.guarded_get(self._base_url+'/table')
+
+        replay = web_utilities.Cassette(cassette, mode='replay')
+        self.assertEqual(replay.preload(), 1)
+        for name in os.listdir(cassette):
+            os.remove(os.path.join(cassette, name))
+
+        self.assertEqual(replay.lookup('GET', self._base_url+'/table').content, content)
+        self.assertIsNone(replay.lookup('GET', self._base_url+'/xml'))
+
+    def test_cassette_headers (self):
+        """ Test that cassettes keep the headers parsers and servers use, but not those of the undecoded content. """
+
+        class Response():
+            status_code = 200
+            headers = {'Content-Type': 'text/html', 'ETag': '"abc"', 'Last-Modified': 'Mon, 19 Oct 2026 10:00:00 GMT', 'Content-Encoding': 'gzip', 'Content-Length': '9', 'Set-Cookie': 'session=1'}
+            content = b'<html></html>'
+            def close(self):
+                pass
+
+        cassette = tempfile.mkdtemp(prefix='cassette_')
+        self._test_files.append(cassette)
+
+        web_utilities.Cassette(cassette, mode='record').record('GET', 'https://www.pseudomonas.com/', None, Response())
+        replayed = web_utilities.Cassette(cassette).lookup('GET', 'https://www.pseudomonas.com/')
+
+        self.assertEqual(replayed.headers, {'Content-Type': 'text/html', 'ETag': '"abc"', 'Last-Modified': 'Mon, 19 Oct 2026 10:00:00 GMT', 'Content-Length': '13'})
+
+    def test_cassette_once (self):
+        """ Test that mode 'once' records missing responses only. """
+
+        cassette = tempfile.mkdtemp(prefix='cassette_')
+        self._test_files.append(cassette)
+
+        with web_utilities.use_cassette(cassette, mode='once'):
+            web_utilities.guarded_get(self._base_url+'/xml')
+            web_utilities.guarded_get(self._base_url+'/xml')
+            web_utilities.guarded_get(self._base_url+'/table')
+
+        self.assertEqual(len(os.listdir(cassette)), 2)
+
+    def test_replay_server (self):
+        """ Test serving a cassette through the local stand-in server. """
+
+        from GenDBScraper.Utilities.replay_server import ReplayServer
+
+        cassette = tempfile.mkdtemp(prefix='cassette_')
+        self._test_files.append(cassette)
+
+        # Record as if from string-db.org.
+        web_utilities.set_url_rewrites({'http://string-db.org': self._base_url})
+        try:
+            with web_utilities.use_cassette(cassette, mode='record'):
+                recorded = web_utilities.guarded_post('http://string-db.org/api/json/network', data={'species': '216595'})
+        finally:
+            web_utilities.set_url_rewrites({})
+
+        server = ReplayServer(cassette).start()
+        web_utilities.set_url_rewrites(server.rewrites())
+        try:
+            replayed = web_utilities.guarded_post('http://string-db.org/api/json/network', data={'species': '216595'})
+            self.assertEqual(replayed.json(), recorded.json())
+
+            with self.assertRaises(RuntimeError):
+                list(web_utilities.guarded_stream('https://www.pseudomonas.com/'))
+        finally:
+            web_utilities.set_url_rewrites({})
+            server.stop()
+
+    def test_probe (self):
+        """ Test that successful probes are cached and failures raise ConnectionError. """
+
+        server, base_url = serve_payloads({'/': ('text/html', b'<html></html>')})
+        try:
+            self.assertTrue(web_utilities.probe(base_url+'/'))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # Server is gone, the cached result is used within the ttl.
+        self.assertTrue(web_utilities.probe(base_url+'/'))
+        with self.assertRaises(ConnectionError):
+            web_utilities.probe(base_url+'/', ttl=0)
+
+        web_utilities.reset_probes()
+        with self.assertRaises(ConnectionError):
+            web_utilities.probe(base_url+'/')
+
+    def test_probe_error_status (self):
+        """ Test that error responses fail the probe. """
+
+        with self.assertRaises(ConnectionError):
+            web_utilities.probe(self._base_url+'/missing')
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "Needs os.fork().")
+    def test_session_after_fork (self):
+        """ Test that a forked child does not reuse the pooled connections of its parent. """
+
+        session = web_utilities.get_session()
+        web_utilities.guarded_get(self._base_url+'/xml')
+
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if web_utilities.get_session() is not session else 1)
+
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIs(web_utilities.get_session(), session)
+
+if __name__ == "__main__":
+    unittest.main()
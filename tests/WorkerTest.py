@@ -0,0 +1,104 @@
+""" :module WorkerTest: Test module for the worker module."""
+
+# Import functionality to be tested.
+from GenDBScraper.Utilities.worker import ScraperWorker, serve_stream, serve_unix, submit
+from GenDBScraper.Utilities import web_utilities
+
+# Utilities
+from TestUtilities.TestUtilities import _remove_test_files
+
+# 3rd party imports
+from io import StringIO
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+
+class WorkerTest(unittest.TestCase):
+    """ :class: Test class for the worker module. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Setup the test class. """
+
+        # Setup a list of test files.
+        cls._static_test_files = []
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Tear down the test class. """
+
+        _remove_test_files(cls._static_test_files)
+
+    def setUp (self):
+        """ Setup the test instance. """
+
+        # Setup list of test files to be removed immediately after each test method.
+        self._test_files = []
+
+    def tearDown (self):
+        """ Tear down the test instance. """
+        _remove_test_files(self._test_files)
+
+    def test_serve_stream (self):
+        """ Test the json lines protocol on streams. """
+
+        infile = StringIO("\n".join([json.dumps(dict(id=1, command='ping')),
+                                     'not json',
+                                     json.dumps(dict(id=2, command='stats')),
+                                     json.dumps(dict(id=3, command='bogus')),
+                                     json.dumps(dict(id=4, command='shutdown')),
+                                     json.dumps(dict(id=5, command='ping')),
+                                     ]))
+        outfile = StringIO()
+
+        self.assertTrue(serve_stream(ScraperWorker(), infile, outfile))
+
+        responses = [json.loads(line) for line in outfile.getvalue().splitlines()]
+        self.assertEqual([r['id'] for r in responses], [1, None, 2, 3, 4])
+        self.assertEqual([r['status'] for r in responses], ['ok', 'error', 'ok', 'error', 'ok'])
+        self.assertEqual(responses[2]['stats']['jobs'], 0)
+        self.assertFalse(responses[2]['stats']['pdc_connected'])
+
+    def test_failed_job (self):
+        """ Test that failing jobs are reported and counted, not raised. """
+
+        worker = ScraperWorker()
+
+        web_utilities.set_url_rewrites({'https://www.pseudomonas.com': 'http://127.0.0.1:9'})
+        web_utilities.reset_probes()
+        try:
+            response = worker.handle(dict(id='a', strain='sbw25', feature='pflu0916', sources=['pdc']))
+        finally:
+            web_utilities.set_url_rewrites({})
+
+        self.assertEqual(response['status'], 'error')
+        self.assertIn('ConnectionError', response['error'])
+        self.assertEqual(worker.stats()['failed'], 1)
+
+    def test_serve_unix (self):
+        """ Test serving on a unix socket. """
+
+        path = os.path.join(tempfile.mkdtemp(prefix='worker_'), 'worker.sock')
+        self._test_files.append(os.path.dirname(path))
+
+        thread = threading.Thread(target=serve_unix, args=(ScraperWorker(), path), daemon=True)
+        thread.start()
+        for i in range(100):
+            if os.path.exists(path):
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(submit(path, dict(id=1, command='ping')), dict(id=1, status='ok'))
+        self.assertEqual(submit(path, dict(id=2, command='stats'))['stats']['jobs'], 0)
+        submit(path, dict(id=3, command='shutdown'))
+
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(path))
+
+if __name__ == "__main__":
+    unittest.main()